@@ -1,3 +1,4 @@
+from app import metricas
 from app.services.sistema_ponto import SistemaPonto
 
 
@@ -13,6 +14,8 @@ def menu() -> None:
         print("5 - Mostrar gráfico de barras (idade)")
         print("6 - Mostrar gráfico de pizza (turno)")
         print("7 - Listar registros de ponto")
+        print("8 - Importar funcionários (CSV/Excel)")
+        print("9 - Desempenho (métricas)")
         print("0 - Sair")
 
         opcao = input("Escolha uma opção: ").strip()
@@ -56,8 +59,28 @@ def menu() -> None:
                 else:
                     print(df)
 
+            elif opcao == "8":
+                caminho = input("Arquivo (.csv/.xlsx): ").strip()
+                rejeitados = sistema.importar_funcionarios(caminho)
+                if rejeitados.empty:
+                    print("Todos os funcionários foram importados.")
+                else:
+                    print(f"{len(rejeitados)} linha(s) rejeitada(s):")
+                    print(rejeitados)
+
+            elif opcao == "9":
+                if not metricas.ativo():
+                    print("Métricas desligadas (METRICAS_ATIVAS em app/config.py).")
+                else:
+                    df = metricas.frame()
+                    if df.empty:
+                        print("Nenhuma operação medida ainda.")
+                    else:
+                        print(df.round(3).to_string(index=False))
+
             elif opcao == "0":
                 print("Saindo...")
+                sistema.close()
                 break
 
             else:
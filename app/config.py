@@ -11,3 +11,77 @@ ATTENDANCE_CSV = DATA_DIR / "attendance.csv"
 GRAFICOS_DIR = BASE_DIR / "graficos"
 GRAFICO_IDADE = GRAFICOS_DIR / "idade_barras.png"
 GRAFICO_TURNO = GRAFICOS_DIR / "turno_pizza.png"
+
+# Gráfico de idades: até GRAFICO_IDADE_MAX_BARRAS funcionários, uma barra
+# por funcionário; acima disso, quantidade por faixa de GRAFICO_IDADE_FAIXA anos
+GRAFICO_IDADE_MAX_BARRAS = 30
+GRAFICO_IDADE_FAIXA = 5
+
+# Journal de funcionários: compacta no CSV após N alterações
+EMPLOYEES_JOURNAL_COMPACTAR_A_CADA = 500
+
+# Backend de persistência: "csv" ou "sqlite"
+BACKEND = "csv"
+SQLITE_DB = DATA_DIR / "sistema_ponto.db"
+
+# Escrita dos registros de ponto no CSV
+# - ATTENDANCE_LOTE_TAMANHO: 1 grava cada batida na hora; > 1 acumula
+#   até N linhas (ou ATTENDANCE_LOTE_INTERVALO_S segundos) numa só escrita
+# - ATTENDANCE_DURABILIDADE: "flush" (buffer do SO) ou "fsync" (disco)
+ATTENDANCE_LOTE_TAMANHO = 1
+ATTENDANCE_LOTE_INTERVALO_S = 1.0
+ATTENDANCE_DURABILIDADE = "flush"
+
+# Faixa de idade aceita no cadastro/importação de funcionários
+IDADE_MINIMA = 16
+IDADE_MAXIMA = 100
+
+# Particionamento mensal dos registros (data/attendance/AAAA-MM.csv).
+# Só o mês corrente é carregado na inicialização; os demais sob demanda.
+ATTENDANCE_PARTICIONADO = False
+ATTENDANCE_DIR = DATA_DIR / "attendance"
+
+# Linhas por bloco na leitura em streaming do histórico (iter_chunks)
+ATTENDANCE_CHUNKSIZE = 200_000
+
+# Resumos diários (dia x matrícula e dia x turno), gravados ao lado dos
+# registros; salvos a cada N batidas e no flush()/close()
+RESUMO_DIARIO_ARQUIVO = "resumo_diario.csv"
+RESUMO_TURNO_ARQUIVO = "resumo_turno.csv"
+RESUMO_SALVAR_A_CADA = 500
+
+# Checkpoint binário (NumPy .npz) dos registros e funcionários, gravado ao
+# lado do attendance.csv. Na inicialização carrega o snapshot e lê só as
+# linhas do CSV acrescentadas depois dele; é regravado quando essas linhas
+# passam de SNAPSHOT_CAUDA_MAXIMA.
+SNAPSHOT_ATIVO = True
+SNAPSHOT_CAUDA_MAXIMA = 10_000
+
+# Escritor dedicado dos registros de ponto: um único thread grava as
+# batidas enfileiradas, em lotes. A fila é limitada a ATTENDANCE_FILA_MAXIMA
+# itens; cheia, quem registra espera. Troca a atomicidade validar+gravar
+# entre processos por vazão: use quando um só processo grava os registros.
+ATTENDANCE_ESCRITOR_DEDICADO = False
+ATTENDANCE_FILA_MAXIMA = 10_000
+
+# Servidor de batidas (python -m app.server): protocolo de linhas em TCP.
+# Pedidos que chegam juntos são gravados num único lote de até
+# SERVIDOR_LOTE_MAXIMO batidas; com SERVIDOR_FILA_MAXIMA pedidos na fila o
+# servidor para de ler das conexões até ela esvaziar (contrapressão).
+SERVIDOR_HOST = "127.0.0.1"
+SERVIDOR_PORTA = 8765
+SERVIDOR_FILA_MAXIMA = 10_000
+SERVIDOR_LOTE_MAXIMO = 1_000
+
+# Métricas de desempenho (app/metricas.py): contagem e histograma de
+# latência de cada método público do SistemaPonto e das leituras/gravações
+# dos repositórios. Desligadas, cada chamada custa só o teste de uma flag.
+METRICAS_ATIVAS = False
+
+# Exportação de registros (SistemaPonto.exportar): linhas lidas e escritas
+# por vez, o que limita a memória usada independente do tamanho do período
+EXPORTACAO_BLOCO = 50_000
+
+# Auditoria do histórico (python -m app.services.auditoria): entradas sem
+# saída por mais que estas horas são apontadas como em aberto
+AUDITORIA_HORAS_EM_ABERTO = 16
@@ -0,0 +1,193 @@
+"""
+Métricas de desempenho: contagem e histograma de latência por operação.
+
+Os métodos públicos do SistemaPonto e as leituras/gravações dos
+repositórios são marcados com @instrumentar na definição da classe. Cada
+chamada vira uma amostra em "<Classe>.<método>". Liga/desliga por
+config.METRICAS_ATIVAS (ou ativar() em tempo de execução). Desligado, o
+custo por chamada é só testar uma flag.
+
+    from app import metricas
+    metricas.instantaneo()   # {"SistemaPonto.registrar_entrada": {...}, ...}
+    metricas.frame()         # o mesmo em DataFrame
+    metricas.zerar()
+"""
+from __future__ import annotations
+
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import METRICAS_ATIVAS
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
+
+# Limites superiores das faixas do histograma, em microssegundos (a última
+# faixa, sem limite, pega o que passar de 10 s)
+LIMITES_US = (
+    1, 2, 5, 10, 20, 50, 100, 200, 500,
+    1_000, 2_000, 5_000, 10_000, 20_000, 50_000,
+    100_000, 200_000, 500_000, 1_000_000, 2_000_000, 5_000_000, 10_000_000,
+)
+_LIMITES_NS = tuple(limite * 1000 for limite in LIMITES_US)
+
+# Métodos medidos nos repositórios: leituras e gravações
+PREFIXOS_REPOSITORIO = ("load", "save", "append", "flush", "query", "last_event")
+
+COLUNAS = ["operacao", "chamadas", "erros", "total_ms", "media_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+
+_ativo = METRICAS_ATIVAS
+_lock = threading.Lock()
+
+
+class Histograma:
+    """
+    Contagem de chamadas por faixa de latência (escala 1-2-5), mais total,
+    máximo e erros. Percentis são estimados pelo limite superior da faixa.
+    """
+
+    __slots__ = ("faixas", "chamadas", "erros", "total_ns", "max_ns")
+
+    def __init__(self) -> None:
+        self.faixas = [0] * (len(_LIMITES_NS) + 1)
+        self.chamadas = 0
+        self.erros = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def registrar(self, duracao_ns: int, erro: bool = False) -> None:
+        self.faixas[bisect.bisect_left(_LIMITES_NS, duracao_ns)] += 1
+        self.chamadas += 1
+        self.erros += erro
+        self.total_ns += duracao_ns
+        if duracao_ns > self.max_ns:
+            self.max_ns = duracao_ns
+
+    def percentil(self, q: float) -> int:
+        """
+        Latência (ns) abaixo da qual ficam q% das chamadas (estimada).
+        """
+        alvo = self.chamadas * q / 100
+        acumulado = 0
+        for i, quantidade in enumerate(self.faixas):
+            acumulado += quantidade
+            if quantidade and acumulado >= alvo:
+                return min(_LIMITES_NS[i], self.max_ns) if i < len(_LIMITES_NS) else self.max_ns
+        return self.max_ns
+
+    def resumo(self) -> Dict:
+        ms = 1e-6
+        return {
+            "chamadas": self.chamadas,
+            "erros": self.erros,
+            "total_ms": self.total_ns * ms,
+            "media_ms": self.total_ns * ms / self.chamadas if self.chamadas else 0.0,
+            "p50_ms": self.percentil(50) * ms,
+            "p95_ms": self.percentil(95) * ms,
+            "p99_ms": self.percentil(99) * ms,
+            "max_ms": self.max_ns * ms,
+            "faixas_us": dict(zip([*map(str, LIMITES_US), "+"], self.faixas)),
+        }
+
+
+_histogramas: Dict[str, Histograma] = {}
+
+
+def ativo() -> bool:
+    return _ativo
+
+
+def ativar(ligado: bool = True) -> None:
+    """
+    Liga/desliga a coleta em tempo de execução (o padrão vem de
+    config.METRICAS_ATIVAS). O que já foi coletado é mantido.
+    """
+    global _ativo
+    _ativo = bool(ligado)
+
+
+def registrar(operacao: str, duracao_ns: int, erro: bool = False) -> None:
+    with _lock:
+        histograma = _histogramas.get(operacao)
+        if histograma is None:
+            histograma = _histogramas[operacao] = Histograma()
+        histograma.registrar(duracao_ns, erro)
+
+
+def zerar() -> None:
+    with _lock:
+        _histogramas.clear()
+
+
+def instantaneo() -> Dict[str, Dict]:
+    """
+    Resumo de cada operação medida até agora (chamadas, erros, tempos em ms
+    e contagem por faixa de latência).
+    """
+    with _lock:
+        return {nome: h.resumo() for nome, h in sorted(_histogramas.items())}
+
+
+def frame():
+    """
+    Resumo em DataFrame, uma linha por operação, da mais custosa (tempo
+    total) para a menos.
+    """
+    linhas = [{"operacao": nome, **valores} for nome, valores in instantaneo().items()]
+    df = pd.DataFrame(linhas, columns=COLUNAS)
+    return df.sort_values("total_ms", ascending=False, ignore_index=True)
+
+
+def medido(operacao: str, funcao):
+    """
+    Envolve `funcao` para registrar cada chamada como `operacao`.
+    """
+
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        if not _ativo:
+            return funcao(*args, **kwargs)
+        inicio = time.perf_counter_ns()
+        erro = True
+        try:
+            resultado = funcao(*args, **kwargs)
+            erro = False
+            return resultado
+        finally:
+            registrar(operacao, time.perf_counter_ns() - inicio, erro)
+
+    return envoltorio
+
+
+def instrumentar(
+    prefixos: Optional[Tuple[str, ...]] = None,
+    extras: Iterable[str] = (),
+    ignorar: Iterable[str] = (),
+):
+    """
+    Decorador de classe: mede os métodos públicos definidos nela (ou só os
+    que começam com um dos `prefixos`), mais os nomes em `extras` (ex.:
+    métodos privados de interesse). Geradores ficam de fora: a chamada
+    só cria o gerador, não faz o trabalho.
+    """
+    extras, ignorar = set(extras), set(ignorar)
+
+    def decorador(classe):
+        for nome, valor in list(vars(classe).items()):
+            if not inspect.isfunction(valor) or inspect.isgeneratorfunction(valor) or nome in ignorar:
+                continue
+            publico = not nome.startswith("_") and (prefixos is None or nome.startswith(prefixos))
+            if publico or nome in extras:
+                setattr(classe, nome, medido(f"{classe.__name__}.{nome}", valor))
+        return classe
+
+    return decorador
+
+
+def operacoes() -> List[str]:
+    with _lock:
+        return sorted(_histogramas)
@@ -1,6 +1,14 @@
 from .turno import Turno
 from .funcionario import Funcionario
+from .tipo_registro import TipoRegistro
 from .registro_ponto import RegistroPonto
 from .usuario import Usuario, PapelUsuario
 
-__all__ = ["Turno", "Funcionario", "RegistroPonto", "Usuario", "PapelUsuario"]
+__all__ = [
+    "Turno",
+    "TipoRegistro",
+    "Funcionario",
+    "RegistroPonto",
+    "Usuario",
+    "PapelUsuario",
+]
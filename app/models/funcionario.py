@@ -4,10 +4,13 @@ from typing import Dict
 from .turno import Turno
 
 
-@dataclass
+@dataclass(slots=True)
 class Funcionario:
     """
     Representa um funcionário da empresa.
+
+    Usa slots (sem __dict__ por instância); continua mutável porque
+    editar_funcionario altera nome/idade/turno no próprio objeto.
     """
     matricula: str
     nome: str
@@ -1,16 +1,26 @@
+import sys
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict
 
+from .tipo_registro import TipoRegistro
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class RegistroPonto:
     """
     Um evento de ponto: entrada ou saída em um instante.
+
+    Imutável e sem __dict__ (slots); a matrícula é internada, então
+    milhões de eventos do mesmo funcionário compartilham uma única string.
     """
     matricula: str
     timestamp: datetime
-    tipo: str  # "entrada" ou "saida"
+    tipo: TipoRegistro  # aceita também "entrada"/"saida"
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "matricula", sys.intern(str(self.matricula)))
+        object.__setattr__(self, "tipo", TipoRegistro(self.tipo))
 
     def to_dict(self) -> Dict:
         """
@@ -20,5 +30,5 @@ class RegistroPonto:
             "matricula": self.matricula,
             # Formato "YYYY-MM-DD HH:MM:SS.ffffff" (igual ao seu CSV)
             "timestamp": self.timestamp.isoformat(sep=" "),
-            "tipo": self.tipo,
+            "tipo": self.tipo.value,
         }
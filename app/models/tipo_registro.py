@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class TipoRegistro(str, Enum):
+    """
+    Tipo de um evento de ponto.
+
+    Herda de str para continuar igual ao texto gravado no CSV
+    (TipoRegistro.ENTRADA == "entrada").
+    """
+    ENTRADA = "entrada"
+    SAIDA = "saida"
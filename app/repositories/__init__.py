@@ -1,4 +1,46 @@
+from typing import Optional, Tuple
+
+from app.config import ATTENDANCE_ESCRITOR_DEDICADO, ATTENDANCE_PARTICIONADO, BACKEND
+
 from .employee_csv_repository import EmployeeCSVRepository
 from .attendance_csv_repository import AttendanceCSVRepository
+from .attendance_partitioned_repository import AttendancePartitionedCSVRepository
+from .employee_sqlite_repository import EmployeeSQLiteRepository
+from .attendance_sqlite_repository import AttendanceSQLiteRepository
+from .escritor_dedicado import EscritorDedicado
+
+
+def criar_repositorios(backend: Optional[str] = None) -> Tuple:
+    """
+    Retorna (repositório de funcionários, repositório de registros)
+    do backend escolhido em config.BACKEND ("csv" ou "sqlite").
+    No backend CSV, config.ATTENDANCE_PARTICIONADO liga as partições mensais.
+    Com config.ATTENDANCE_ESCRITOR_DEDICADO os registros são gravados por
+    um thread dedicado (EscritorDedicado).
+    """
+    backend = (backend or BACKEND).lower()
+    if backend == "csv":
+        employee_repo = EmployeeCSVRepository()
+        if ATTENDANCE_PARTICIONADO:
+            attendance_repo = AttendancePartitionedCSVRepository()
+        else:
+            attendance_repo = AttendanceCSVRepository()
+    elif backend == "sqlite":
+        employee_repo, attendance_repo = EmployeeSQLiteRepository(), AttendanceSQLiteRepository()
+    else:
+        raise ValueError(f"Backend inválido: {backend!r}. Use 'csv' ou 'sqlite'.")
+
+    if ATTENDANCE_ESCRITOR_DEDICADO:
+        attendance_repo = EscritorDedicado(attendance_repo)
+    return employee_repo, attendance_repo
+
 
-__all__ = ["EmployeeCSVRepository", "AttendanceCSVRepository"]
+__all__ = [
+    "EmployeeCSVRepository",
+    "AttendanceCSVRepository",
+    "AttendancePartitionedCSVRepository",
+    "EmployeeSQLiteRepository",
+    "AttendanceSQLiteRepository",
+    "EscritorDedicado",
+    "criar_repositorios",
+]
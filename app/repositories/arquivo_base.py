@@ -0,0 +1,125 @@
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+Assinatura = Tuple[Optional[Tuple[int, int]], ...]
+
+
+def assinatura(*paths: Path) -> Assinatura:
+    """
+    (tamanho, mtime em ns) de cada arquivo, ou None se ele não existe.
+
+    Muda sempre que alguém grava no arquivo; os repositórios guardam a
+    assinatura depois de cada leitura/escrita própria para perceber
+    gravações feitas por outro processo (alterado_externamente).
+    """
+    estado = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            estado.append(None)
+        else:
+            estado.append((st.st_size, st.st_mtime_ns))
+    return tuple(estado)
+
+
+def estado_arquivo(path: Path) -> Optional[Dict[str, int]]:
+    """
+    Inode, tamanho, mtime e ctime (em ns) do arquivo, ou None se ele não
+    existe. Diferente da assinatura, pega também uma edição no meio que
+    mantém o tamanho e restaura o mtime, e a troca do arquivo por outro.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return {"inode": st.st_ino, "tamanho": st.st_size, "mtime_ns": st.st_mtime_ns, "ctime_ns": st.st_ctime_ns}
+
+
+class TravaArquivo:
+    """
+    Trava exclusiva entre processos (consultiva, num arquivo <nome>.lock ao
+    lado do arquivo protegido) e entre threads do mesmo processo.
+
+    Reentrante: o mesmo thread pode aninhar `with trava:`; só o nível mais
+    externo mexe na trava do sistema operacional. Use trava_de(path) para
+    que todos os repositórios do processo compartilhem a mesma instância
+    por arquivo (duas travas do SO no mesmo arquivo, no mesmo processo,
+    se bloqueariam).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path.with_name(path.name + ".lock")
+        self._rlock = threading.RLock()
+        self._nivel = 0
+        self._arquivo = None
+        self._pid = os.getpid()
+
+    def __enter__(self) -> "TravaArquivo":
+        self._rlock.acquire()
+        if self._nivel == 0:
+            try:
+                if self._pid != os.getpid():
+                    # Processo filho (fork): o descritor herdado compartilha
+                    # a trava com o pai; abre o próprio
+                    self._arquivo, self._pid = None, os.getpid()
+                if self._arquivo is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._arquivo = open(self.path, "a+b")
+                _travar(self._arquivo)
+            except BaseException:
+                self._rlock.release()
+                raise
+        self._nivel += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._nivel -= 1
+        try:
+            if self._nivel == 0:
+                _destravar(self._arquivo)
+        finally:
+            self._rlock.release()
+
+
+_travas: Dict[Path, TravaArquivo] = {}
+_travas_lock = threading.Lock()
+
+
+def trava_de(path: Path | str) -> TravaArquivo:
+    """
+    A TravaArquivo do processo para `path` (criada no primeiro uso).
+    """
+    chave = Path(path).resolve()
+    with _travas_lock:
+        trava = _travas.get(chave)
+        if trava is None:
+            trava = _travas[chave] = TravaArquivo(chave)
+        return trava
+
+
+if fcntl is not None:
+
+    def _travar(arquivo) -> None:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+
+    def _destravar(arquivo) -> None:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+
+else:  # Windows
+
+    def _travar(arquivo) -> None:
+        arquivo.seek(0)
+        msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _destravar(arquivo) -> None:
+        arquivo.seek(0)
+        msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
@@ -1,44 +1,387 @@
-from pathlib import Path
-from typing import List
+from __future__ import annotations
 
-import pandas as pd
+import atexit
+import csv
+import io
+import os
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from app.config import ATTENDANCE_CSV
+from app.config import (
+    ATTENDANCE_CHUNKSIZE,
+    ATTENDANCE_CSV,
+    ATTENDANCE_DURABILIDADE,
+    ATTENDANCE_LOTE_INTERVALO_S,
+    ATTENDANCE_LOTE_TAMANHO,
+)
+from app.metricas import PREFIXOS_REPOSITORIO, instrumentar
 from app.models.registro_ponto import RegistroPonto
+from app.repositories.arquivo_base import assinatura, trava_de
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
 
+COLUNAS = ["matricula", "timestamp", "tipo"]
+DURABILIDADES = ("flush", "fsync")
 
+
+@instrumentar(PREFIXOS_REPOSITORIO)
 class AttendanceCSVRepository:
-    def __init__(self, path: Path | str = ATTENDANCE_CSV):
+    """
+    Registros de ponto em um CSV só de acréscimos.
+
+    O arquivo fica aberto entre as batidas. Com lote_tamanho > 1 as linhas
+    são acumuladas em memória e gravadas numa única escrita quando o lote
+    enche ou quando passam intervalo_flush segundos desde a primeira linha
+    pendente (write-behind). flush()/close() gravam o que estiver pendente;
+    close() também é registrado no atexit.
+
+    `offset` marca até que byte o arquivo já está refletido em memória
+    (lido ou gravado por esta instância); load_tail(offset) lê só o que
+    vem depois. alterado_externamente() diz, com um stat(), se outro
+    processo gravou no arquivo, e load_new() lê só essas linhas novas.
+
+    Toda gravação acontece sob `trava` (consultiva, entre processos); o
+    SistemaPonto também a segura entre validar e gravar uma batida. Ordem
+    das travas: sempre `trava` antes do lock interno.
+    """
+
+    # Sabe ler só o final do arquivo (load_tail), ver services/snapshot.py
+    carga_incremental = True
+
+    def __init__(
+        self,
+        path: Path | str = ATTENDANCE_CSV,
+        lote_tamanho: int = ATTENDANCE_LOTE_TAMANHO,
+        intervalo_flush: float = ATTENDANCE_LOTE_INTERVALO_S,
+        durabilidade: str = ATTENDANCE_DURABILIDADE,
+    ):
+        if durabilidade not in DURABILIDADES:
+            raise ValueError(f"Durabilidade inválida: {durabilidade!r}. Use 'flush' ou 'fsync'.")
+
         self.path = Path(path)
+        self.lote_tamanho = max(1, int(lote_tamanho))
+        self.intervalo_flush = intervalo_flush
+        self.durabilidade = durabilidade
 
-    def load_all(self) -> List[RegistroPonto]:
+        self.offset = 0
+        self._assinatura = None  # nada lido/gravado ainda
+        # Trechos (início, fim) gravados por esta instância depois de linhas
+        # de outro processo ainda não lidas; load_new pula esses bytes
+        self._trechos_proprios: List[Tuple[int, int]] = []
+        self._arquivo: Optional[io.TextIOWrapper] = None
+        self._pendentes: List[str] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self.trava = trava_de(self.path)
+        atexit.register(self.close)
+
+    def load_frame(self) -> pd.DataFrame:
         """
-        Lê todos os registros do CSV.
+        Lê o CSV em forma colunar, já com timestamp em datetime64.
+
+        É o caminho rápido de carga: nenhuma linha é visitada em Python.
+        """
+        return self.load_tail(0)
+
+    def load_tail(self, offset: int) -> pd.DataFrame:
+        """
+        Lê só as linhas gravadas a partir do byte `offset` (0 = arquivo
+        inteiro, com cabeçalho) e avança self.offset até o fim do que foi
+        lido. Uma última linha ainda sem quebra fica para a próxima leitura.
         """
+        return _ler_linhas(self._ler_trecho(offset), cabecalho=offset == 0)
+
+    def load_tail_registros(self, offset: int, limite_bytes: int) -> Optional[List[RegistroPonto]]:
+        """
+        Como load_tail, mas com o módulo csv (sem pandas), devolvendo
+        RegistroPonto. Para trechos pequenos (partida do CLI com snapshot
+        ou arquivo pequeno) evita importar o pandas.
+
+        Retorna None, sem ler nada, se o trecho passa de `limite_bytes`:
+        aí compensa o load_tail vetorizado.
+        """
+        try:
+            tamanho = os.stat(self.path).st_size
+        except FileNotFoundError:
+            tamanho = 0
+        if tamanho - offset > limite_bytes:
+            return None
+
+        linhas = self._ler_trecho(offset).decode("utf-8").splitlines()
+        if offset == 0:
+            linhas = linhas[1:]
+        return [
+            RegistroPonto(matricula=m, timestamp=datetime.fromisoformat(ts), tipo=tipo)
+            for m, ts, tipo in (linha for linha in csv.reader(linhas) if linha)
+        ]
+
+    def _ler_trecho(self, offset: int) -> bytes:
+        self.flush()
+        dados = b""
+        if self.path.exists():
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                dados = f.read()
+
+        fim = dados.rfind(b"\n") + 1
+        with self._lock:
+            self.offset = offset + fim
+            self._trechos_proprios.clear()
+            self._assinatura = assinatura(self.path)
+        return dados[:fim]
+
+    def load_new(self) -> Optional[pd.DataFrame]:
+        """
+        Linhas que outros processos acrescentaram desde a última leitura ou
+        escrita desta instância (as gravações próprias são puladas).
+
+        Retorna None se o arquivo ficou menor que `offset`, isto é, foi
+        reescrito: nesse caso é preciso reler tudo com load_frame().
+        """
+        self.flush()
+        with self._lock:
+            inicio = self.offset
+            try:
+                with open(self.path, "rb") as f:
+                    if f.seek(0, os.SEEK_END) < inicio:
+                        return None
+                    f.seek(inicio)
+                    dados = f.read()
+            except FileNotFoundError:
+                return None if inicio else _ler_linhas(b"", cabecalho=True)
+
+            fim = dados.rfind(b"\n") + 1
+            novos = dados[:fim]
+            for a, b in sorted(self._trechos_proprios, reverse=True):
+                if inicio <= a and b <= inicio + fim:
+                    novos = novos[: a - inicio] + novos[b - inicio:]
+            self.offset = inicio + fim
+            self._trechos_proprios = [t for t in self._trechos_proprios if t[0] >= self.offset]
+            self._assinatura = assinatura(self.path)
+        return _ler_linhas(novos, cabecalho=inicio == 0)
+
+    def iter_chunks(
+        self,
+        chunksize: int = ATTENDANCE_CHUNKSIZE,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        matriculas: Optional[Iterable[str]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Lê o CSV em blocos de até `chunksize` linhas, já filtrados por
+        período [start, end] e matrículas. A memória usada é limitada ao
+        tamanho do bloco, não ao tamanho do arquivo.
+        """
+        self.flush()
         if not self.path.exists():
-            return []
+            return
+        leitor = pd.read_csv(
+            self.path, dtype={"matricula": str, "tipo": str}, chunksize=chunksize
+        )
+        yield from filtrar_chunks(leitor, start, end, matriculas)
 
-        df = pd.read_csv(self.path, dtype={"matricula": str, "tipo": str})
-        if "timestamp" in df.columns:
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
+    def iter_raw_chunks(self, chunksize: int = ATTENDANCE_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+        """
+        O arquivo inteiro em blocos, na ordem de gravação e sem validar:
+        um timestamp ilegível (ex.: editado à mão) vira NaT em vez de
+        interromper a leitura. É a leitura da auditoria.
+        """
+        self.flush()
+        yield from ler_blocos_brutos(self.path, chunksize)
 
-        registros: List[RegistroPonto] = []
-        for _, row in df.iterrows():
-            registros.append(
-                RegistroPonto(
-                    matricula=str(row["matricula"]),
-                    timestamp=row["timestamp"],
-                    tipo=str(row["tipo"]),
-                )
-            )
+    def load_all(self) -> List[RegistroPonto]:
+        """
+        Lê todos os registros do CSV.
+        """
+        df = self.load_frame()
+        if df.empty:
+            return []
 
-        return registros
+        return frame_para_registros(df)
 
     def append(self, registro: RegistroPonto) -> None:
         """
         Acrescenta um novo registro no CSV (modo append).
         """
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        df = pd.DataFrame([registro.to_dict()])
-        header = not self.path.exists()
-        df.to_csv(self.path, mode="a", header=header, index=False)
+        linha = _formatar_linha(registro)
+        with self.trava, self._lock:
+            self._pendentes.append(linha)
+            if len(self._pendentes) >= self.lote_tamanho:
+                self._gravar_pendentes()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.intervalo_flush, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def append_frame(self, df: pd.DataFrame) -> None:
+        """
+        Acrescenta em bloco um DataFrame matricula/timestamp/tipo,
+        formatado de uma vez e gravado numa única escrita.
+        """
+        if df.empty:
+            return
+        buffer = io.StringIO()
+        df[COLUNAS].to_csv(
+            buffer,
+            header=False,
+            index=False,
+            lineterminator="\n",
+            date_format="%Y-%m-%d %H:%M:%S.%f",
+        )
+        with self.trava, self._lock:
+            self._pendentes.append(buffer.getvalue())
+            self._gravar_pendentes()
+
+    def flush(self) -> None:
+        """
+        Grava as linhas pendentes (respeitando a política de durabilidade).
+        """
+        with self.trava, self._lock:
+            self._gravar_pendentes()
+
+    def alterado_externamente(self) -> bool:
+        """
+        True se o arquivo mudou (tamanho/mtime) sem ter sido por esta instância.
+        """
+        with self._lock:
+            return self._assinatura is not None and assinatura(self.path) != self._assinatura
+
+    def close(self) -> None:
+        """
+        Grava o que estiver pendente e fecha o arquivo.
+        """
+        with self.trava, self._lock:
+            self._gravar_pendentes()
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+
+    def _gravar_pendentes(self) -> None:
+        # Chamado sempre com self.trava e self._lock adquiridos
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pendentes:
+            return
+
+        arquivo = self._abrir()
+        texto = "".join(self._pendentes)
+        inicio = os.fstat(arquivo.fileno()).st_size
+        arquivo.write(texto)
+        arquivo.flush()
+        if self.durabilidade == "fsync":
+            os.fsync(arquivo.fileno())
+        self._pendentes.clear()
+
+        fim = inicio + len(texto.encode("utf-8"))
+        if inicio == self.offset:
+            self.offset = fim
+        else:
+            # Outro processo gravou antes e ainda não foi lido
+            self._trechos_proprios.append((inicio, fim))
+        self._assinatura = assinatura(self.path)
+
+    def _abrir(self) -> io.TextIOWrapper:
+        if self._arquivo is not None and not self._arquivo.closed and not self._aberto_e_atual():
+            # Apagado/substituído por outro processo (ex.: mês comprimido):
+            # gravar no descritor antigo perderia a linha
+            self._arquivo.close()
+        if self._arquivo is None or self._arquivo.closed:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._arquivo = open(self.path, "a", newline="", encoding="utf-8")
+            if self._arquivo.tell() == 0:
+                self._arquivo.write(",".join(COLUNAS) + "\n")
+                self._arquivo.flush()
+                if self.offset == 0:
+                    self.offset = self._arquivo.tell()
+        return self._arquivo
+
+    def _aberto_e_atual(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino == os.fstat(self._arquivo.fileno()).st_ino
+        except FileNotFoundError:
+            return False
+
+
+def _ler_linhas(dados: bytes, cabecalho: bool) -> pd.DataFrame:
+    """
+    Converte linhas completas do CSV (com ou sem a linha de cabeçalho)
+    em DataFrame com timestamp em datetime64.
+    """
+    if not dados:
+        return pd.DataFrame(
+            {
+                "matricula": pd.Series(dtype=str),
+                "timestamp": pd.Series(dtype="datetime64[ns]"),
+                "tipo": pd.Series(dtype=str),
+            }
+        )
+
+    df = pd.read_csv(
+        io.BytesIO(dados),
+        dtype={"matricula": str, "tipo": str},
+        **({} if cabecalho else {"header": None, "names": COLUNAS}),
+    )
+    # ISO8601 aceita linhas com e sem microssegundos
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601")
+    return df
+
+
+def _formatar_linha(registro: RegistroPonto) -> str:
+    d = registro.to_dict()
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow([d[c] for c in COLUNAS])
+    return buffer.getvalue()
+
+
+def filtrar_chunks(
+    chunks: Iterable[pd.DataFrame],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    matriculas: Optional[Iterable[str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Converte o timestamp de cada bloco e aplica os filtros; blocos que
+    ficam vazios não são repassados.
+    """
+    filtro_matriculas = None if matriculas is None else [str(m) for m in matriculas]
+    for chunk in chunks:
+        chunk["timestamp"] = pd.to_datetime(chunk["timestamp"], format="ISO8601")
+        mascara = pd.Series(True, index=chunk.index)
+        if start is not None:
+            mascara &= chunk["timestamp"] >= pd.Timestamp(start)
+        if end is not None:
+            mascara &= chunk["timestamp"] <= pd.Timestamp(end)
+        if filtro_matriculas is not None:
+            mascara &= chunk["matricula"].isin(filtro_matriculas)
+        if mascara.any():
+            yield chunk[mascara] if not mascara.all() else chunk
+
+
+def ler_blocos_brutos(path: Path, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Blocos de um CSV de registros (ou .csv.gz) com timestamps inválidos
+    como NaT; nada se o arquivo não existe.
+    """
+    if not path.exists():
+        return
+    for chunk in pd.read_csv(path, dtype={"matricula": str, "tipo": str}, chunksize=chunksize):
+        chunk["timestamp"] = pd.to_datetime(chunk["timestamp"], format="ISO8601", errors="coerce")
+        yield chunk
+
+
+def frame_para_registros(df: pd.DataFrame) -> List[RegistroPonto]:
+    """
+    Constrói os objetos a partir das colunas (sem iterrows).
+    """
+    return [
+        RegistroPonto(matricula=m, timestamp=t, tipo=tp)
+        for m, t, tp in zip(
+            df["matricula"].astype(str).tolist(),
+            df["timestamp"].tolist(),
+            df["tipo"].astype(str).tolist(),
+        )
+    ]
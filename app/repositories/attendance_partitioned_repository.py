@@ -0,0 +1,279 @@
+"""
+Registros de ponto particionados por mês: data/attendance/AAAA-MM.csv.
+
+Uso (converte o attendance.csv único em partições):
+    python -m app.repositories.attendance_partitioned_repository
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from app.config import ATTENDANCE_CHUNKSIZE, ATTENDANCE_CSV, ATTENDANCE_DIR
+from app.metricas import PREFIXOS_REPOSITORIO, instrumentar
+from app.models.registro_ponto import RegistroPonto
+from app.repositories.arquivo_base import assinatura, trava_de
+from app.repositories.attendance_csv_repository import (
+    COLUNAS,
+    AttendanceCSVRepository,
+    filtrar_chunks,
+    frame_para_registros,
+    ler_blocos_brutos,
+)
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
+
+
+def mes_de(instante) -> str:
+    """
+    Chave da partição ("AAAA-MM") de um instante.
+    """
+    return pd.Timestamp(instante).strftime("%Y-%m")
+
+
+@instrumentar(PREFIXOS_REPOSITORIO)
+class AttendancePartitionedCSVRepository:
+    """
+    Mesma interface do AttendanceCSVRepository, com um arquivo por mês.
+
+    Cada mês é um AttendanceCSVRepository próprio (mesmas opções de escrita
+    em lote). Meses antigos podem ser comprimidos em AAAA-MM.csv.gz; uma
+    batida retroativa num mês comprimido vai para um AAAA-MM.csv ao lado,
+    e a leitura junta os dois.
+
+    Com carga_preguicosa = True o SistemaPonto carrega só o mês corrente e
+    busca os demais com load_partition quando uma consulta precisa deles.
+    """
+
+    carga_preguicosa = True
+
+    def __init__(self, diretorio: Path | str = ATTENDANCE_DIR, **opcoes_escrita):
+        self.diretorio = Path(diretorio)
+        self._opcoes_escrita = opcoes_escrita
+        self._particoes: Dict[str, AttendanceCSVRepository] = {}
+        self._meses_vistos: Set[str] = set()
+        # Trava do conjunto de partições (cada mês tem também a sua)
+        self.trava = trava_de(self.diretorio / "particoes")
+
+    def _particao(self, mes: str) -> AttendanceCSVRepository:
+        if mes not in self._particoes:
+            self._particoes[mes] = AttendanceCSVRepository(
+                self.diretorio / f"{mes}.csv", **self._opcoes_escrita
+            )
+        return self._particoes[mes]
+
+    def meses(self) -> List[str]:
+        """
+        Meses com dados gravados, em ordem cronológica.
+        """
+        self._meses_vistos = self._meses_no_disco()
+        return sorted(self._meses_vistos | set(self._particoes))
+
+    def _meses_no_disco(self) -> Set[str]:
+        if not self.diretorio.exists():
+            return set()
+        arquivos = [*self.diretorio.glob("*.csv"), *self.diretorio.glob("*.csv.gz")]
+        return {p.name.split(".")[0] for p in arquivos}
+
+    def load_partition(self, mes: str) -> pd.DataFrame:
+        """
+        Registros de um mês (parte comprimida + parte em texto).
+        """
+        partes = []
+        comprimido = self.diretorio / f"{mes}.csv.gz"
+        if comprimido.exists():
+            df = pd.read_csv(comprimido, dtype={"matricula": str, "tipo": str})
+            df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601")
+            partes.append(df)
+        partes.append(self._particao(mes).load_frame())
+        partes = [p for p in partes if not p.empty]
+        if not partes:
+            return self._particao(mes).load_frame()
+        return pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+
+    def load_frame(self) -> pd.DataFrame:
+        partes = [self.load_partition(mes) for mes in self.meses()]
+        partes = [p for p in partes if not p.empty]
+        if not partes:
+            return pd.DataFrame(columns=COLUNAS)
+        return pd.concat(partes, ignore_index=True)
+
+    def iter_chunks(
+        self,
+        chunksize: int = ATTENDANCE_CHUNKSIZE,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        matriculas: Optional[Iterable[str]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Lê em blocos só os meses que cruzam o período [start, end].
+        """
+        primeiro = mes_de(start) if start is not None else ""
+        ultimo = mes_de(end) if end is not None else "9999-99"
+        for mes in self.meses():
+            if not primeiro <= mes <= ultimo:
+                continue
+            comprimido = self.diretorio / f"{mes}.csv.gz"
+            if comprimido.exists():
+                leitor = pd.read_csv(
+                    comprimido, dtype={"matricula": str, "tipo": str}, chunksize=chunksize
+                )
+                yield from filtrar_chunks(leitor, start, end, matriculas)
+            yield from self._particao(mes).iter_chunks(chunksize, start, end, matriculas)
+
+    def iter_raw_chunks(self, chunksize: int = ATTENDANCE_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+        """
+        Todos os meses em blocos, sem validar (timestamps ilegíveis viram
+        NaT). Dentro de cada mês, na ordem de gravação; os meses seguem em
+        ordem cronológica.
+        """
+        for mes in self.meses():
+            yield from ler_blocos_brutos(self.diretorio / f"{mes}.csv.gz", chunksize)
+            yield from self._particao(mes).iter_raw_chunks(chunksize)
+
+    def load_all(self) -> List[RegistroPonto]:
+        df = self.load_frame()
+        if df.empty:
+            return []
+        return frame_para_registros(df)
+
+    def append(self, registro: RegistroPonto) -> None:
+        self._particao(mes_de(registro.timestamp)).append(registro)
+
+    def append_frame(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        for mes, parte in df.groupby(df["timestamp"].dt.strftime("%Y-%m"), sort=True):
+            self._particao(mes).append_frame(parte)
+
+    def load_new(self) -> Optional[pd.DataFrame]:
+        """
+        Linhas que outros processos acrescentaram aos meses já abertos por
+        esta instância, mais os meses novos criados por eles.
+        None se algum mês aberto foi reescrito.
+        """
+        partes = []
+        for particao in list(self._particoes.values()):
+            novos = particao.load_new()
+            if novos is None:
+                return None
+            partes.append(novos)
+        for mes in sorted(self._meses_no_disco() - self._meses_vistos - set(self._particoes)):
+            partes.append(self.load_partition(mes))
+        partes = [p for p in partes if not p.empty]
+        if not partes:
+            return pd.DataFrame(columns=COLUNAS)
+        return pd.concat(partes, ignore_index=True)
+
+    def alterado_externamente(self) -> bool:
+        """
+        True se outro processo gravou num mês já aberto por esta instância
+        ou criou um mês novo.
+        """
+        if any(p.alterado_externamente() for p in self._particoes.values()):
+            return True
+        return bool(self._meses_no_disco() - self._meses_vistos - set(self._particoes))
+
+    def flush(self) -> None:
+        for particao in self._particoes.values():
+            particao.flush()
+
+    def close(self) -> None:
+        for particao in self._particoes.values():
+            particao.close()
+
+    def compress_old_partitions(self, antes_de: Optional[str] = None) -> List[str]:
+        """
+        Comprime (gzip) os meses anteriores a `antes_de` (padrão: mês atual).
+
+        Se o mês já tinha um .csv.gz, o texto novo vira mais um membro gzip
+        no fim do arquivo (formato válido, lido normalmente).
+        Retorna os meses comprimidos.
+
+        Pode rodar com outros processos gravando: cada mês é comprimido sob
+        a trava dele (a mesma das gravações). O texto é comprimido primeiro
+        num temporário; se o .csv mudou nesse meio tempo o mês fica para a
+        próxima vez, senão o membro é acrescentado ao .gz e o .csv apagado.
+        Quem ainda tinha o .csv aberto reabre um novo na próxima gravação.
+        """
+        antes_de = antes_de or mes_de(pd.Timestamp.now())
+        comprimidos = []
+        with self.trava:
+            for mes in self.meses():
+                texto = self.diretorio / f"{mes}.csv"
+                if mes >= antes_de or not texto.exists():
+                    continue
+                particao = self._particao(mes)
+                with particao.trava:
+                    particao.close()
+                    if self._comprimir_mes(texto, self.diretorio / f"{mes}.csv.gz"):
+                        self._particoes.pop(mes, None)
+                        comprimidos.append(mes)
+        return comprimidos
+
+    @staticmethod
+    def _comprimir_mes(texto: Path, destino: Path) -> bool:
+        # Chamado com a trava do mês adquirida
+        antes = assinatura(texto)
+        fd, tmp = tempfile.mkstemp(prefix=destino.name + ".", suffix=".tmp", dir=destino.parent)
+        try:
+            with open(texto, "rb") as origem, os.fdopen(fd, "wb") as bruto, gzip.GzipFile(
+                fileobj=bruto, mode="wb"
+            ) as saida:
+                if destino.exists():
+                    origem.readline()  # o cabeçalho já está no .gz
+                shutil.copyfileobj(origem, saida)
+            if assinatura(texto) != antes:
+                return False  # gravado por fora da trava: tenta de novo depois
+            with open(tmp, "rb") as membro, open(destino, "ab") as gz:
+                shutil.copyfileobj(membro, gz)
+                gz.flush()
+                os.fsync(gz.fileno())
+            texto.unlink()
+            return True
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+
+
+def particionar_csv(
+    origem: Path | str = ATTENDANCE_CSV,
+    diretorio: Path | str = ATTENDANCE_DIR,
+) -> int:
+    """
+    Copia o attendance.csv único para partições mensais.
+    Retorna a quantidade de registros copiados.
+    """
+    df = AttendanceCSVRepository(origem).load_frame()
+    repo = AttendancePartitionedCSVRepository(diretorio)
+    repo.append_frame(df)
+    repo.close()
+    return len(df)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--origem", default=ATTENDANCE_CSV)
+    parser.add_argument("--diretorio", default=ATTENDANCE_DIR)
+    parser.add_argument(
+        "--comprimir",
+        action="store_true",
+        help="comprime (gzip) os meses anteriores ao atual",
+    )
+    args = parser.parse_args()
+
+    total = particionar_csv(args.origem, args.diretorio)
+    print(f"{total} registros copiados para {args.diretorio}.")
+    if args.comprimir:
+        meses = AttendancePartitionedCSVRepository(args.diretorio).compress_old_partitions()
+        print(f"Meses comprimidos: {', '.join(meses) or 'nenhum'}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set
+
+from app.config import ATTENDANCE_CHUNKSIZE, SQLITE_DB
+from app.metricas import PREFIXOS_REPOSITORIO, instrumentar
+from app.models.registro_ponto import RegistroPonto
+from app.repositories.attendance_csv_repository import frame_para_registros
+from app.repositories.arquivo_base import trava_de
+from app.repositories.sqlite_base import conectar
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
+
+
+def _para_ns(instante: datetime) -> int:
+    return pd.Timestamp(instante).as_unit("ns").value
+
+
+def _consulta(
+    inicio: Optional[datetime],
+    fim: Optional[datetime],
+    matriculas: Optional[Iterable[str]],
+) -> tuple[str, list]:
+    condicoes, params = [], []
+    if matriculas is not None:
+        matriculas = [str(m) for m in matriculas]
+        condicoes.append(f"matricula IN ({', '.join('?' * len(matriculas))})")
+        params.extend(matriculas)
+    if inicio is not None:
+        condicoes.append("timestamp >= ?")
+        params.append(_para_ns(inicio))
+    if fim is not None:
+        condicoes.append("timestamp <= ?")
+        params.append(_para_ns(fim))
+
+    sql = "SELECT matricula, timestamp, tipo FROM registros"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    return sql + " ORDER BY timestamp, id", params
+
+
+def _converter_timestamp(df: pd.DataFrame) -> pd.DataFrame:
+    df["timestamp"] = pd.to_datetime(df["timestamp"].astype("int64"), unit="ns")
+    return df
+
+
+@instrumentar(PREFIXOS_REPOSITORIO)
+class AttendanceSQLiteRepository:
+    """
+    Registros de ponto na tabela `registros` do SQLite.
+
+    Mesma interface do AttendanceCSVRepository, mais consultas que usam o
+    índice (matricula, timestamp): query_frame e last_event. Com
+    consulta_no_banco = True o SistemaPonto não carrega o histórico
+    inteiro em memória e delega essas consultas ao banco.
+
+    Batidas de outros processos: alterado_externamente() compara o
+    PRAGMA data_version (muda a cada commit de outra conexão) e load_new()
+    lê só as linhas com id depois do último já visto, pulando as gravadas
+    por esta instância.
+    """
+
+    consulta_no_banco = True
+
+    def __init__(self, path: Path | str = SQLITE_DB):
+        self.path = Path(path)
+        self.conn = conectar(self.path)
+        # O próprio SQLite serializa as escritas; a trava cobre o intervalo
+        # entre validar (last_event) e gravar uma batida no SistemaPonto
+        self.trava = trava_de(self.path)
+        self._versao = self._data_version()
+        self._ultimo_id = self._max_id()
+        # Ids gravados por esta instância depois de linhas de outro
+        # processo ainda não lidas; load_new os pula
+        self._ids_proprios: Set[int] = set()
+
+    def load_frame(self) -> pd.DataFrame:
+        return self.query_frame()
+
+    def load_all(self) -> List[RegistroPonto]:
+        df = self.load_frame()
+        if df.empty:
+            return []
+        return frame_para_registros(df)
+
+    def append(self, registro: RegistroPonto) -> None:
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO registros (matricula, timestamp, tipo) VALUES (?, ?, ?)",
+                (registro.matricula, _para_ns(registro.timestamp), registro.tipo.value),
+            )
+        self._marcar_proprios(cursor.lastrowid, cursor.lastrowid)
+
+    def append_frame(self, df: pd.DataFrame) -> None:
+        """
+        Inserção em bloco de um DataFrame matricula/timestamp/tipo,
+        numa única transação.
+        """
+        linhas = zip(
+            df["matricula"].astype(str).tolist(),
+            df["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64").tolist(),
+            df["tipo"].astype(str).tolist(),
+        )
+        with self.conn:
+            cursor = self.conn.executemany(
+                "INSERT INTO registros (matricula, timestamp, tipo) VALUES (?, ?, ?)",
+                linhas,
+            )
+            # Na mesma transação os ids inseridos são consecutivos
+            ultimo = self._max_id()
+        if cursor.rowcount > 0:
+            self._marcar_proprios(ultimo - cursor.rowcount + 1, ultimo)
+
+    def query_frame(
+        self,
+        matricula: Optional[str] = None,
+        inicio: Optional[datetime] = None,
+        fim: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        Registros filtrados por matrícula e/ou intervalo [inicio, fim],
+        ordenados por timestamp.
+        """
+        matriculas = None if matricula is None else [matricula]
+        sql, params = _consulta(inicio, fim, matriculas)
+        df = pd.read_sql_query(sql, self.conn, params=params, dtype={"matricula": str, "tipo": str})
+        return _converter_timestamp(df)
+
+    def iter_chunks(
+        self,
+        chunksize: int = ATTENDANCE_CHUNKSIZE,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        matriculas: Optional[Iterable[str]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Mesma consulta de query_frame, lida do cursor em blocos.
+        """
+        sql, params = _consulta(start, end, matriculas)
+        for chunk in pd.read_sql_query(
+            sql,
+            self.conn,
+            params=params,
+            dtype={"matricula": str, "tipo": str},
+            chunksize=chunksize,
+        ):
+            yield _converter_timestamp(chunk)
+
+    def iter_raw_chunks(self, chunksize: int = ATTENDANCE_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+        """
+        A tabela inteira em blocos, na ordem de gravação (id), e não na de
+        timestamp como iter_chunks. É a leitura da auditoria.
+        """
+        for chunk in pd.read_sql_query(
+            "SELECT matricula, timestamp, tipo FROM registros ORDER BY id",
+            self.conn,
+            dtype={"matricula": str, "tipo": str},
+            chunksize=chunksize,
+        ):
+            yield _converter_timestamp(chunk)
+
+    def last_event(self, matricula: str, ignorar: Iterable[int] = ()) -> Optional[RegistroPonto]:
+        """
+        Último evento da matrícula (busca pelo índice, sem varrer a tabela),
+        sem contar as linhas de id em `ignorar`.
+        """
+        ignorar = [int(i) for i in ignorar]
+        filtro = f" AND id NOT IN ({', '.join('?' * len(ignorar))})" if ignorar else ""
+        linha = self.conn.execute(
+            "SELECT timestamp, tipo FROM registros WHERE matricula = ?" + filtro
+            + " ORDER BY timestamp DESC, id DESC LIMIT 1",
+            (str(matricula), *ignorar),
+        ).fetchone()
+        if linha is None:
+            return None
+        return RegistroPonto(
+            matricula=str(matricula),
+            timestamp=pd.Timestamp(linha[0]).to_pydatetime(),
+            tipo=linha[1],
+        )
+
+    def flush(self) -> None:
+        """
+        Cada append já é uma transação confirmada; nada a fazer.
+        """
+
+    def load_new(self) -> Optional[pd.DataFrame]:
+        """
+        Linhas que outros processos gravaram desde a última leitura desta
+        instância, em ordem de gravação e com o id da linha como índice.
+
+        Retorna None se linhas já vistas foram apagadas (o maior id ficou
+        menor): nesse caso é preciso recontar tudo.
+        """
+        self._versao = self._data_version()
+        if self._max_id() < self._ultimo_id:
+            self._ultimo_id, self._ids_proprios = self._max_id(), set()
+            return None
+        df = pd.read_sql_query(
+            "SELECT id, matricula, timestamp, tipo FROM registros WHERE id > ? ORDER BY id",
+            self.conn,
+            params=[self._ultimo_id],
+            dtype={"matricula": str, "tipo": str},
+            index_col="id",
+        )
+        if not df.empty:
+            self._ultimo_id = max(self._ultimo_id, int(df.index.max()))
+        df = df.drop(index=[i for i in self._ids_proprios if i in df.index])
+        self._ids_proprios = {i for i in self._ids_proprios if i > self._ultimo_id}
+        return _converter_timestamp(df)
+
+    def alterado_externamente(self) -> bool:
+        """
+        True se outra conexão (outro processo) gravou no banco depois da
+        última leitura desta instância. Custa um PRAGMA.
+        """
+        return self._data_version() != self._versao
+
+    def _marcar_proprios(self, primeiro: int, ultimo: int) -> None:
+        if primeiro == self._ultimo_id + 1 and not self._ids_proprios:
+            self._ultimo_id = ultimo
+        else:
+            # Outro processo gravou antes e ainda não foi lido
+            self._ids_proprios.update(range(primeiro, ultimo + 1))
+
+    def _data_version(self) -> int:
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _max_id(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM registros").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM registros").fetchone()[0]
@@ -1,44 +1,255 @@
-from pathlib import Path
-from typing import List
+from __future__ import annotations
 
-import pandas as pd
+import csv
+import io
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
 
 from app.config import EMPLOYEES_CSV
+from app.metricas import PREFIXOS_REPOSITORIO, instrumentar
 from app.models.funcionario import Funcionario
 from app.models.turno import Turno
+from app.repositories.arquivo_base import assinatura, trava_de
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
 
+COLUNAS = ["matricula", "nome", "idade", "turno"]
+COLUNAS_JOURNAL = ["operacao", *COLUNAS]
+OPERACOES = ("create", "update")
 
+
+@instrumentar(PREFIXOS_REPOSITORIO)
 class EmployeeCSVRepository:
-    def __init__(self, path: Path | str = EMPLOYEES_CSV):
+    """
+    Funcionários em um snapshot CSV + um journal só de acréscimos.
+
+    Cada cadastro/edição vira uma linha no journal (append_change); o
+    snapshot só é reescrito na compactação (save_all), de forma atômica.
+    A carga aplica o journal por cima do snapshot.
+
+    Acréscimos e compactação acontecem sob `trava` (consultiva, entre
+    processos), para uma compactação não apagar o journal no meio do
+    acréscimo de outro processo.
+    """
+
+    def __init__(
+        self,
+        path: Path | str = EMPLOYEES_CSV,
+        journal_path: Optional[Path | str] = None,
+    ):
         self.path = Path(path)
+        self.journal_path = Path(journal_path or self.path.with_suffix(".journal.csv"))
+        self.journal_size = 0
+        self._assinatura = None  # nada lido/gravado ainda
+        self.trava = trava_de(self.path)
+
+    def load_frame(self) -> pd.DataFrame:
+        """
+        Lê snapshot + journal em forma colunar, com turno já convertido para Enum.
+        """
+        partes = []
+        if self.path.exists():
+            partes.append(pd.read_csv(self.path, dtype={"matricula": str, "nome": str}))
+
+        self.marcar_como_lido()
+        journal = self._ler_journal()
+        self.journal_size = len(journal)
+        if not journal.empty:
+            partes.append(journal[COLUNAS])
+
+        if not partes:
+            return pd.DataFrame(columns=COLUNAS)
+
+        df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+        if not journal.empty:
+            # Última versão de cada matrícula, na ordem do primeiro cadastro
+            ordem = df["matricula"].drop_duplicates(keep="first")
+            df = (
+                df.drop_duplicates("matricula", keep="last")
+                .set_index("matricula")
+                .loc[ordem]
+                .reset_index()
+            )
+
+        return converter_colunas(df)
+
+    def _ler_journal(self) -> pd.DataFrame:
+        df = pd.DataFrame(self._linhas_journal(), columns=COLUNAS_JOURNAL)
+        return df.astype({"idade": int})
+
+    def _linhas_journal(self) -> List[List[str]]:
+        """
+        Linhas válidas do journal (operacao, matricula, nome, idade, turno).
+
+        Uma linha cortada por queda no meio da escrita é descartada: a
+        última, se não termina em quebra de linha, e qualquer uma com campo
+        faltando, operação, idade ou turno inválidos (um corte que um
+        acréscimo posterior já fechou com quebra de linha).
+        """
+        if not self.journal_path.exists():
+            return []
+        with open(self.journal_path, newline="", encoding="utf-8") as f:
+            texto = f.read()
+        if not texto.endswith("\n"):
+            texto = texto[: texto.rfind("\n") + 1]
+
+        turnos = {t.value for t in Turno}
+        linhas = []
+        for registro in csv.DictReader(io.StringIO(texto, newline="")):
+            linha = [registro.get(c) for c in COLUNAS_JOURNAL]
+            operacao, _, _, idade, turno = linha
+            if (
+                any(not campo for campo in linha)
+                or operacao not in OPERACOES
+                or turno not in turnos
+                or not idade.strip().isdigit()
+            ):
+                continue
+            linhas.append(linha)
+        return linhas
 
     def load_all(self) -> List[Funcionario]:
         """
-        Lê todos os funcionários do CSV.
+        Lê todos os funcionários do CSV (snapshot + journal).
         Se o arquivo não existir, retorna lista vazia.
+
+        Usa só o módulo csv (sem pandas): o arquivo é pequeno e este é o
+        caminho da partida do sistema.
         """
-        if not self.path.exists():
-            return []
+        linhas: Dict[str, List[str]] = {}
+        if self.path.exists():
+            with open(self.path, newline="", encoding="utf-8") as f:
+                leitor = csv.reader(f)
+                cabecalho = next(leitor, None)
+                if cabecalho is not None:
+                    posicoes = [cabecalho.index(c) for c in COLUNAS]
+                    for linha in leitor:
+                        if linha:
+                            linhas[linha[posicoes[0]]] = [linha[i] for i in posicoes]
 
-        df = pd.read_csv(self.path, dtype={"matricula": str})
-        funcionarios: List[Funcionario] = []
-
-        for _, row in df.iterrows():
-            funcionarios.append(
-                Funcionario(
-                    matricula=str(row["matricula"]),
-                    nome=str(row["nome"]),
-                    idade=int(row["idade"]),
-                    turno=Turno(row["turno"]),  # converte texto -> Enum
-                )
-            )
+        self.marcar_como_lido()
+        journal = self._linhas_journal()
+        self.journal_size = len(journal)
+        for _, matricula, nome, idade, turno in journal:
+            # Última versão de cada matrícula, na ordem do primeiro cadastro
+            linhas[matricula] = [matricula, nome, idade, turno]
+
+        return linhas_para_funcionarios(linhas.values())
+
+    def append_change(self, operacao: str, funcionario: Funcionario) -> None:
+        """
+        Acrescenta um cadastro ("create") ou edição ("update") ao journal.
+        """
+        self.append_changes(operacao, [funcionario])
+
+    def append_changes(self, operacao: str, funcionarios: List[Funcionario]) -> None:
+        """
+        Acrescenta várias alterações ao journal numa única escrita.
+        """
+        if operacao not in OPERACOES:
+            raise ValueError(f"Operação de journal inválida: {operacao!r}.")
+        if not funcionarios:
+            return
+
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        linhas = io.StringIO()
+        writer = csv.writer(linhas, lineterminator="\n")
+        for funcionario in funcionarios:
+            d = funcionario.to_dict()
+            writer.writerow([operacao, *(d[c] for c in COLUNAS)])
 
-        return funcionarios
+        with self.trava, open(self.journal_path, "ab+") as f:
+            if f.tell() == 0:
+                f.write((",".join(COLUNAS_JOURNAL) + "\n").encode("utf-8"))
+            else:
+                # Fecha uma linha deixada pela metade por uma queda anterior
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write(linhas.getvalue().encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_size += len(funcionarios)
+        self.marcar_como_lido()
 
     def save_all(self, funcionarios: List[Funcionario]) -> None:
         """
-        Sobrescreve o CSV com a lista de funcionários atual.
+        Compacta: sobrescreve o CSV com a lista de funcionários atual
+        e zera o journal.
+
+        O snapshot é escrito num arquivo temporário e trocado com
+        os.replace, então uma queda no meio nunca deixa o CSV truncado.
         """
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        df = pd.DataFrame([f.to_dict() for f in funcionarios])
-        df.to_csv(self.path, index=False)
+        df = pd.DataFrame([f.to_dict() for f in funcionarios], columns=COLUNAS)
+        tmp = self.path.with_suffix(".csv.tmp")
+        with self.trava:
+            df.to_csv(tmp, index=False)
+            os.replace(tmp, self.path)
+
+            # Se cair antes daqui, reaplicar o journal é inofensivo (upserts)
+            self.journal_path.unlink(missing_ok=True)
+            self.journal_size = 0
+            self.marcar_como_lido()
+
+    def marcar_como_lido(self) -> None:
+        """
+        Registra o estado atual dos arquivos como já refletido em memória
+        (ex.: funcionários vindos de um snapshot validado).
+        """
+        self._assinatura = self._estado_arquivos()
+
+    def alterado_externamente(self) -> bool:
+        """
+        True se o snapshot ou o journal mudou sem ter sido por esta instância.
+        """
+        return self._assinatura is not None and self._estado_arquivos() != self._assinatura
+
+    def _estado_arquivos(self):
+        return assinatura(self.path, self.journal_path)
+
+
+def converter_colunas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte turno (texto -> Enum) e idade (int) para a coluna inteira.
+    """
+    turnos = df["turno"].map({t.value: t for t in Turno})
+    invalidos = df.loc[turnos.isna(), "turno"]
+    if not invalidos.empty:
+        raise ValueError(f"{invalidos.iloc[0]!r} is not a valid Turno")
+    df["turno"] = turnos
+    df["idade"] = df["idade"].astype(int)
+    return df
+
+
+def frame_para_funcionarios(df: pd.DataFrame) -> List[Funcionario]:
+    """
+    Constrói os objetos a partir das colunas (sem iterrows).
+    """
+    return [
+        Funcionario(matricula=m, nome=n, idade=i, turno=t)
+        for m, n, i, t in zip(
+            df["matricula"].astype(str).tolist(),
+            df["nome"].astype(str).tolist(),
+            df["idade"].tolist(),
+            df["turno"].tolist(),
+        )
+    ]
+
+
+def linhas_para_funcionarios(linhas: Iterable[Sequence]) -> List[Funcionario]:
+    """
+    Constrói os objetos a partir de linhas (matricula, nome, idade, turno)
+    com turno em texto, sem passar por DataFrame.
+    """
+    turnos = {t.value: t for t in Turno}
+    funcionarios = []
+    for matricula, nome, idade, turno in linhas:
+        if turno not in turnos:
+            raise ValueError(f"{turno!r} is not a valid Turno")
+        funcionarios.append(
+            Funcionario(matricula=str(matricula), nome=str(nome), idade=int(idade), turno=turnos[turno])
+        )
+    return funcionarios
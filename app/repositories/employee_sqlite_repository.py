@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional
+
+from app.config import SQLITE_DB
+from app.metricas import PREFIXOS_REPOSITORIO, instrumentar
+from app.models.funcionario import Funcionario
+from app.repositories.employee_csv_repository import (
+    OPERACOES,
+    converter_colunas,
+    frame_para_funcionarios,
+)
+from app.repositories.arquivo_base import trava_de
+from app.repositories.sqlite_base import conectar
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
+
+_UPSERT = (
+    "INSERT OR REPLACE INTO funcionarios (matricula, nome, idade, turno) "
+    "VALUES (:matricula, :nome, :idade, :turno)"
+)
+_UPDATE = (
+    "UPDATE funcionarios SET nome = :nome, idade = :idade, turno = :turno "
+    "WHERE matricula = :matricula"
+)
+
+
+@instrumentar(PREFIXOS_REPOSITORIO)
+class EmployeeSQLiteRepository:
+    """
+    Funcionários na tabela `funcionarios` do SQLite.
+
+    Mesma interface do EmployeeCSVRepository. Cada alteração é um upsert
+    de uma linha, então não há journal para compactar (journal_size = 0).
+
+    Gravações de outros processos são percebidas pela versão de escrita
+    da tabela `versao_funcionarios`, mantida por triggers (ver sqlite_base).
+    """
+
+    journal_size = 0
+
+    def __init__(self, path: Path | str = SQLITE_DB):
+        self.path = Path(path)
+        self.conn = conectar(self.path)
+        self.trava = trava_de(self.path)
+        self._versao: Optional[int] = None
+
+    def load_frame(self) -> pd.DataFrame:
+        self.marcar_como_lido()
+        df = pd.read_sql_query(
+            "SELECT matricula, nome, idade, turno FROM funcionarios ORDER BY rowid",
+            self.conn,
+            dtype={"matricula": str, "nome": str},
+        )
+        return converter_colunas(df)
+
+    def load_all(self) -> List[Funcionario]:
+        df = self.load_frame()
+        if df.empty:
+            return []
+        return frame_para_funcionarios(df)
+
+    def append_change(self, operacao: str, funcionario: Funcionario) -> None:
+        """
+        Grava um cadastro ("create") ou edição ("update").
+        """
+        self.append_changes(operacao, [funcionario])
+
+    def append_changes(self, operacao: str, funcionarios: List[Funcionario]) -> None:
+        """
+        Grava vários cadastros/edições numa única transação.
+        """
+        if operacao not in OPERACOES:
+            raise ValueError(f"Operação inválida: {operacao!r}.")
+        sql = _UPDATE if operacao == "update" else _UPSERT
+        with self.conn:
+            self.conn.executemany(sql, (f.to_dict() for f in funcionarios))
+        self.marcar_como_lido()
+
+    def marcar_como_lido(self) -> None:
+        self._versao = self._versao_escrita()
+
+    def alterado_externamente(self) -> bool:
+        return self._versao is not None and self._versao_escrita() != self._versao
+
+    def _versao_escrita(self) -> int:
+        return self.conn.execute("SELECT versao FROM versao_funcionarios").fetchone()[0]
+
+    def save_all(self, funcionarios: List[Funcionario]) -> None:
+        """
+        Substitui a tabela inteira pela lista atual (numa transação).
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM funcionarios")
+            self.conn.executemany(_UPSERT, (f.to_dict() for f in funcionarios))
+        self.marcar_como_lido()
+
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import atexit
+import contextlib
+import queue
+import threading
+from typing import List, Optional
+
+from app.config import ATTENDANCE_FILA_MAXIMA
+from app.models.registro_ponto import RegistroPonto
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
+
+# Métodos de leitura: esperam a fila esvaziar antes de repassar ao repositório
+_LEITURAS = {
+    "load_frame",
+    "load_all",
+    "load_tail",
+    "load_tail_registros",
+    "load_new",
+    "load_partition",
+    "iter_chunks",
+    "iter_raw_chunks",
+    "query_frame",
+    "last_event",
+    "count",
+}
+
+_FIM = object()
+
+
+class EscritorDedicado:
+    """
+    Envolve um repositório de registros e faz todas as gravações num único
+    thread dedicado, alimentado por uma fila limitada.
+
+    append()/append_frame() só enfileiram; o thread escritor junta o que
+    houver na fila e grava numa única chamada a append_frame() do
+    repositório. Com a fila cheia quem enfileira espera (contrapressão).
+    Leituras (load_*, iter_chunks, iter_raw_chunks, query_frame,
+    last_event, count) e flush() esperam a fila esvaziar; o resto é
+    repassado como está.
+
+    Como a gravação acontece depois da validação, `trava` aqui não trava
+    nada: a exclusão entre processos fica por conta do repositório, no
+    momento de gravar cada lote.
+    """
+
+    trava = contextlib.nullcontext()
+
+    def __init__(self, repo, tamanho_fila: int = ATTENDANCE_FILA_MAXIMA):
+        self.repo = repo
+        self._fila: "queue.Queue" = queue.Queue(maxsize=max(1, int(tamanho_fila)))
+        # Serializa o acesso ao repositório entre o escritor e as leituras
+        self._lock_repo = threading.RLock()
+        self._erro: Optional[BaseException] = None
+        self._fechado = False
+        self._thread = threading.Thread(
+            target=self._drenar, name="escritor-registros", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __getattr__(self, nome):
+        atributo = getattr(self.repo, nome)
+        if nome in _LEITURAS and callable(atributo):
+            def leitura(*args, **kwargs):
+                self._esperar_fila()
+                with self._lock_repo:
+                    return atributo(*args, **kwargs)
+            return leitura
+        return atributo
+
+    def append(self, registro: RegistroPonto) -> None:
+        self._enfileirar(registro)
+
+    def append_frame(self, df: pd.DataFrame) -> None:
+        if not df.empty:
+            self._enfileirar(df)
+
+    def flush(self) -> None:
+        """
+        Espera o escritor gravar tudo o que foi enfileirado.
+        """
+        self._esperar_fila()
+        with self._lock_repo:
+            self.repo.flush()
+
+    def close(self) -> None:
+        """
+        Grava o que falta, encerra o thread escritor e fecha o repositório.
+        """
+        if self._fechado:
+            return
+        self._fechado = True
+        self._fila.put(_FIM)
+        self._thread.join()
+        with self._lock_repo:
+            self.repo.close()
+        self._verificar_erro()
+
+    def _enfileirar(self, item) -> None:
+        if self._fechado:
+            raise RuntimeError("Escritor de registros já foi fechado.")
+        self._verificar_erro()
+        self._fila.put(item)
+
+    def _esperar_fila(self) -> None:
+        if not self._fechado:
+            self._fila.join()
+        self._verificar_erro()
+
+    def _verificar_erro(self) -> None:
+        if self._erro is not None:
+            erro, self._erro = self._erro, None
+            raise RuntimeError("Falha ao gravar registros em segundo plano.") from erro
+
+    def _drenar(self) -> None:
+        while True:
+            lote = [self._fila.get()]
+            while True:
+                try:
+                    lote.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            fim = any(item is _FIM for item in lote)
+            itens = [item for item in lote if item is not _FIM]
+            try:
+                if itens:
+                    with self._lock_repo:
+                        self.repo.append_frame(_juntar(itens))
+            except BaseException as erro:  # repassado na próxima chamada
+                self._erro = erro
+            finally:
+                for _ in lote:
+                    self._fila.task_done()
+            if fim:
+                return
+
+
+def _juntar(itens: List) -> pd.DataFrame:
+    """
+    Um só DataFrame matricula/timestamp/tipo, na ordem de chegada, a partir
+    de registros avulsos e DataFrames enfileirados.
+    """
+    partes: List[pd.DataFrame] = []
+    avulsos: List[RegistroPonto] = []
+
+    def fechar_avulsos() -> None:
+        if avulsos:
+            partes.append(
+                pd.DataFrame(
+                    {
+                        "matricula": [r.matricula for r in avulsos],
+                        "timestamp": pd.to_datetime([r.timestamp for r in avulsos]),
+                        "tipo": [r.tipo.value for r in avulsos],
+                    }
+                )
+            )
+            avulsos.clear()
+
+    for item in itens:
+        if isinstance(item, RegistroPonto):
+            avulsos.append(item)
+        else:
+            fechar_avulsos()
+            partes.append(item[["matricula", "timestamp", "tipo"]])
+    fechar_avulsos()
+    return partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
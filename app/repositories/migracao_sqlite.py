@@ -0,0 +1,64 @@
+"""
+Importa employees.csv e attendance.csv para o banco SQLite.
+
+Uso:
+    python -m app.repositories.migracao_sqlite [--db data/sistema_ponto.db]
+"""
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+from app.config import ATTENDANCE_CSV, EMPLOYEES_CSV, SQLITE_DB
+from app.repositories.attendance_sqlite_repository import AttendanceSQLiteRepository
+from app.repositories.employee_csv_repository import EmployeeCSVRepository
+from app.repositories.employee_sqlite_repository import EmployeeSQLiteRepository
+
+_TAMANHO_LOTE = 500_000
+
+
+def migrar_csv_para_sqlite(
+    employees_csv: Path | str = EMPLOYEES_CSV,
+    attendance_csv: Path | str = ATTENDANCE_CSV,
+    db: Path | str = SQLITE_DB,
+) -> tuple[int, int]:
+    """
+    Copia funcionários (snapshot + journal) e registros para o banco.
+
+    Os registros são lidos e inseridos em lotes, cada lote numa transação.
+    Retorna (quantidade de funcionários, quantidade de registros).
+    """
+    funcionarios = EmployeeCSVRepository(employees_csv).load_all()
+    EmployeeSQLiteRepository(db).save_all(funcionarios)
+
+    destino = AttendanceSQLiteRepository(db)
+    total = 0
+    attendance_csv = Path(attendance_csv)
+    if attendance_csv.exists():
+        with destino.conn:
+            destino.conn.execute("DELETE FROM registros")
+        for lote in pd.read_csv(
+            attendance_csv,
+            dtype={"matricula": str, "tipo": str},
+            chunksize=_TAMANHO_LOTE,
+        ):
+            lote["timestamp"] = pd.to_datetime(lote["timestamp"], format="ISO8601")
+            destino.append_frame(lote)
+            total += len(lote)
+
+    return len(funcionarios), total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--employees", default=EMPLOYEES_CSV)
+    parser.add_argument("--attendance", default=ATTENDANCE_CSV)
+    parser.add_argument("--db", default=SQLITE_DB)
+    args = parser.parse_args()
+
+    n_func, n_reg = migrar_csv_para_sqlite(args.employees, args.attendance, args.db)
+    print(f"Migrados {n_func} funcionários e {n_reg} registros para {args.db}.")
+
+
+if __name__ == "__main__":
+    main()
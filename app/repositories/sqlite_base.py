@@ -0,0 +1,49 @@
+import sqlite3
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS funcionarios (
+    matricula TEXT PRIMARY KEY,
+    nome      TEXT    NOT NULL,
+    idade     INTEGER NOT NULL,
+    turno     TEXT    NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS registros (
+    id        INTEGER PRIMARY KEY,
+    matricula TEXT    NOT NULL,
+    timestamp INTEGER NOT NULL,  -- nanossegundos desde a época (UTC ingênuo)
+    tipo      TEXT    NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_registros_matricula_timestamp
+    ON registros (matricula, timestamp);
+
+-- Versão de escrita dos funcionários: sobe a cada alteração na tabela,
+-- venha de qual conexão/processo vier
+CREATE TABLE IF NOT EXISTS versao_funcionarios (versao INTEGER NOT NULL);
+INSERT INTO versao_funcionarios (versao)
+    SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM versao_funcionarios);
+
+CREATE TRIGGER IF NOT EXISTS trg_funcionarios_insert AFTER INSERT ON funcionarios
+    BEGIN UPDATE versao_funcionarios SET versao = versao + 1; END;
+CREATE TRIGGER IF NOT EXISTS trg_funcionarios_update AFTER UPDATE ON funcionarios
+    BEGIN UPDATE versao_funcionarios SET versao = versao + 1; END;
+CREATE TRIGGER IF NOT EXISTS trg_funcionarios_delete AFTER DELETE ON funcionarios
+    BEGIN UPDATE versao_funcionarios SET versao = versao + 1; END;
+"""
+
+
+def conectar(path: Path) -> sqlite3.Connection:
+    """
+    Abre o banco em modo WAL e garante que as tabelas existam.
+
+    check_same_thread=False porque o Streamlit atende cada sessão
+    em uma thread diferente.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
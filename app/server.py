@@ -0,0 +1,245 @@
+"""
+Servidor de batidas para relógios de ponto, em asyncio.
+
+Protocolo de linhas (UTF-8, uma requisição por linha, respostas na mesma
+ordem; o cliente pode mandar várias linhas sem esperar as respostas):
+
+    ENTRADA <matricula> [AAAA-MM-DDTHH:MM:SS]  ->  OK entrada <instante>
+    SAIDA <matricula> [AAAA-MM-DDTHH:MM:SS]    ->  OK saida <instante>
+    CONSULTA <matricula>                        ->  OK <tipo> <instante> | OK nenhum
+    (erro de validação ou comando inválido)     ->  ERRO <motivo>
+
+Sem instante, vale a hora em que o servidor recebeu a linha. Pedidos que
+chegam enquanto um lote está sendo gravado formam o lote seguinte, validado
+e gravado de uma vez (SistemaPonto.registrar_eventos_lote).
+
+Uso:
+    python -m app.server --porta 8765
+"""
+import argparse
+import asyncio
+import signal
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from app.config import (
+    SERVIDOR_FILA_MAXIMA,
+    SERVIDOR_HOST,
+    SERVIDOR_LOTE_MAXIMO,
+    SERVIDOR_PORTA,
+)
+from app.repositories import AttendanceCSVRepository, EmployeeCSVRepository
+from app.services.sistema_ponto import SistemaPonto
+
+COMANDOS = ("ENTRADA", "SAIDA", "CONSULTA")
+
+# Respostas ainda não enviadas por conexão; cheio, para de ler dela
+_PEDIDOS_POR_CONEXAO = 1_000
+
+
+@dataclass
+class _Pedido:
+    comando: str
+    matricula: str
+    instante: datetime
+    resposta: asyncio.Future
+
+
+class ServidorPonto:
+    """
+    Atende as conexões e grava as batidas em lotes num único SistemaPonto.
+
+    Um só consumidor tira os pedidos da fila e os executa num thread, um
+    lote por vez; a fila é limitada a `fila_maxima` pedidos e, cheia, as
+    conexões deixam de ser lidas até ela esvaziar (contrapressão).
+    """
+
+    def __init__(
+        self,
+        sistema: SistemaPonto,
+        fila_maxima: int = SERVIDOR_FILA_MAXIMA,
+        lote_maximo: int = SERVIDOR_LOTE_MAXIMO,
+    ) -> None:
+        self.sistema = sistema
+        self.lote_maximo = max(1, int(lote_maximo))
+        self._fila: asyncio.Queue = asyncio.Queue(maxsize=max(1, int(fila_maxima)))
+        self._servidor: Optional[asyncio.AbstractServer] = None
+        self._consumidor: Optional[asyncio.Task] = None
+
+    async def iniciar(self, host: str = SERVIDOR_HOST, porta: int = SERVIDOR_PORTA) -> None:
+        self._consumidor = asyncio.create_task(self._processar())
+        self._servidor = await asyncio.start_server(self._atender, host, porta)
+
+    @property
+    def enderecos(self) -> List[str]:
+        return [f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in self._servidor.sockets]
+
+    async def encerrar(self) -> None:
+        """
+        Para de aceitar conexões, grava o que estiver na fila e fecha o sistema.
+        """
+        if self._servidor is not None:
+            self._servidor.close()
+        if self._consumidor is not None:
+            await self._fila.put(None)
+            await self._consumidor
+        await asyncio.to_thread(self.sistema.close)
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        respostas: asyncio.Queue = asyncio.Queue(maxsize=_PEDIDOS_POR_CONEXAO)
+        resposta_task = asyncio.create_task(self._responder(writer, respostas))
+        loop = asyncio.get_running_loop()
+        try:
+            while linha := await reader.readline():
+                futuro = loop.create_future()
+                try:
+                    pedido = _interpretar(linha, futuro)
+                except ValueError as e:
+                    futuro.set_result(f"ERRO {e}")
+                else:
+                    await self._fila.put(pedido)
+                await respostas.put(futuro)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass  # conexão caiu ou linha longa demais: descarta a conexão
+        finally:
+            await respostas.put(None)
+            await resposta_task
+            writer.close()
+
+    async def _responder(self, writer: asyncio.StreamWriter, respostas: asyncio.Queue) -> None:
+        while (futuro := await respostas.get()) is not None:
+            texto = await futuro
+            try:
+                writer.write(texto.encode("utf-8") + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def _processar(self) -> None:
+        fim = False
+        while not fim:
+            lote: List[_Pedido] = []
+            pedido = await self._fila.get()
+            while True:
+                if pedido is None:
+                    fim = True
+                else:
+                    lote.append(pedido)
+                if fim or len(lote) >= self.lote_maximo or self._fila.empty():
+                    break
+                pedido = self._fila.get_nowait()
+
+            if not lote:
+                continue
+            try:
+                textos = await asyncio.to_thread(self._executar_lote, lote)
+            except Exception as e:
+                textos = [f"ERRO {e}"] * len(lote)
+            for pedido, texto in zip(lote, textos):
+                pedido.resposta.set_result(texto)
+
+    def _executar_lote(self, lote: List[_Pedido]) -> List[str]:
+        """
+        Executa um lote (no thread de trabalho): batidas consecutivas vão
+        juntas para registrar_eventos_lote; consultas, na ordem em que
+        chegaram em relação às batidas.
+        """
+        textos: List[str] = []
+        inicio = 0
+        while inicio < len(lote):
+            if lote[inicio].comando == "CONSULTA":
+                textos.append(self._consultar(lote[inicio].matricula))
+                inicio += 1
+                continue
+
+            fim = inicio
+            while fim < len(lote) and lote[fim].comando != "CONSULTA":
+                fim += 1
+            batidas = lote[inicio:fim]
+            rejeitados = self.sistema.registrar_eventos_lote(
+                [(p.matricula, p.instante, p.comando.lower()) for p in batidas]
+            )
+            motivos = rejeitados["motivo"].to_dict()
+            for i, p in enumerate(batidas):
+                if i in motivos:
+                    textos.append(f"ERRO {motivos[i]}")
+                else:
+                    textos.append(f"OK {p.comando.lower()} {p.instante.isoformat()}")
+            inicio = fim
+        return textos
+
+    def _consultar(self, matricula: str) -> str:
+        try:
+            ultimo = self.sistema.ultimo_evento(matricula)
+        except ValueError as e:
+            return f"ERRO {e}"
+        if ultimo is None:
+            return "OK nenhum"
+        return f"OK {ultimo.tipo.value} {ultimo.timestamp.isoformat()}"
+
+
+def _interpretar(linha: bytes, futuro: asyncio.Future) -> _Pedido:
+    partes = linha.decode("utf-8", errors="replace").split()
+    if not partes or partes[0].upper() not in COMANDOS:
+        raise ValueError(f"Comando inválido. Use: {', '.join(COMANDOS)}.")
+    comando = partes[0].upper()
+    if len(partes) < 2 or len(partes) > (2 if comando == "CONSULTA" else 3):
+        raise ValueError(f"Uso: {comando} <matricula>" + ("" if comando == "CONSULTA" else " [instante]"))
+
+    instante = datetime.now()
+    if len(partes) == 3:
+        try:
+            instante = datetime.fromisoformat(partes[2])
+        except ValueError:
+            raise ValueError("Instante inválido. Use AAAA-MM-DDTHH:MM:SS.") from None
+    return _Pedido(comando, partes[1], instante, futuro)
+
+
+async def servir(sistema: SistemaPonto, host: str, porta: int, **opcoes) -> None:
+    """
+    Roda o servidor até Ctrl+C / SIGTERM e então grava o que falta.
+    """
+    servidor = ServidorPonto(sistema, **opcoes)
+    await servidor.iniciar(host, porta)
+    print(f"Servidor de ponto em {', '.join(servidor.enderecos)}", flush=True)
+
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sinal, parar.set)
+        except (NotImplementedError, RuntimeError):  # Windows
+            pass
+    try:
+        await parar.wait()
+    finally:
+        await servidor.encerrar()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor de batidas de ponto (TCP, protocolo de linhas).")
+    parser.add_argument("--host", default=SERVIDOR_HOST)
+    parser.add_argument("--porta", type=int, default=SERVIDOR_PORTA)
+    parser.add_argument("--dados", type=Path, help="pasta com employees.csv/attendance.csv (padrão: config)")
+    parser.add_argument("--fila", type=int, default=SERVIDOR_FILA_MAXIMA, help="pedidos na fila antes da contrapressão")
+    parser.add_argument("--lote", type=int, default=SERVIDOR_LOTE_MAXIMO, help="batidas por gravação")
+    args = parser.parse_args()
+
+    if args.dados is not None:
+        sistema = SistemaPonto(
+            EmployeeCSVRepository(args.dados / "employees.csv"),
+            AttendanceCSVRepository(args.dados / "attendance.csv"),
+        )
+    else:
+        sistema = SistemaPonto()
+
+    try:
+        asyncio.run(servir(sistema, args.host, args.porta, fila_maxima=args.fila, lote_maximo=args.lote))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
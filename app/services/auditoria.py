@@ -0,0 +1,231 @@
+"""
+Auditoria de integridade do histórico de ponto inteiro.
+
+As regras de integridade só são checadas batida a batida em
+registrar_entrada/registrar_saida; linhas gravadas por outro processo ou
+editadas à mão no attendance.csv nunca são revalidadas. Aqui o histórico
+todo é conferido numa passada vetorizada (uma ordenação por matrícula e
+horário, mais operações de grupo), e cada batida problemática vira uma
+ocorrência:
+
+    matricula_orfa      matrícula sem funcionário cadastrado
+    tipo_invalido       tipo diferente de entrada/saida
+    timestamp_invalido  horário vazio ou ilegível (ex.: 2025-13-45 99:00)
+    timestamp_futuro    batida com horário depois de agora
+    fora_de_ordem       gravada depois de uma batida mais recente da mesma matrícula
+    saida_sem_entrada   saída sem entrada em aberto
+    entrada_repetida    entrada com outra entrada ainda em aberto
+    entrada_em_aberto   entrada sem saída por mais de N horas
+
+O histórico é lido na ordem de gravação e sem validar (iter_raw_chunks):
+um horário ilegível vira ocorrência, não erro.
+
+Uso:
+    python -m app.services.auditoria
+    python -m app.services.auditoria --dados data_bench --horas 12 --detalhes
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional, Set
+
+import numpy as np
+
+from app.config import ATTENDANCE_CHUNKSIZE, AUDITORIA_HORAS_EM_ABERTO
+from app.repositories import AttendanceCSVRepository, EmployeeCSVRepository, criar_repositorios
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
+
+PROBLEMAS = (
+    "matricula_orfa",
+    "tipo_invalido",
+    "timestamp_invalido",
+    "timestamp_futuro",
+    "fora_de_ordem",
+    "saida_sem_entrada",
+    "entrada_repetida",
+    "entrada_em_aberto",
+)
+COLUNAS = ["matricula", "problema", "posicao", "timestamp", "tipo", "detalhe"]
+
+
+def juntar_blocos(blocos: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Junta os blocos do histórico (na ordem em que estão gravados) num só
+    DataFrame, com matricula e tipo categóricos para caber em memória.
+    """
+    partes = [b.astype({"matricula": "category", "tipo": "category"}) for b in blocos]
+    if not partes:
+        return pd.DataFrame(
+            {
+                "matricula": pd.Categorical([]),
+                "timestamp": np.empty(0, dtype="datetime64[ns]"),
+                "tipo": pd.Categorical([]),
+            }
+        )
+    return pd.DataFrame(
+        {
+            "matricula": pd.api.types.union_categoricals([p["matricula"] for p in partes]),
+            "timestamp": np.concatenate([p["timestamp"].to_numpy(dtype="datetime64[ns]") for p in partes]),
+            "tipo": pd.api.types.union_categoricals([p["tipo"] for p in partes]),
+        }
+    )
+
+
+def auditar_registros(
+    df: pd.DataFrame,
+    cadastradas: Set[str],
+    agora: datetime,
+    horas_em_aberto: float = AUDITORIA_HORAS_EM_ABERTO,
+) -> pd.DataFrame:
+    """
+    Ocorrências do histórico `df` (matricula/timestamp/tipo, na ordem de
+    gravação), uma linha por batida e problema. `posicao` é a posição da
+    batida no histórico (0 = a primeira gravada). Batidas sem horário
+    (NaT) só contam como timestamp_invalido: ficam fora das checagens de
+    ordem e de sequência.
+    """
+    n = len(df)
+    if n == 0:
+        return pd.DataFrame(columns=COLUNAS)
+
+    matricula = pd.Categorical(df["matricula"])
+    codigos = matricula.codes.astype(np.int64)
+    timestamps = df["timestamp"].to_numpy(dtype="datetime64[ns]")
+    ts_valido = ~np.isnat(timestamps)
+    timestamps = timestamps.view(np.int64)
+    tipos = df["tipo"].astype(str).to_numpy()
+    entrada = tipos == "entrada"
+    tipo_valido = entrada | (tipos == "saida")
+    agora_ns = np.datetime64(agora, "ns").astype(np.int64)
+    limite_ns = int(horas_em_aberto * 3600 * 10**9)
+
+    # Código -1: matrícula vazia (sem categorias, quando todas são vazias)
+    cadastrada = np.r_[matricula.categories.isin(list(cadastradas)), False]
+    marcas = {
+        "matricula_orfa": ~cadastrada[np.where(codigos < 0, len(cadastrada) - 1, codigos)],
+        "tipo_invalido": ~tipo_valido,
+        "timestamp_invalido": ~ts_valido,
+        "timestamp_futuro": timestamps > agora_ns,
+    }
+
+    # Ordem de gravação: cada batida contra o maior horário já gravado
+    # antes dela para a mesma matrícula (NaT é o menor int64: não sobe o
+    # máximo)
+    maximo = pd.Series(timestamps).groupby(codigos).cummax()
+    maximo_anterior = maximo.groupby(codigos).shift(fill_value=np.iinfo(np.int64).min)
+    marcas["fora_de_ordem"] = ts_valido & (timestamps < maximo_anterior.to_numpy())
+
+    # Sequência de cada matrícula em ordem cronológica (empates: ordem de
+    # gravação), só com os tipos e horários válidos
+    ordem = np.lexsort((np.arange(n), timestamps, codigos))
+    ordem = ordem[(tipo_valido & ts_valido)[ordem]]
+    c, t, e = codigos[ordem], timestamps[ordem], entrada[ordem]
+    mesmo_que_anterior = np.r_[False, c[1:] == c[:-1]]
+    mesmo_que_proximo = np.r_[c[1:] == c[:-1], False]
+    anterior_entrada = np.r_[False, e[:-1]] & mesmo_que_anterior
+
+    repetida = e & anterior_entrada
+    sem_entrada = ~e & ~anterior_entrada
+    # Entrada fica em aberto até a próxima batida da matrícula (ou até agora)
+    fim = np.where(mesmo_que_proximo, np.r_[t[1:], 0], agora_ns)
+    aberta = e & (fim - t > limite_ns)
+    for nome, marca in (
+        ("entrada_repetida", repetida),
+        ("saida_sem_entrada", sem_entrada),
+        ("entrada_em_aberto", aberta),
+    ):
+        marcas[nome] = np.zeros(n, dtype=bool)
+        marcas[nome][ordem[marca]] = True
+    em_aberto = np.full(n, "", dtype=object)
+    em_aberto[ordem[aberta]] = [f"{h:.1f} h em aberto" for h in (fim - t)[aberta] / (3600 * 10**9)]
+    detalhes = {"entrada_em_aberto": em_aberto}
+
+    partes = []
+    for nome in PROBLEMAS:
+        posicoes = np.flatnonzero(marcas[nome])
+        if not len(posicoes):
+            continue
+        partes.append(
+            pd.DataFrame(
+                {
+                    "matricula": np.asarray(matricula)[posicoes],
+                    "problema": nome,
+                    "posicao": posicoes,
+                    "timestamp": timestamps[posicoes].view("datetime64[ns]"),
+                    "tipo": tipos[posicoes],
+                    "detalhe": detalhes[nome][posicoes] if nome in detalhes else "",
+                }
+            )
+        )
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS)
+    ocorrencias = pd.concat(partes, ignore_index=True)
+    return ocorrencias.sort_values(["matricula", "timestamp", "posicao"], ignore_index=True)
+
+
+def por_funcionario(ocorrencias: pd.DataFrame) -> pd.DataFrame:
+    """
+    Quantidade de ocorrências de cada problema por matrícula, mais o total.
+    """
+    contagem = pd.crosstab(ocorrencias["matricula"], ocorrencias["problema"])
+    contagem = contagem.reindex(columns=list(PROBLEMAS), fill_value=0)
+    contagem["total"] = contagem.sum(axis=1)
+    return contagem.sort_values("total", ascending=False).reset_index().rename_axis(columns=None)
+
+
+def auditar(
+    attendance_repo,
+    cadastradas: Set[str],
+    agora: Optional[datetime] = None,
+    horas_em_aberto: float = AUDITORIA_HORAS_EM_ABERTO,
+    chunksize: int = ATTENDANCE_CHUNKSIZE,
+) -> pd.DataFrame:
+    """
+    Audita o histórico gravado no repositório, lido em blocos na ordem de
+    gravação (iter_raw_chunks).
+    Não depende do SistemaPonto: funciona mesmo com um histórico que ele
+    não consegue carregar.
+    """
+    df = juntar_blocos(attendance_repo.iter_raw_chunks(chunksize))
+    return auditar_registros(df, cadastradas, agora or datetime.now(), horas_em_aberto)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dados", type=Path, help="pasta com employees.csv/attendance.csv (padrão: config)")
+    parser.add_argument(
+        "--horas", type=float, default=AUDITORIA_HORAS_EM_ABERTO, help="horas até uma entrada contar como em aberto"
+    )
+    parser.add_argument("--detalhes", action="store_true", help="lista cada ocorrência, não só o resumo")
+    args = parser.parse_args()
+
+    if args.dados is not None:
+        employee_repo = EmployeeCSVRepository(args.dados / "employees.csv")
+        attendance_repo = AttendanceCSVRepository(args.dados / "attendance.csv")
+    else:
+        employee_repo, attendance_repo = criar_repositorios()
+
+    try:
+        cadastradas = {f.matricula for f in employee_repo.load_all()}
+        ocorrencias = auditar(attendance_repo, cadastradas, horas_em_aberto=args.horas)
+    finally:
+        attendance_repo.close()
+
+    if ocorrencias.empty:
+        print("Nenhuma ocorrência encontrada.")
+        return
+    print(f"{len(ocorrencias)} ocorrência(s) em {ocorrencias['matricula'].nunique()} matrícula(s):\n")
+    print(por_funcionario(ocorrencias).to_string(index=False))
+    if args.detalhes:
+        print()
+        print(ocorrencias.to_string(index=False))
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
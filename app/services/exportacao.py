@@ -0,0 +1,124 @@
+"""
+Exportação dos registros de ponto para CSV ou Excel (.xlsx), em streaming.
+
+Os registros chegam em blocos de tamanho limitado (DataFrames) e vão sendo
+escritos no destino à medida que chegam: a memória usada depende do
+tamanho do bloco, não do total exportado. O Excel é gravado pelo modo
+write-only do openpyxl, que não mantém as células em memória.
+
+Cada bloco vem acompanhado do nome da aba onde deve entrar; blocos
+seguidos com o mesmo nome vão para a mesma aba (no CSV o nome é ignorado).
+"""
+from __future__ import annotations
+
+import io
+import re
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Optional, Tuple
+
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
+
+FORMATOS = ("csv", "xlsx")
+AGRUPAMENTOS = (None, "funcionario", "mes")
+COLUNAS = ["matricula", "nome", "timestamp", "tipo"]
+
+ABA_UNICA = "Registros"
+# Limite do Excel (1.048.576 linhas) menos o cabeçalho; o que passar
+# continua numa aba "<nome> (2)", "<nome> (3)", ...
+LINHAS_POR_ABA = 1_048_575
+
+_FORMATO_TIMESTAMP = "%Y-%m-%d %H:%M:%S.%f"
+_CARACTERES_INVALIDOS = re.compile(r"[\[\]:*?/\\]")
+
+
+def validar(formato: str, por: Optional[str]) -> None:
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato!r}. Use 'csv' ou 'xlsx'.")
+    if por not in AGRUPAMENTOS:
+        raise ValueError(f"Agrupamento inválido: {por!r}. Use 'funcionario' ou 'mes'.")
+    if por is not None and formato != "xlsx":
+        raise ValueError("A separação em abas só existe no formato xlsx.")
+
+
+def por_mes(blocos: Iterable[pd.DataFrame]) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Divide blocos em ordem cronológica em (AAAA-MM, parte do bloco).
+    """
+    for bloco in blocos:
+        meses = bloco["timestamp"].dt.strftime("%Y-%m")
+        for mes, parte in bloco.groupby(meses, sort=False):
+            yield mes, parte
+
+
+def escrever(formato: str, partes: Iterable[Tuple[str, pd.DataFrame]], destino: Path | str | IO) -> int:
+    """
+    Escreve os blocos em `destino` (caminho ou arquivo aberto; texto só no
+    CSV) e devolve quantas linhas foram exportadas.
+    """
+    if isinstance(destino, (str, Path)):
+        Path(destino).parent.mkdir(parents=True, exist_ok=True)
+    if formato == "csv":
+        return _escrever_csv(partes, destino)
+    return _escrever_xlsx(partes, destino)
+
+
+def _escrever_csv(partes: Iterable[Tuple[str, pd.DataFrame]], destino: Path | str | IO) -> int:
+    if isinstance(destino, (str, Path)):
+        arquivo = open(destino, "w", encoding="utf-8", newline="")
+    elif isinstance(destino, io.TextIOBase):
+        arquivo = destino  # já é texto: escreve direto
+    else:
+        arquivo = io.TextIOWrapper(destino, encoding="utf-8", newline="")
+    total = 0
+    try:
+        pd.DataFrame(columns=COLUNAS).to_csv(arquivo, index=False)
+        for _, bloco in partes:
+            bloco.to_csv(arquivo, header=False, index=False, date_format=_FORMATO_TIMESTAMP)
+            total += len(bloco)
+    finally:
+        if isinstance(destino, (str, Path)):
+            arquivo.close()
+        elif arquivo is not destino:
+            arquivo.flush()
+            arquivo.detach()  # o arquivo de quem chamou continua aberto
+    return total
+
+
+def _escrever_xlsx(partes: Iterable[Tuple[str, pd.DataFrame]], destino: Path | str | IO) -> int:
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    aba, nome_atual, linhas, continuacao = None, None, 0, 1
+    total = 0
+    for nome, bloco in partes:
+        if nome != nome_atual:
+            nome_atual, continuacao = nome, 1
+            aba, linhas = _nova_aba(livro, nome, continuacao), 0
+
+        colunas = [bloco[c].tolist() for c in COLUNAS]
+        for linha in zip(*colunas):
+            if linhas == LINHAS_POR_ABA:
+                continuacao += 1
+                aba, linhas = _nova_aba(livro, nome, continuacao), 0
+            aba.append(linha)
+            linhas += 1
+        total += len(bloco)
+
+    if aba is None:
+        _nova_aba(livro, ABA_UNICA, 1)
+    livro.save(destino)
+    return total
+
+
+def _nova_aba(livro, nome: str, continuacao: int):
+    """
+    Aba com cabeçalho, nome limpo dos caracteres que o Excel recusa e
+    cortado em 31 caracteres (contando o sufixo de continuação).
+    """
+    sufixo = f" ({continuacao})" if continuacao > 1 else ""
+    nome = _CARACTERES_INVALIDOS.sub("_", str(nome))[: 31 - len(sufixo)] + sufixo
+    aba = livro.create_sheet(nome)
+    aba.append(COLUNAS)
+    return aba
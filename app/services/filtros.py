@@ -0,0 +1,54 @@
+"""
+Lógica de filtro da tela "Consultar horários de entrada e saída" do
+Streamlit, separada da interface para poder ser medida (benchmarks) sem
+o Streamlit instalado.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from app.services.sistema_ponto import SistemaPonto
+
+TODOS = "Todos"
+DIAS_PADRAO = 30
+
+
+def opcoes_funcionario(sistema: SistemaPonto) -> List[str]:
+    """
+    Opções do seletor de funcionário: "Todos" + matrículas em ordem.
+    """
+    return [TODOS] + sorted(f.matricula for f in sistema.listar_funcionarios())
+
+
+def intervalo_padrao(hoje: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Intervalo inicial do filtro: os últimos DIAS_PADRAO dias.
+    """
+    hoje = hoje or date.today()
+    return hoje - timedelta(days=DIAS_PADRAO), hoje
+
+
+def intervalo_dos_dados(sistema: SistemaPonto, hoje: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Intervalo inicial da tela de consulta: do primeiro ao último dia com
+    batidas (sem nenhuma batida, o intervalo_padrao). Os dias vêm do resumo
+    diário por turno, sem carregar o histórico.
+    """
+    dias = sistema.resumo_diario(por="turno")["dia"]
+    if dias.empty:
+        return intervalo_padrao(hoje)
+    return dias.min().date(), dias.max().date()
+
+
+def filtrar_registros(sistema: SistemaPonto, matricula: str, inicio: date, fim: date):
+    """
+    Registros do funcionário escolhido (ou de todos) no intervalo, do
+    mais recente para o mais antigo. Com partições mensais, só os meses
+    alcançados pelo intervalo são carregados.
+    """
+    return sistema.consultar_registros(
+        matricula=None if matricula == TODOS else matricula,
+        inicio=inicio,
+        fim=fim,
+    ).iloc[::-1]
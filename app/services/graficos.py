@@ -0,0 +1,100 @@
+"""
+Gráficos de funcionários (idade e turno).
+
+As figuras são montadas pela API orientada a objetos do matplotlib
+(Figure + canvas Agg), sem passar pelo pyplot: não dependem de backend
+gráfico, não ficam registradas no estado global do pyplot e podem ser
+guardadas em cache. O pyplot só é importado para mostrar uma janela (CLI).
+"""
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from app.config import GRAFICO_IDADE_FAIXA, GRAFICO_IDADE_MAX_BARRAS
+from app.models.funcionario import Funcionario
+
+
+def nova_figura() -> Figure:
+    """
+    Figura com canvas Agg, fora do pyplot.
+    """
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def desenhar_idades(fig: Figure, funcionarios: Iterable[Funcionario]) -> None:
+    """
+    Até GRAFICO_IDADE_MAX_BARRAS funcionários: uma barra por funcionário,
+    ordenadas por idade. Acima disso, quantidade por faixa de
+    GRAFICO_IDADE_FAIXA anos (histograma), que continua legível com
+    milhares de funcionários.
+    """
+    funcionarios = list(funcionarios)
+    ax = fig.add_subplot()
+
+    if len(funcionarios) <= GRAFICO_IDADE_MAX_BARRAS:
+        ordenados = sorted(funcionarios, key=lambda f: f.idade)
+        ax.bar([f.nome for f in ordenados], [f.idade for f in ordenados])
+        ax.set_xlabel("Funcionário")
+        ax.set_ylabel("Idade")
+        ax.set_title("Funcionários ordenados por idade")
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+            label.set_ha("right")
+    else:
+        idades = np.fromiter((f.idade for f in funcionarios), dtype=np.int64, count=len(funcionarios))
+        faixas = idades // GRAFICO_IDADE_FAIXA
+        primeira = int(faixas.min())
+        contagem = np.bincount(faixas - primeira)
+        inicios = (np.arange(contagem.size) + primeira) * GRAFICO_IDADE_FAIXA
+        rotulos = [f"{i}–{i + GRAFICO_IDADE_FAIXA - 1}" for i in inicios]
+        ax.bar(rotulos, contagem)
+        ax.set_xlabel("Faixa de idade")
+        ax.set_ylabel("Funcionários")
+        ax.set_title(f"Funcionários por faixa de idade ({len(funcionarios)} no total)")
+
+    fig.tight_layout()
+
+
+def desenhar_turnos(fig: Figure, funcionarios: Iterable[Funcionario]) -> None:
+    contagem = Counter(f.turno.value for f in funcionarios).most_common()
+    ax = fig.add_subplot()
+    ax.pie([n for _, n in contagem], labels=[t for t, _ in contagem], autopct="%1.1f%%")
+    ax.set_title("Distribuição de funcionários por turno")
+    fig.tight_layout()
+
+
+def salvar(fig: Figure, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(path)
+
+
+def mostrar(desenhar, funcionarios: Iterable[Funcionario]) -> None:
+    """
+    Abre o gráfico numa janela (backend interativo do pyplot) e fecha a
+    figura em seguida, para não acumular figuras abertas.
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure()
+    try:
+        desenhar(fig, funcionarios)
+        plt.show()
+    finally:
+        plt.close(fig)
+
+
+def assinatura_arquivo(path: Path) -> Optional[int]:
+    """
+    mtime do PNG em ns (None se não existe), para perceber que o arquivo
+    em cache foi apagado ou sobrescrito por fora.
+    """
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
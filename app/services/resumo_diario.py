@@ -0,0 +1,400 @@
+"""
+Resumos diários materializados: dia x matrícula e dia x turno.
+
+Para reconstruir do zero a partir do histórico:
+    python -m app.services.resumo_diario
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import RESUMO_DIARIO_ARQUIVO, RESUMO_TURNO_ARQUIVO
+from app.models.registro_ponto import RegistroPonto
+from app.models.tipo_registro import TipoRegistro
+from app.services.tabela_registros import para_ns
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
+
+# Posições na lista de cada linha do resumo
+ENTRADAS, SAIDAS, PRIMEIRA_ENTRADA, ULTIMA_SAIDA, MINUTOS = range(5)
+COLUNAS_VALORES = ["entradas", "saidas", "primeira_entrada", "ultima_saida", "minutos"]
+
+_NS_POR_MINUTO = 60 * 10**9
+
+Chave = Tuple[date, str]
+
+
+class ResumoDiario:
+    """
+    Agregados por dia x matrícula e dia x turno: quantidade de entradas e
+    saídas, primeira entrada, última saída e minutos trabalhados.
+
+    - registrar: atualização O(1) a cada batida (adiada até a leitura das
+      tabelas, se elas ainda não foram lidas)
+    - registrar_bloco: atualização vetorizada para um lote de batidas
+    - reconstruir: recalcula do zero a partir de blocos do histórico
+
+    Os minutos de uma jornada contam para o dia da entrada (mesma regra de
+    SistemaPonto.horas_trabalhadas). O resumo por turno usa o turno do
+    funcionário no momento da batida.
+
+    `eventos` é a quantidade de batidas já incorporadas; fica gravada junto
+    dos CSVs para o SistemaPonto saber se o resumo está em dia com o histórico.
+    `origem` é o estado do arquivo de registros no momento em que o resumo
+    foi salvo (estado_arquivo), gravado junto para perceber uma edição que
+    mantém a quantidade de linhas. carregar() só lê essas marcas; as
+    tabelas são lidas no primeiro uso.
+    """
+
+    def __init__(self, diretorio: Path | str) -> None:
+        diretorio = Path(diretorio)
+        self.path_matricula = diretorio / RESUMO_DIARIO_ARQUIVO
+        self.path_turno = diretorio / RESUMO_TURNO_ARQUIVO
+        self.path_meta = self.path_matricula.with_suffix(".meta.json")
+
+        self._por_matricula: Dict[Chave, List] = {}
+        self._por_turno: Dict[Chave, List] = {}
+        self.eventos = 0
+        self.origem: Optional[Dict[str, int]] = None
+        self.pendentes = 0  # atualizações ainda não salvas
+        self._carregado = True
+        # Batidas registradas antes de as tabelas serem lidas
+        self._adiados: List[Tuple[RegistroPonto, Optional[RegistroPonto], str]] = []
+
+    # ---------- ATUALIZAÇÃO ----------
+
+    def registrar(
+        self,
+        registro: RegistroPonto,
+        anterior: Optional[RegistroPonto],
+        turno: str,
+    ) -> None:
+        """
+        Incorpora uma batida; `anterior` é o último evento do funcionário
+        antes dela (para fechar a jornada numa saída).
+
+        Se as tabelas ainda não foram lidas, a batida fica guardada e é
+        aplicada quando forem (no primeiro uso ou ao salvar): registrar
+        uma batida não exige ler os resumos (nem importar o pandas).
+        """
+        self.eventos += 1
+        self.pendentes += 1
+        if not self._carregado:
+            self._adiados.append((registro, anterior, turno))
+            return
+        self._aplicar(registro, anterior, turno)
+
+    def _aplicar(
+        self,
+        registro: RegistroPonto,
+        anterior: Optional[RegistroPonto],
+        turno: str,
+    ) -> None:
+        ts = para_ns(registro.timestamp)
+        dia = registro.timestamp.date()
+        entrada = registro.tipo is TipoRegistro.ENTRADA
+        for linha in (
+            _linha(self._por_matricula, (dia, registro.matricula)),
+            _linha(self._por_turno, (dia, turno)),
+        ):
+            _somar_batida(linha, entrada, ts)
+
+        if not entrada and anterior is not None and anterior.tipo is TipoRegistro.ENTRADA:
+            minutos = (ts - para_ns(anterior.timestamp)) / _NS_POR_MINUTO
+            dia_entrada = anterior.timestamp.date()
+            _linha(self._por_matricula, (dia_entrada, registro.matricula))[MINUTOS] += minutos
+            _linha(self._por_turno, (dia_entrada, turno))[MINUTOS] += minutos
+
+    def registrar_bloco(
+        self,
+        df: pd.DataFrame,
+        anteriores: Dict[str, Tuple[int, str]],
+        turnos: Dict[str, str],
+    ) -> None:
+        """
+        Incorpora um bloco matricula/timestamp/tipo de uma vez.
+
+        `anteriores` mapeia matrícula -> (timestamp ns, tipo) do último evento
+        antes do bloco e é atualizado com o último evento de cada matrícula
+        do bloco, para ser repassado ao bloco seguinte.
+        """
+        if df.empty:
+            return
+        self._garantir_carregado()
+
+        df = pd.DataFrame(
+            {
+                "matricula": df["matricula"].astype(str).to_numpy(),
+                "ts": df["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64),
+                "entrada": (df["tipo"].astype(str) == "entrada").to_numpy(),
+            }
+        ).sort_values(["matricula", "ts"], kind="stable", ignore_index=True)
+        df["dia"] = df["ts"].to_numpy().view("datetime64[ns]").astype("datetime64[D]")
+        df["turno"] = df["matricula"].map(turnos).fillna("")
+
+        # Evento anterior de cada linha: a linha de cima do mesmo funcionário,
+        # ou o último evento antes do bloco para a primeira linha do grupo
+        matriculas = df["matricula"].to_numpy()
+        ts = df["ts"].to_numpy()
+        entrada = df["entrada"].to_numpy()
+        ant_ts = np.empty_like(ts)
+        ant_ts[1:] = ts[:-1]
+        ant_entrada = np.zeros(len(df), dtype=bool)
+        ant_entrada[1:] = entrada[:-1]
+        primeiras = np.flatnonzero(np.r_[True, matriculas[1:] != matriculas[:-1]])
+        for i in primeiras:
+            anterior = anteriores.get(matriculas[i])
+            ant_entrada[i] = anterior is not None and anterior[1] == "entrada"
+            if anterior is not None:
+                ant_ts[i] = anterior[0]
+
+        fecha = ~entrada & ant_entrada
+        jornadas = pd.DataFrame(
+            {
+                "matricula": matriculas[fecha],
+                "turno": df["turno"].to_numpy()[fecha],
+                "dia": ant_ts[fecha].view("datetime64[ns]").astype("datetime64[D]"),
+                "minutos": (ts[fecha] - ant_ts[fecha]) / _NS_POR_MINUTO,
+            }
+        )
+
+        for destino, chave in ((self._por_matricula, "matricula"), (self._por_turno, "turno")):
+            # Int64 (anulável) para não passar os nanossegundos por float
+            ts_anulavel = df["ts"].astype("Int64")
+            batidas = df.assign(
+                entradas=df["entrada"].astype(np.int64),
+                saidas=(~df["entrada"]).astype(np.int64),
+                primeira_entrada=ts_anulavel.where(df["entrada"]),
+                ultima_saida=ts_anulavel.where(~df["entrada"]),
+            ).groupby(["dia", chave]).agg(
+                entradas=("entradas", "sum"),
+                saidas=("saidas", "sum"),
+                primeira_entrada=("primeira_entrada", "min"),
+                ultima_saida=("ultima_saida", "max"),
+            )
+            minutos = jornadas.groupby(["dia", chave])["minutos"].sum()
+            _mesclar(destino, batidas, minutos)
+
+        ultimos = df.drop_duplicates("matricula", keep="last")
+        for m, ts, entrada in zip(ultimos["matricula"], ultimos["ts"], ultimos["entrada"]):
+            anteriores[m] = (int(ts), "entrada" if entrada else "saida")
+
+        self.eventos += len(df)
+        self.pendentes += len(df)
+
+    def reconstruir(self, blocos: Iterable[pd.DataFrame], turnos: Dict[str, str]) -> None:
+        """
+        Recalcula tudo a partir dos blocos do histórico (em ordem cronológica
+        por funcionário). O resumo por turno usa o turno atual de cada um.
+        """
+        self._por_matricula = {}
+        self._por_turno = {}
+        self._carregado = True
+        self._adiados = []
+        self.eventos = 0
+        anteriores: Dict[str, Tuple[int, str]] = {}
+        for bloco in blocos:
+            self.registrar_bloco(bloco, anteriores, turnos)
+        self.pendentes = 1  # força salvar
+
+    # ---------- LEITURA ----------
+
+    def frame(
+        self,
+        por: str = "matricula",
+        inicio: Optional[date] = None,
+        fim: Optional[date] = None,
+    ) -> pd.DataFrame:
+        """
+        Resumo como DataFrame: dia, <matricula|turno>, entradas, saidas,
+        primeira_entrada, ultima_saida, minutos.
+        """
+        if por not in ("matricula", "turno"):
+            raise ValueError("Agrupamento inválido. Use: matricula ou turno.")
+        self._garantir_carregado()
+        dados = self._por_matricula if por == "matricula" else self._por_turno
+        chaves = [
+            k for k in dados
+            if (inicio is None or k[0] >= inicio) and (fim is None or k[0] <= fim)
+        ]
+        df = _frame_valores([dados[k] for k in chaves])
+        df.insert(0, "dia", pd.to_datetime([k[0] for k in chaves]))
+        df.insert(1, por, [k[1] for k in chaves])
+        for coluna in ("primeira_entrada", "ultima_saida"):
+            df[coluna] = pd.to_datetime(df[coluna], unit="ns")
+        return df.sort_values(["dia", por], ignore_index=True)
+
+    # ---------- PERSISTÊNCIA ----------
+
+    def carregar(self) -> bool:
+        """
+        Lê as marcas de eventos e de origem dos resumos gravados (as
+        tabelas ficam para o primeiro uso). Retorna False se não existirem.
+        """
+        if not (self.path_meta.exists() and self.path_matricula.exists() and self.path_turno.exists()):
+            return False
+        meta = json.loads(self.path_meta.read_text())
+        self.eventos = meta["eventos"]
+        self.origem = meta.get("origem")
+        self._carregado = False
+        self._adiados = []
+        self.pendentes = 0
+        return True
+
+    def _garantir_carregado(self) -> None:
+        if not self._carregado:
+            self._por_matricula = _ler(self.path_matricula, "matricula")
+            self._por_turno = _ler(self.path_turno, "turno")
+            self._carregado = True
+            for adiado in self._adiados:
+                self._aplicar(*adiado)
+            self._adiados = []
+
+    def salvar(self) -> None:
+        """
+        Grava os dois resumos (troca atômica de arquivo) e as marcas de
+        eventos e de origem.
+        Entre processos, quem chama segura a trava dos registros.
+        """
+        self._garantir_carregado()
+        for path, dados, chave in (
+            (self.path_matricula, self._por_matricula, "matricula"),
+            (self.path_turno, self._por_turno, "turno"),
+        ):
+            df = _frame_valores(list(dados.values()))
+            df.insert(0, "dia", [k[0].isoformat() for k in dados])
+            df.insert(1, chave, [k[1] for k in dados])
+            _gravar_atomico(path, lambda tmp: df.to_csv(tmp, index=False))
+        _gravar_atomico(
+            self.path_meta,
+            lambda tmp: Path(tmp).write_text(json.dumps({"eventos": self.eventos, "origem": self.origem})),
+        )
+        self.pendentes = 0
+
+
+def _frame_valores(linhas: List[List]) -> pd.DataFrame:
+    """
+    Linhas do resumo em colunas, com os nanossegundos em Int64 (anulável):
+    montar direto da lista passaria ints misturados com None por float.
+    """
+    colunas = list(zip(*linhas)) or [[]] * len(COLUNAS_VALORES)
+    return pd.DataFrame(
+        {
+            "entradas": np.array(colunas[ENTRADAS], dtype=np.int64),
+            "saidas": np.array(colunas[SAIDAS], dtype=np.int64),
+            "primeira_entrada": pd.array(colunas[PRIMEIRA_ENTRADA], dtype="Int64"),
+            "ultima_saida": pd.array(colunas[ULTIMA_SAIDA], dtype="Int64"),
+            "minutos": np.array(colunas[MINUTOS], dtype=float),
+        }
+    )
+
+
+def _linha(dados: Dict[Chave, List], chave: Chave) -> List:
+    linha = dados.get(chave)
+    if linha is None:
+        linha = dados[chave] = [0, 0, None, None, 0.0]
+    return linha
+
+
+def _somar_batida(linha: List, entrada: bool, ts: int) -> None:
+    if entrada:
+        linha[ENTRADAS] += 1
+        if linha[PRIMEIRA_ENTRADA] is None or ts < linha[PRIMEIRA_ENTRADA]:
+            linha[PRIMEIRA_ENTRADA] = ts
+    else:
+        linha[SAIDAS] += 1
+        if linha[ULTIMA_SAIDA] is None or ts > linha[ULTIMA_SAIDA]:
+            linha[ULTIMA_SAIDA] = ts
+
+
+def _mesclar(destino: Dict[Chave, List], batidas: pd.DataFrame, minutos: pd.Series) -> None:
+    for chave, entradas, saidas, primeira, ultima in zip(
+        _chaves(batidas.index),
+        batidas["entradas"].tolist(),
+        batidas["saidas"].tolist(),
+        batidas["primeira_entrada"].to_numpy(dtype=object, na_value=None).tolist(),
+        batidas["ultima_saida"].to_numpy(dtype=object, na_value=None).tolist(),
+    ):
+        linha = destino.get(chave)
+        if linha is None:
+            destino[chave] = [entradas, saidas, primeira, ultima, 0.0]
+            continue
+        linha[ENTRADAS] += entradas
+        linha[SAIDAS] += saidas
+        if primeira is not None and (linha[PRIMEIRA_ENTRADA] is None or primeira < linha[PRIMEIRA_ENTRADA]):
+            linha[PRIMEIRA_ENTRADA] = primeira
+        if ultima is not None and (linha[ULTIMA_SAIDA] is None or ultima > linha[ULTIMA_SAIDA]):
+            linha[ULTIMA_SAIDA] = ultima
+
+    for chave, valor in zip(_chaves(minutos.index), minutos.tolist()):
+        _linha(destino, chave)[MINUTOS] += valor
+
+
+def _chaves(indice: pd.MultiIndex) -> Iterable[Chave]:
+    """
+    (dia, matrícula|turno) de um índice do groupby, com o dia como date.
+    """
+    if len(indice) == 0:
+        return []
+    dias = pd.DatetimeIndex(indice.get_level_values(0)).date
+    return zip(dias.tolist(), indice.get_level_values(1).tolist())
+
+
+def _ler(path: Path, chave: str) -> Dict[Chave, List]:
+    # Int64 (anulável) lê os nanossegundos sem passar por float
+    df = pd.read_csv(
+        path,
+        dtype={chave: str, "primeira_entrada": "Int64", "ultima_saida": "Int64"},
+    )
+    chaves = zip(
+        pd.to_datetime(df["dia"], format="%Y-%m-%d").dt.date.tolist(),
+        df[chave].fillna("").tolist(),
+    )
+    valores = map(
+        list,
+        zip(
+            df["entradas"].tolist(),
+            df["saidas"].tolist(),
+            df["primeira_entrada"].to_numpy(dtype=object, na_value=None).tolist(),
+            df["ultima_saida"].to_numpy(dtype=object, na_value=None).tolist(),
+            df["minutos"].tolist(),
+        ),
+    )
+    return dict(zip(chaves, valores))
+
+
+def _gravar_atomico(path: Path, escrever) -> None:
+    """
+    Escreve num temporário único ao lado de `path` e troca com os.replace:
+    processos que salvam ao mesmo tempo não usam o mesmo temporário.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    try:
+        escrever(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def main() -> None:
+    from app.services.sistema_ponto import SistemaPonto
+
+    sistema = SistemaPonto()
+    sistema.reconstruir_resumo_diario()
+    sistema.close()
+    print(f"Resumo diário reconstruído com {sistema._resumo.eventos} batidas.")
+
+
+if __name__ == "__main__":
+    main()
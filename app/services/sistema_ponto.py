@@ -1,18 +1,79 @@
+from __future__ import annotations
+
+import functools
+import threading
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import date, datetime, time, timedelta
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
 
-import matplotlib.pyplot as plt
-import pandas as pd
+import numpy as np
 
-from app.config import GRAFICO_IDADE, GRAFICO_TURNO
+from app.config import (
+    ATTENDANCE_CHUNKSIZE,
+    AUDITORIA_HORAS_EM_ABERTO,
+    EMPLOYEES_JOURNAL_COMPACTAR_A_CADA,
+    EXPORTACAO_BLOCO,
+    GRAFICO_IDADE,
+    GRAFICO_TURNO,
+    IDADE_MAXIMA,
+    IDADE_MINIMA,
+    RESUMO_SALVAR_A_CADA,
+    SNAPSHOT_ATIVO,
+    SNAPSHOT_CAUDA_MAXIMA,
+)
+from app.metricas import instrumentar
 from app.models.funcionario import Funcionario
 from app.models.turno import Turno
 from app.models.registro_ponto import RegistroPonto
+from app.models.tipo_registro import TipoRegistro
+from app.repositories import criar_repositorios
 from app.repositories.employee_csv_repository import EmployeeCSVRepository
 from app.repositories.attendance_csv_repository import AttendanceCSVRepository
+from app.repositories.arquivo_base import estado_arquivo
+from app.services.resumo_diario import ResumoDiario
+from app.services.snapshot import carregar_snapshot, salvar_snapshot
+from app.services.tabela_registros import TIPOS, TabelaRegistros, para_ns
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
+
+COLUNAS_FUNCIONARIO = ["matricula", "nome", "idade", "turno"]
+COLUNAS_REGISTRO = ["matricula", "timestamp", "tipo"]
+
+# Períodos aceitos em horas_trabalhadas -> frequência do pandas
+PERIODOS = {"dia": "D", "semana": "W-SUN", "mes": "M", None: None}
+
+# Até este tamanho, o trecho do CSV lido na partida dispensa o pandas
+CAUDA_LEVE_BYTES = 1_000_000
+
+# Uma jornada que começa até `fim` pode terminar depois dele
+JORNADA_MAXIMA = timedelta(days=1)
+
 
+def _exclusivo(repo: Optional[str] = None):
+    """
+    Executa o método com o lock da instância (entre threads) e, se `repo`
+    for dado, também com a trava de arquivo desse repositório (entre
+    processos), cobrindo validação + gravação como uma coisa só.
+    """
+
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def envoltorio(self, *args, **kwargs):
+            with self._lock:
+                if repo is None:
+                    return metodo(self, *args, **kwargs)
+                with getattr(self, repo).trava:
+                    return metodo(self, *args, **kwargs)
+
+        return envoltorio
 
+    return decorador
+
+
+@instrumentar(
+    extras=("_carregar", "_ultimo_evento", "_registrar_alteracao", "_salvar_resumo_se_necessario", "_salvar_snapshot")
+)
 class SistemaPonto:
     """
     Regras de negócio do sistema de ponto.
@@ -21,7 +82,21 @@ class SistemaPonto:
     - registra entrada/saída
     - gera DataFrames
     - gera gráficos (barras + pizza)
-    - conversa com os repositórios CSV
+    - conversa com os repositórios (CSV ou SQLite, ver config.BACKEND)
+
+    Com um repositório de registros que consulta no banco
+    (consulta_no_banco = True) o histórico não é carregado em memória:
+    último evento, histórico por matrícula e filtros por data vão ao banco.
+    Com um repositório particionado (carga_preguicosa = True) só o mês
+    corrente é carregado de início; meses anteriores entram sob demanda.
+
+    Pode ser compartilhado entre threads (ex.: sessões do Streamlit): as
+    operações que mexem no estado usam um RLock da instância, e as que
+    gravam seguram também a trava de arquivo do repositório, para dois
+    processos não validarem e gravarem a mesma batida ao mesmo tempo.
+    Os arquivos derivados, compartilhados por todos os processos da pasta
+    de dados (resumos diários e snapshot), também são gravados sob a trava
+    dos registros.
     """
 
     def __init__(
@@ -29,23 +104,130 @@ class SistemaPonto:
         employee_repo: Optional[EmployeeCSVRepository] = None,
         attendance_repo: Optional[AttendanceCSVRepository] = None,
     ) -> None:
-        self.employee_repo = employee_repo or EmployeeCSVRepository()
-        self.attendance_repo = attendance_repo or AttendanceCSVRepository()
+        if employee_repo is None or attendance_repo is None:
+            padrao_func, padrao_reg = criar_repositorios()
+            employee_repo = employee_repo or padrao_func
+            attendance_repo = attendance_repo or padrao_reg
+        self.employee_repo = employee_repo
+        self.attendance_repo = attendance_repo
+        self._historico_no_banco = getattr(attendance_repo, "consulta_no_banco", False)
+
+        # Snapshot binário + final do CSV (só no repositório CSV simples)
+        self._snapshot_path: Optional[Path] = None
+        if SNAPSHOT_ATIVO and getattr(attendance_repo, "carga_incremental", False):
+            self._snapshot_path = attendance_repo.path.with_suffix(".snapshot.npz")
+
+        self._lock = threading.RLock()
+        # Incrementada a cada mudança nos funcionários; os gráficos em cache
+        # (nome, arquivo) -> (versão, mtime do PNG, figura) só são refeitos
+        # quando ela muda
+        self._versao_funcionarios = 0
+        self._graficos: Dict[Tuple[str, Path], Tuple[int, Optional[int], object]] = {}
+        self._carregar()
+
+    def _carregar(self) -> None:
+        """
+        Carga completa do estado em memória (funcionários, registros,
+        índices e resumos), usando o snapshot quando ele for válido.
+        """
+        attendance_repo = self.attendance_repo
+        snapshot = None
+        if self._snapshot_path is not None:
+            snapshot = carregar_snapshot(
+                self._snapshot_path, attendance_repo.path, self._arquivos_funcionarios()
+            )
+
+        # Carrega dados dos repositórios
+        if snapshot is not None and snapshot.funcionarios is not None:
+            funcionarios = snapshot.funcionarios
+            self.employee_repo.journal_size = snapshot.journal_size
+            self.employee_repo.marcar_como_lido()
+        else:
+            funcionarios = self.employee_repo.load_all()
+        self._funcionarios: Dict[str, Funcionario] = {f.matricula: f for f in funcionarios}
+        self._versao_funcionarios += 1
+        self._registros = TabelaRegistros()
+
+        # Índice de estado: último evento de cada matrícula (O(1) por batida)
+        self._ultimo_por_matricula: Dict[str, RegistroPonto] = {}
+
+        # Partições mensais ainda não carregadas (repositório particionado)
+        self._meses_pendentes: List[str] = []
+
+        if getattr(attendance_repo, "carga_preguicosa", False):
+            mes_atual = datetime.now().strftime("%Y-%m")
+            meses = self.attendance_repo.meses()
+            self._meses_pendentes = [m for m in meses if m < mes_atual]
+            for mes in meses:
+                if mes >= mes_atual:
+                    self._carregar_bloco(self.attendance_repo.load_partition(mes))
+        elif snapshot is not None:
+            self._registros = snapshot.registros
+            self._ultimo_por_matricula = snapshot.ultimos
+            if self._carregar_cauda(snapshot.offset) >= SNAPSHOT_CAUDA_MAXIMA:
+                self._salvar_snapshot()
+        elif getattr(attendance_repo, "carga_incremental", False):
+            self._carregar_cauda(0)
+            if self._snapshot_path is not None and len(self._registros) >= SNAPSHOT_CAUDA_MAXIMA:
+                self._salvar_snapshot()
+        elif not self._historico_no_banco:
+            self._carregar_bloco(self.attendance_repo.load_frame())
+
+        # Resumos diários materializados, gravados ao lado dos registros
+        self._resumo = ResumoDiario(_diretorio_dados(attendance_repo))
+        self._sincronizar_resumo()
+
+    @_exclusivo()
+    def sincronizar(self) -> None:
+        """
+        Incorpora o que outros processos (ex.: CLI e Streamlit lado a lado)
+        gravaram desde a última leitura.
+
+        Sem mudança externa custa só um stat() por arquivo (ou uma consulta
+        no SQLite). Funcionários alterados são relidos (são poucos); batidas
+        novas vêm do final do CSV ou dos ids novos do banco (load_new), sem
+        reler o histórico inteiro. Se o CSV foi reescrito, recarrega tudo.
+        """
+        if self.employee_repo.alterado_externamente():
+            self._funcionarios = {f.matricula: f for f in self.employee_repo.load_all()}
+            self._versao_funcionarios += 1
+
+        if not self.attendance_repo.alterado_externamente():
+            return
+        novos = self.attendance_repo.load_new()
+        if novos is None:
+            # Sem salvar o resumo: ele reflete o arquivo antigo, e gravá-lo
+            # agora o marcaria como em dia com o arquivo novo
+            self.attendance_repo.flush()
+            self._carregar()
+            return
+        if novos.empty:
+            return
 
-        # Carrega dados dos CSVs
-        self._funcionarios: Dict[str, Funcionario] = {
-            f.matricula: f for f in self.employee_repo.load_all()
-        }
-        self._registros: List[RegistroPonto] = self.attendance_repo.load_all()
+        anteriores = {}
+        for m in novos["matricula"].astype(str).unique():
+            if self._historico_no_banco:
+                # O banco já tem as linhas novas: vale o último evento sem elas
+                ultimo = self.attendance_repo.last_event(m, ignorar=novos.index[novos["matricula"] == m])
+            else:
+                ultimo = self._ultimo_evento(m)
+            if ultimo is not None:
+                anteriores[m] = (para_ns(ultimo.timestamp), ultimo.tipo.value)
+        if not self._historico_no_banco:
+            self._carregar_bloco(novos)
+        self._resumo.registrar_bloco(novos, anteriores, self._turnos())
+        self._salvar_resumo_se_necessario()
 
     # ---------- FUNCIONÁRIOS ----------
 
+    @_exclusivo("employee_repo")
     def cadastrar_funcionario(self, matricula: str, nome: str, idade: int, turno: str) -> None:
         """
         Cadastra um novo funcionário.
 
         turno deve ser: MATUTINO, VESPERTINO ou NOTURNO (case-insensitive).
         """
+        self.sincronizar()
         matricula = str(matricula)
 
         if matricula in self._funcionarios:
@@ -65,8 +247,81 @@ class SistemaPonto:
 
         self._funcionarios[matricula] = funcionario
 
-        # Persiste imediatamente no CSV
-        self.employee_repo.save_all(self.listar_funcionarios())
+        # Persiste imediatamente (uma linha no journal)
+        self._registrar_alteracao("create", funcionario)
+
+    @_exclusivo("employee_repo")
+    def importar_funcionarios(self, arquivo: Path | str | IO) -> pd.DataFrame:
+        """
+        Importa funcionários em massa de um arquivo CSV ou Excel (.xlsx/.xls)
+        com as colunas matricula, nome, idade e turno.
+
+        A validação é feita por coluna: matrícula vazia, repetida no arquivo
+        ou já cadastrada, nome vazio, idade fora de IDADE_MINIMA..IDADE_MAXIMA
+        e turno inválido (aceita MATUTINO ou Matutino). As linhas aceitas são
+        persistidas numa única escrita.
+
+        Retorna um DataFrame com as linhas rejeitadas (índice = posição no
+        arquivo) e a coluna "motivo". Vazio se tudo foi aceito.
+        """
+        nome_arquivo = str(getattr(arquivo, "name", arquivo)).lower()
+        leitor = pd.read_excel if nome_arquivo.endswith((".xlsx", ".xls")) else pd.read_csv
+        df = leitor(arquivo, dtype={"matricula": str, "nome": str, "turno": str})
+
+        faltando = [c for c in COLUNAS_FUNCIONARIO if c not in df.columns]
+        if faltando:
+            raise ValueError(f"Colunas ausentes no arquivo: {', '.join(faltando)}.")
+
+        df = df[COLUNAS_FUNCIONARIO].reset_index(drop=True)
+        self.sincronizar()
+        matriculas = df["matricula"].fillna("").astype(str).str.strip()
+        nomes = df["nome"].fillna("").astype(str).str.strip()
+        idades = pd.to_numeric(df["idade"], errors="coerce")
+        turnos = df["turno"].fillna("").astype(str).str.strip().str.upper().map(
+            {t.name: t for t in Turno} | {t.value.upper(): t for t in Turno}
+        )
+
+        motivo = pd.Series(None, index=df.index, dtype=object)
+        motivo[turnos.isna()] = "Turno inválido. Use: MATUTINO, VESPERTINO ou NOTURNO."
+        motivo[
+            idades.isna()
+            | (idades % 1 != 0)
+            | (idades < IDADE_MINIMA)
+            | (idades > IDADE_MAXIMA)
+        ] = f"Idade inválida. Use um inteiro entre {IDADE_MINIMA} e {IDADE_MAXIMA}."
+        motivo[nomes == ""] = "Nome vazio."
+        motivo[matriculas.duplicated(keep="first")] = "Matrícula repetida no arquivo."
+        motivo[matriculas.isin(self._funcionarios.keys())] = (
+            "Já existe funcionário com esta matrícula."
+        )
+        motivo[matriculas == ""] = "Matrícula vazia."
+
+        aceitos = motivo.isna()
+        novos = [
+            Funcionario(matricula=m, nome=n, idade=int(i), turno=t)
+            for m, n, i, t in zip(
+                matriculas[aceitos].tolist(),
+                nomes[aceitos].tolist(),
+                idades[aceitos].tolist(),
+                turnos[aceitos].tolist(),
+            )
+        ]
+        if novos:
+            for funcionario in novos:
+                self._funcionarios[funcionario.matricula] = funcionario
+            self._versao_funcionarios += 1
+            self.employee_repo.append_changes("create", novos)
+            self._compactar_se_necessario()
+
+        return df[~aceitos].assign(motivo=motivo[~aceitos])
+
+    @property
+    def versao_funcionarios(self) -> int:
+        """
+        Contador que muda a cada cadastro/edição/importação ou releitura
+        dos funcionários (chave de cache para quem depende deles).
+        """
+        return self._versao_funcionarios
 
     def listar_funcionarios(self) -> List[Funcionario]:
         return list(self._funcionarios.values())
@@ -78,8 +333,10 @@ class SistemaPonto:
         Caso de uso 'Confirmar matrícula'.
         Retorna True se a matrícula estiver cadastrada.
         """
+        self.sincronizar()
         return str(matricula) in self._funcionarios
 
+    @_exclusivo("employee_repo")
     def editar_funcionario(
         self,
         matricula: str,
@@ -90,6 +347,7 @@ class SistemaPonto:
         """
         Edita os dados de um funcionário já cadastrado.
         """
+        self.sincronizar()
         matricula = str(matricula)
 
         if matricula not in self._funcionarios:
@@ -110,57 +368,646 @@ class SistemaPonto:
                 raise ValueError("Turno inválido. Use: MATUTINO, VESPERTINO ou NOTURNO.")
             funcionario.turno = turno_enum
 
-        # Persiste alterações no CSV
+        # Persiste alterações (uma linha no journal)
+        self._registrar_alteracao("update", funcionario)
+
+    @_exclusivo("employee_repo")
+    def compactar_funcionarios(self) -> None:
+        """
+        Reescreve employees.csv com o estado atual e zera o journal.
+
+        Antes relê o que outro processo tenha acrescentado ao journal,
+        para a compactação não descartar essas alterações.
+        """
+        self.sincronizar()
         self.employee_repo.save_all(self.listar_funcionarios())
 
+    def _registrar_alteracao(self, operacao: str, funcionario: Funcionario) -> None:
+        self._versao_funcionarios += 1
+        self.employee_repo.append_change(operacao, funcionario)
+        self._compactar_se_necessario()
+
+    def _compactar_se_necessario(self) -> None:
+        if self.employee_repo.journal_size >= EMPLOYEES_JOURNAL_COMPACTAR_A_CADA:
+            self.compactar_funcionarios()
+
     # ---------- REGISTROS DE PONTO (EVENTOS) ----------
 
+    @_exclusivo("attendance_repo")
     def registrar_entrada(self, matricula: str, instante: Optional[datetime] = None) -> None:
         """
         Registra um evento de ENTRADA.
         Não deixa ter duas entradas seguidas sem saída.
         """
+        self.sincronizar()
         matricula = str(matricula)
 
         if matricula not in self._funcionarios:
             raise ValueError("Funcionário não encontrado.")
 
-        ultimo = self._ultimo_evento(matricula)
-        if ultimo and ultimo.tipo == "entrada":
+        if self._entrada_em_aberto(matricula):
             raise ValueError("Já existe uma entrada sem saída para este funcionário.")
 
         instante = instante or datetime.now()
-        registro = RegistroPonto(matricula=matricula, timestamp=instante, tipo="entrada")
+        registro = RegistroPonto(
+            matricula=matricula, timestamp=instante, tipo=TipoRegistro.ENTRADA
+        )
         self._adicionar_registro(registro)
 
+    @_exclusivo("attendance_repo")
     def registrar_saida(self, matricula: str, instante: Optional[datetime] = None) -> None:
         """
         Registra um evento de SAÍDA.
         Só permite se a última ação foi uma entrada.
         """
+        self.sincronizar()
         matricula = str(matricula)
 
         if matricula not in self._funcionarios:
             raise ValueError("Funcionário não encontrado.")
 
-        ultimo = self._ultimo_evento(matricula)
-        if not ultimo or ultimo.tipo != "entrada":
+        if not self._entrada_em_aberto(matricula):
             raise ValueError("Não há entrada em aberto para este funcionário.")
 
         instante = instante or datetime.now()
-        registro = RegistroPonto(matricula=matricula, timestamp=instante, tipo="saida")
+        registro = RegistroPonto(
+            matricula=matricula, timestamp=instante, tipo=TipoRegistro.SAIDA
+        )
         self._adicionar_registro(registro)
 
+    @_exclusivo("attendance_repo")
+    def registrar_eventos_lote(
+        self,
+        eventos: Iterable[Tuple[str, datetime, str]] | pd.DataFrame,
+    ) -> pd.DataFrame:
+        """
+        Registra de uma vez um lote de batidas (ex.: upload de catraca offline).
+
+        `eventos` é um DataFrame com colunas matricula/timestamp/tipo ou um
+        iterável de tuplas (matricula, timestamp, tipo). As regras de
+        sequência são validadas em uma passada ordenada por funcionário,
+        partindo do último evento já registrado, e os aceitos são
+        persistidos numa única escrita.
+
+        Retorna um DataFrame com as linhas rejeitadas (índice = posição no
+        lote) e a coluna "motivo". Vazio se tudo foi aceito.
+        """
+        if isinstance(eventos, pd.DataFrame):
+            df = eventos[COLUNAS_REGISTRO].reset_index(drop=True)
+        else:
+            df = pd.DataFrame(list(eventos), columns=COLUNAS_REGISTRO)
+
+        df = df.assign(
+            matricula=df["matricula"].astype(str),
+            timestamp=_timestamps_locais(df["timestamp"]),
+            tipo=df["tipo"].astype(str).str.lower(),
+        )
+        motivo = pd.Series(None, index=df.index, dtype=object)
+
+        self.sincronizar()
+        motivo[~df["tipo"].isin(TIPOS)] = "Tipo inválido. Use: entrada ou saida."
+        motivo[df["timestamp"].isna()] = "Timestamp inválido."
+        motivo[~df["matricula"].isin(self._funcionarios.keys())] = "Funcionário não encontrado."
+
+        # Estado de partida de cada funcionário do lote
+        validos = df[motivo.isna()]
+        ultimos = {m: self._ultimo_evento(m) for m in validos["matricula"].unique()}
+        ultimo_ts = pd.to_datetime(
+            validos["matricula"].map(
+                {m: pd.Timestamp(u.timestamp) for m, u in ultimos.items() if u is not None}
+            )
+        )
+        anteriores = ultimo_ts.notna() & (validos["timestamp"] < ultimo_ts)
+        motivo[anteriores[anteriores].index] = "Anterior ao último registro do funcionário."
+
+        # Cada evento (aceito ou não) deixa o estado igual ao seu tipo, então o
+        # estado antes de um evento é o tipo do evento anterior do mesmo
+        # funcionário: rejeita quando repete o tipo anterior.
+        validos = df[motivo.isna()].sort_values(["matricula", "timestamp"], kind="stable")
+        estado_inicial = validos["matricula"].map(
+            {m: (u.tipo.value if u is not None else "saida") for m, u in ultimos.items()}
+        )
+        anterior = validos.groupby("matricula", sort=False)["tipo"].shift().fillna(estado_inicial)
+        repetidos = validos["tipo"] == anterior
+        motivo[repetidos[repetidos & (validos["tipo"] == "entrada")].index] = (
+            "Já existe uma entrada sem saída para este funcionário."
+        )
+        motivo[repetidos[repetidos & (validos["tipo"] == "saida")].index] = (
+            "Não há entrada em aberto para este funcionário."
+        )
+
+        aceitos = df[motivo.isna()].sort_values("timestamp", kind="stable")
+        if not aceitos.empty:
+            if not self._historico_no_banco:
+                self._carregar_bloco(aceitos)
+            self.attendance_repo.append_frame(aceitos)
+            self._resumo.registrar_bloco(
+                aceitos,
+                {m: (para_ns(u.timestamp), u.tipo.value) for m, u in ultimos.items() if u},
+                self._turnos(),
+            )
+            self._salvar_resumo_se_necessario()
+
+        rejeitados = df[motivo.notna()].assign(motivo=motivo[motivo.notna()])
+        return rejeitados
+
+    @_exclusivo()
+    def ultimo_evento(self, matricula: str) -> Optional[RegistroPonto]:
+        """
+        Última batida do funcionário (None se ainda não bateu ponto).
+        """
+        self.sincronizar()
+        matricula = str(matricula)
+        if matricula not in self._funcionarios:
+            raise ValueError("Funcionário não encontrado.")
+        return self._ultimo_evento(matricula)
+
     def _adicionar_registro(self, registro: RegistroPonto) -> None:
-        self._registros.append(registro)
-        self.attendance_repo.append(registro)  # persiste no CSV (append)
+        anterior = self._ultimo_evento(registro.matricula)
+        if not self._historico_no_banco:
+            self._registros.append(registro)
+            self._indexar_evento(registro)
+        self.attendance_repo.append(registro)  # persiste (append)
+
+        turno = self._funcionarios[registro.matricula].turno.value
+        self._resumo.registrar(registro, anterior, turno)
+        self._salvar_resumo_se_necessario()
+
+    def _carregar_cauda(self, offset: int) -> int:
+        """
+        Carrega as linhas do CSV a partir do byte `offset` e retorna
+        quantas eram. Trechos pequenos são lidos linha a linha, sem pandas
+        (partida rápida do CLI); os grandes, de forma vetorizada.
+        """
+        registros = self.attendance_repo.load_tail_registros(offset, CAUDA_LEVE_BYTES)
+        if registros is None:
+            bloco = self.attendance_repo.load_tail(offset)
+            self._carregar_bloco(bloco)
+            return len(bloco)
+        for registro in registros:
+            self._registros.append(registro)
+            self._indexar_evento(registro)
+        return len(registros)
+
+    def _carregar_bloco(self, df: pd.DataFrame) -> None:
+        """
+        Acrescenta um bloco de registros em memória e atualiza o índice
+        de último evento com os mais recentes do bloco.
+        """
+        inicio = len(self._registros)
+        self._registros.extend_frame(df)
+        for i in self._registros.ultimo_por_matricula(inicio).values():
+            self._indexar_evento(self._registros.registro(i))
+
+    def _garantir_periodo(self, inicio: Optional[datetime] = None) -> None:
+        """
+        Carrega as partições mensais pendentes a partir de `inicio`
+        (todas, se inicio for None).
+        """
+        if not self._meses_pendentes:
+            return
+        mes_inicio = inicio.strftime("%Y-%m") if inicio is not None else ""
+        for mes in [m for m in self._meses_pendentes if m >= mes_inicio]:
+            self._carregar_bloco(self.attendance_repo.load_partition(mes))
+            self._meses_pendentes.remove(mes)
+
+    def _indexar_evento(self, registro: RegistroPonto) -> None:
+        """
+        Atualiza o índice de último evento por matrícula.
+
+        Em empate de timestamp vence o evento mais recente na lista,
+        o mesmo resultado da antiga ordenação estável do histórico.
+        """
+        atual = self._ultimo_por_matricula.get(registro.matricula)
+        if atual is None or registro.timestamp >= atual.timestamp:
+            self._ultimo_por_matricula[registro.matricula] = registro
 
     def _ultimo_evento(self, matricula: str) -> Optional[RegistroPonto]:
-        eventos = [r for r in self._registros if r.matricula == matricula]
-        if not eventos:
+        if self._historico_no_banco:
+            return self.attendance_repo.last_event(matricula)
+
+        # Sem evento nos meses carregados: volta mês a mês até achar
+        while matricula not in self._ultimo_por_matricula and self._meses_pendentes:
+            mes = self._meses_pendentes.pop()
+            self._carregar_bloco(self.attendance_repo.load_partition(mes))
+        return self._ultimo_por_matricula.get(matricula)
+
+    def _entrada_em_aberto(self, matricula: str) -> bool:
+        ultimo = self._ultimo_evento(matricula)
+        return ultimo is not None and ultimo.tipo is TipoRegistro.ENTRADA
+
+    def alterado_externamente(self) -> bool:
+        """
+        True se outro processo gravou funcionários ou registros depois que
+        esta instância os leu (mtime/tamanho dos CSVs ou versão de escrita
+        do SQLite). Custa poucos stat() ou uma consulta.
+        """
+        return (
+            self.employee_repo.alterado_externamente()
+            or self.attendance_repo.alterado_externamente()
+        )
+
+    @_exclusivo()
+    def flush(self) -> None:
+        """
+        Garante que todas as batidas aceitas estão gravadas no repositório.
+        """
+        self.attendance_repo.flush()
+        if self._resumo.pendentes:
+            self._salvar_resumo()
+
+    @_exclusivo()
+    def close(self) -> None:
+        """
+        Grava o que estiver pendente e libera os arquivos/conexões.
+        """
+        self.flush()
+        self.attendance_repo.close()
+
+    # ---------- SNAPSHOT ----------
+
+    def _salvar_snapshot(self) -> None:
+        """
+        Grava o checkpoint binário. Só é chamado na inicialização, logo
+        depois da carga, quando a memória corresponde exatamente ao CSV
+        até attendance_repo.offset.
+        """
+        # Sob a trava: outra partida pode estar gravando o mesmo snapshot, e
+        # nenhuma batida entra no CSV entre calcular o CRC e gravar
+        with self.attendance_repo.trava:
+            salvar_snapshot(
+                self._snapshot_path,
+                self._registros,
+                self.attendance_repo.path,
+                self.attendance_repo.offset,
+                list(self._funcionarios.values()),
+                self._arquivos_funcionarios(),
+                self.employee_repo.journal_size,
+            )
+
+    def _arquivos_funcionarios(self) -> List[Path]:
+        return [
+            Path(p)
+            for p in (
+                getattr(self.employee_repo, "path", None),
+                getattr(self.employee_repo, "journal_path", None),
+            )
+            if p is not None
+        ]
+
+    # ---------- RESUMOS DIÁRIOS ----------
+
+    @_exclusivo()
+    def resumo_diario(
+        self,
+        inicio: Optional[date] = None,
+        fim: Optional[date] = None,
+        por: str = "matricula",
+    ) -> pd.DataFrame:
+        """
+        Resumo por dia x matrícula (por="matricula") ou dia x turno
+        (por="turno"): entradas, saídas, primeira entrada, última saída e
+        minutos trabalhados. Lê a tabela materializada, sem varrer o histórico.
+        """
+        self.sincronizar()
+        return self._resumo.frame(por, inicio, fim)
+
+    @_exclusivo()
+    def reconstruir_resumo_diario(self) -> None:
+        """
+        Recalcula os resumos diários do zero a partir do histórico e grava.
+        """
+        if self._historico_no_banco or self._meses_pendentes:
+            self.attendance_repo.flush()
+            blocos = self.attendance_repo.iter_chunks()
+        else:
+            blocos = [self._registros.to_frame()]
+        self._resumo.reconstruir(blocos, self._turnos())
+        self._salvar_resumo()
+
+    def _sincronizar_resumo(self) -> None:
+        """
+        Usa o resumo gravado se ele cobrir exatamente as batidas do
+        histórico e o CSV de registros não mudou desde que ele foi salvo;
+        senão reconstrói. Com partições ainda não carregadas o total não é
+        conhecido e o resumo gravado é usado como está.
+        """
+        if self._historico_no_banco:
+            total = self.attendance_repo.count()
+        elif self._meses_pendentes:
+            total = None
+        else:
+            total = len(self._registros)
+
+        if (
+            not self._resumo.carregar()
+            or (total is not None and total != self._resumo.eventos)
+            or self._resumo.origem != self._origem_resumo()
+        ):
+            self.reconstruir_resumo_diario()
+
+    def _salvar_resumo_se_necessario(self) -> None:
+        if self._resumo.pendentes >= RESUMO_SALVAR_A_CADA:
+            self._salvar_resumo()
+
+    def _salvar_resumo(self) -> None:
+        # Os arquivos de resumo são compartilhados por todos os processos
+        # que usam a mesma pasta de dados
+        with self.attendance_repo.trava:
+            self._resumo.origem = self._origem_resumo()
+            self._resumo.salvar()
+
+    def _origem_resumo(self) -> Optional[Dict[str, int]]:
+        # Só o CSV simples: partições e SQLite ficam só com a contagem
+        if not getattr(self.attendance_repo, "carga_incremental", False):
             return None
-        eventos.sort(key=lambda r: r.timestamp)
-        return eventos[-1]
+        return estado_arquivo(self.attendance_repo.path)
+
+    def _turnos(self) -> Dict[str, str]:
+        return {m: f.turno.value for m, f in self._funcionarios.items()}
+
+    # ---------- CONSULTAS ----------
+
+    @_exclusivo()
+    def consultar_registros(
+        self,
+        matricula: Optional[str] = None,
+        inicio: Optional[date | datetime] = None,
+        fim: Optional[date | datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        Registros de ponto filtrados por matrícula e/ou período,
+        em ordem cronológica.
+
+        inicio/fim são inclusivos; uma data sem hora em `fim` vale
+        até o fim daquele dia.
+        """
+        self.sincronizar()
+        inicio, fim = _intervalo(inicio, fim)
+        if self._historico_no_banco:
+            return _colunas_categoricas(
+                self.attendance_repo.query_frame(None if matricula is None else str(matricula), inicio, fim)
+            )
+
+        self._garantir_periodo(inicio)
+        posicoes = self._registros.posicoes_ordenadas(
+            None if inicio is None else para_ns(inicio),
+            None if fim is None else para_ns(fim),
+            None if matricula is None else str(matricula),
+        )
+        return self._registros.to_frame(posicoes)
+
+    def resumo_por_funcionario(
+        self,
+        inicio: Optional[date | datetime] = None,
+        fim: Optional[date | datetime] = None,
+        matriculas: Optional[Iterable[str]] = None,
+        chunksize: int = ATTENDANCE_CHUNKSIZE,
+    ) -> pd.DataFrame:
+        """
+        Relatório por funcionário: quantidade de entradas e saídas, primeira
+        e última batida no período.
+
+        Lê o histórico direto do repositório em blocos (iter_chunks) e vai
+        acumulando os parciais, então não precisa do histórico em memória.
+        """
+        inicio, fim = _intervalo(inicio, fim)
+        self.flush()
+
+        acumulado = None
+        for chunk in self.attendance_repo.iter_chunks(chunksize, inicio, fim, matriculas):
+            parcial = (
+                chunk.assign(
+                    entradas=(chunk["tipo"] == "entrada").astype(int),
+                    saidas=(chunk["tipo"] == "saida").astype(int),
+                )
+                .groupby("matricula")
+                .agg(
+                    entradas=("entradas", "sum"),
+                    saidas=("saidas", "sum"),
+                    primeiro=("timestamp", "min"),
+                    ultimo=("timestamp", "max"),
+                )
+            )
+            if acumulado is None:
+                acumulado = parcial
+            else:
+                juntos = pd.concat([acumulado, parcial]).groupby(level=0)
+                acumulado = juntos.agg(
+                    {"entradas": "sum", "saidas": "sum", "primeiro": "min", "ultimo": "max"}
+                )
+
+        if acumulado is None:
+            return pd.DataFrame(columns=["matricula", "entradas", "saidas", "primeiro", "ultimo"])
+        return acumulado.reset_index()
+
+    def horas_trabalhadas(
+        self,
+        inicio: Optional[date | datetime] = None,
+        fim: Optional[date | datetime] = None,
+        periodo: Optional[str] = "dia",
+        matriculas: Optional[Iterable[str]] = None,
+        incluir_abertas: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Horas trabalhadas por funcionário e período (RF2/RF6).
+
+        Cada entrada é pareada com a saída seguinte do mesmo funcionário
+        (ordenação + deslocamento por grupo, sem laços em Python). A jornada
+        conta inteira para o dia/semana/mês em que começou, então um turno
+        NOTURNO que passa da meia-noite não é partido em dois dias.
+
+        - periodo: "dia", "semana", "mes" ou None (total do intervalo)
+        - incluir_abertas: conta entradas sem saída até o próximo evento do
+          funcionário; a última dele, até agora (ou até `fim`)
+
+        Colunas: matricula, turno, periodo, horas, jornadas, abertas.
+        """
+        inicio, fim = _intervalo(inicio, fim)
+        if periodo not in PERIODOS:
+            raise ValueError("Período inválido. Use: dia, semana, mes ou None.")
+
+        # Busca um dia além de `fim` para achar a saída de quem entrou no fim
+        fim_busca = None if fim is None else fim + JORNADA_MAXIMA
+        df = self.consultar_registros(inicio=inicio, fim=fim_busca)
+        if matriculas is not None:
+            df = df[df["matricula"].isin([str(m) for m in matriculas])]
+
+        colunas = ["matricula", "turno", "periodo", "horas", "jornadas", "abertas"]
+        if df.empty:
+            return pd.DataFrame(columns=colunas)
+
+        matricula = df["matricula"]
+        if isinstance(matricula.dtype, pd.CategoricalDtype):
+            codigos = matricula.cat.codes.to_numpy()
+            nomes = np.asarray(matricula.cat.categories, dtype=object)
+        else:
+            codigos, nomes = pd.factorize(matricula.astype(str))
+        timestamps = df["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        entradas = (df["tipo"] == "entrada").to_numpy()
+
+        ordem = np.lexsort((timestamps, codigos))
+        codigos, timestamps, entradas = codigos[ordem], timestamps[ordem], entradas[ordem]
+
+        # Próximo evento do mesmo funcionário
+        mesmo = np.zeros(len(codigos), dtype=bool)
+        mesmo[:-1] = codigos[1:] == codigos[:-1]
+        proximo_saida = np.zeros(len(codigos), dtype=bool)
+        proximo_saida[:-1] = mesmo[:-1] & ~entradas[1:]
+        proximo_ts = np.empty_like(timestamps)
+        proximo_ts[:-1] = timestamps[1:]
+
+        pareadas = entradas & proximo_saida
+        abertas = entradas & ~proximo_saida
+        duracao = np.where(pareadas, proximo_ts - timestamps, 0)
+        if incluir_abertas:
+            # Uma entrada aberta vai até o próximo evento do funcionário
+            # (outra entrada); só a última dele corre até agora (ou `fim`)
+            limite = para_ns(min(datetime.now(), fim) if fim is not None else datetime.now())
+            termino = np.minimum(np.where(mesmo, proximo_ts, limite), limite)
+            duracao = np.where(abertas, np.maximum(termino - timestamps, 0), duracao)
+
+        # Só jornadas que começaram dentro do intervalo pedido
+        alvo = entradas.copy()
+        if fim is not None:
+            alvo &= timestamps <= para_ns(fim)
+
+        jornadas = pd.DataFrame(
+            {
+                "codigo": codigos[alvo],
+                "horas": duracao[alvo] / 3.6e12,
+                "jornadas": pareadas[alvo].astype(np.int64),
+                "abertas": abertas[alvo].astype(np.int64),
+            }
+        )
+        inicios = pd.Series(timestamps[alvo].view("datetime64[ns]"))
+        if periodo is None:
+            chaves = ["codigo"]
+        else:
+            jornadas["periodo"] = inicios.dt.to_period(PERIODOS[periodo]).dt.start_time
+            chaves = ["codigo", "periodo"]
+
+        # Agrupa pelos códigos inteiros; o texto da matrícula só entra no fim
+        resultado = jornadas.groupby(chaves, sort=True).sum().reset_index()
+        if periodo is None:
+            resultado["periodo"] = pd.Timestamp(inicio) if inicio else inicios.min()
+        resultado["matricula"] = nomes[resultado["codigo"].to_numpy()]
+        resultado["turno"] = resultado["matricula"].map(
+            {m: f.turno.value for m, f in self._funcionarios.items()}
+        )
+        return resultado[colunas]
+
+    # ---------- AUDITORIA ----------
+
+    def auditar(
+        self,
+        agora: Optional[datetime] = None,
+        horas_em_aberto: float = AUDITORIA_HORAS_EM_ABERTO,
+    ) -> pd.DataFrame:
+        """
+        Confere o histórico gravado inteiro (não o que está em memória),
+        incluindo linhas de outros processos ou editadas à mão, e devolve
+        uma ocorrência por batida problemática: matrícula órfã, tipo
+        inválido, horário no futuro, fora de ordem, saída sem entrada,
+        entrada repetida e entrada em aberto há mais de `horas_em_aberto`.
+        Resumo por funcionário: auditoria.por_funcionario(ocorrencias).
+        """
+        from app.services import auditoria
+
+        with self._lock:
+            self.sincronizar()
+            cadastradas = set(self._funcionarios)
+        self.flush()
+        return auditoria.auditar(self.attendance_repo, cadastradas, agora, horas_em_aberto)
+
+    # ---------- EXPORTAÇÃO ----------
+
+    def exportar(
+        self,
+        formato: str,
+        inicio: Optional[date | datetime] = None,
+        fim: Optional[date | datetime] = None,
+        matriculas: Optional[Iterable[str]] = None,
+        *,
+        destino: Path | str | IO,
+        por: Optional[str] = None,
+    ) -> int:
+        """
+        Exporta os registros do período (e das matrículas, se dadas) para
+        `destino`, em "csv" ou "xlsx", com as colunas matricula, nome,
+        timestamp e tipo em ordem cronológica. Devolve quantas linhas
+        foram escritas.
+
+        No xlsx, por="funcionario" ou por="mes" separa em uma aba por
+        matrícula ou por mês. Os registros são lidos e escritos em blocos
+        de EXPORTACAO_BLOCO linhas, e o lock da instância só é segurado
+        durante a leitura de cada bloco: batidas continuam sendo aceitas
+        durante uma exportação longa.
+        """
+        from app.services import exportacao
+
+        exportacao.validar(formato, por)
+        inicio, fim = _intervalo(inicio, fim)
+        with self._lock:
+            self.sincronizar()
+            if matriculas is not None:
+                matriculas = list(dict.fromkeys(str(m) for m in matriculas))
+                desconhecidas = [m for m in matriculas if m not in self._funcionarios]
+                if desconhecidas:
+                    raise ValueError(f"Funcionário não encontrado: {', '.join(desconhecidas)}.")
+            nomes = {m: f.nome for m, f in self._funcionarios.items()}
+
+        def blocos(filtro: Optional[List[str]]) -> Iterator[pd.DataFrame]:
+            for bloco in self._blocos_exportacao(inicio, fim, filtro):
+                bloco = bloco.assign(nome=bloco["matricula"].astype(str).map(nomes))
+                yield bloco[exportacao.COLUNAS]
+
+        if por == "funcionario":
+            partes = (
+                (m, bloco)
+                for m in (matriculas if matriculas is not None else sorted(nomes))
+                for bloco in blocos([m])
+            )
+        elif por == "mes":
+            partes = exportacao.por_mes(blocos(matriculas))
+        else:
+            partes = ((exportacao.ABA_UNICA, bloco) for bloco in blocos(matriculas))
+        return exportacao.escrever(formato, partes, destino)
+
+    def _blocos_exportacao(
+        self,
+        inicio: Optional[datetime],
+        fim: Optional[datetime],
+        matriculas: Optional[List[str]],
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Registros do período em blocos de até EXPORTACAO_BLOCO linhas, em
+        ordem cronológica.
+        """
+        if matriculas is not None and not matriculas:
+            return
+        if self._historico_no_banco:
+            yield from self.attendance_repo.iter_chunks(EXPORTACAO_BLOCO, inicio, fim, matriculas)
+            return
+
+        with self._lock:
+            self._garantir_periodo(inicio)
+            # A tabela só cresce: as posições já indexadas continuam
+            # válidas, e uma recarga troca a tabela em vez de alterá-la
+            tabela = self._registros
+            posicoes = tabela.posicoes_ordenadas(
+                None if inicio is None else para_ns(inicio),
+                None if fim is None else para_ns(fim),
+                matriculas[0] if matriculas is not None and len(matriculas) == 1 else None,
+            )
+        filtrar = matriculas is not None and len(matriculas) > 1
+        for i in range(0, len(posicoes), EXPORTACAO_BLOCO):
+            with self._lock:
+                bloco = tabela.to_frame(posicoes[i:i + EXPORTACAO_BLOCO])
+            if filtrar:
+                bloco = bloco[bloco["matricula"].isin(matriculas)]
+            if not bloco.empty:
+                yield bloco
 
     # ---------- DATAFRAMES ----------
 
@@ -168,50 +1015,38 @@ class SistemaPonto:
         dados = [f.to_dict() for f in self._funcionarios.values()]
         return pd.DataFrame(dados, columns=["matricula", "nome", "idade", "turno"])
 
+    @_exclusivo()
     def dataframe_registros(self) -> pd.DataFrame:
-        dados = [r.to_dict() for r in self._registros]
-        return pd.DataFrame(dados, columns=["matricula", "timestamp", "tipo"])
+        """
+        Registros de ponto com timestamp em datetime64 (não em texto) e
+        matricula/tipo categóricos, em qualquer backend.
+        """
+        self.sincronizar()
+        if self._historico_no_banco:
+            return _colunas_categoricas(self.attendance_repo.load_frame())
+        self._garantir_periodo()
+        return self._registros.to_frame()
 
     # ---------- GRÁFICOS ----------
 
+    @_exclusivo()
     def grafico_barras_por_idade(
         self,
         show: bool = True,
         save_path: Optional[Path | str] = None,
     ):
         """
-        Gráfico de barras com funcionários ordenados por idade.
+        Gráfico de barras das idades: uma barra por funcionário (ordenadas
+        por idade) ou, com muitos funcionários, quantidade por faixa de idade.
 
         - show=True: mostra o gráfico na tela (CLI)
         - save_path: caminho do arquivo PNG (se None, usa config.GRAFICO_IDADE)
-        """
-        df = self.dataframe_funcionarios()
-        if df.empty:
-            print("Nenhum funcionário cadastrado.")
-            return None
-
-        df_ordenado = df.sort_values("idade")
 
-        fig, ax = plt.subplots()
-        ax.bar(df_ordenado["nome"], df_ordenado["idade"])
-        ax.set_xlabel("Funcionário")
-        ax.set_ylabel("Idade")
-        ax.set_title("Funcionários ordenados por idade")
-        for label in ax.get_xticklabels():
-            label.set_rotation(45)
-            label.set_ha("right")
-        fig.tight_layout()
-
-        # salva na pasta graficos
-        save_path = Path(save_path or GRAFICO_IDADE)
-        save_path.parent.mkdir(parents=True, exist_ok=True)
-        fig.savefig(save_path)
-
-        if show:
-            plt.show()
-
-        return fig
+        A figura e o PNG ficam em cache até os funcionários mudarem.
+        """
+        return self._grafico("idade", "desenhar_idades", save_path or GRAFICO_IDADE, show)
 
+    @_exclusivo()
     def grafico_pizza_por_turno(
         self,
         show: bool = True,
@@ -222,31 +1057,120 @@ class SistemaPonto:
 
         - show=True: mostra o gráfico na tela (CLI)
         - save_path: caminho do arquivo PNG (se None, usa config.GRAFICO_TURNO)
+
+        A figura e o PNG ficam em cache até os funcionários mudarem.
         """
-        df = self.dataframe_funcionarios()
-        if df.empty:
-            print("Nenhum funcionário cadastrado.")
-            return None
+        return self._grafico("turno", "desenhar_turnos", save_path or GRAFICO_TURNO, show)
 
-        contagem = df["turno"].value_counts()
+    def _grafico(self, nome: str, desenho: str, save_path: Path | str, show: bool):
+        """
+        Devolve a figura do cache ou, se os funcionários mudaram (ou o PNG
+        sumiu/foi alterado), desenha de novo e regrava o PNG.
+        """
+        from app.services import graficos  # matplotlib só quando há gráfico
 
-        fig, ax = plt.subplots()
-        ax.pie(contagem, labels=contagem.index, autopct="%1.1f%%")
-        ax.set_title("Distribuição de funcionários por turno")
-        fig.tight_layout()
+        desenhar = getattr(graficos, desenho)
+        self.sincronizar()
+        if not self._funcionarios:
+            print("Nenhum funcionário cadastrado.")
+            return None
 
-        # salva na pasta graficos
-        save_path = Path(save_path or GRAFICO_TURNO)
-        save_path.parent.mkdir(parents=True, exist_ok=True)
-        fig.savefig(save_path)
+        save_path = Path(save_path)
+        chave = (nome, save_path)
+        em_cache = self._graficos.get(chave)
+        if (
+            em_cache is None
+            or em_cache[0] != self._versao_funcionarios
+            or em_cache[1] != graficos.assinatura_arquivo(save_path)
+        ):
+            fig = graficos.nova_figura()
+            desenhar(fig, self._funcionarios.values())
+            graficos.salvar(fig, save_path)
+            em_cache = (self._versao_funcionarios, graficos.assinatura_arquivo(save_path), fig)
+            self._graficos[chave] = em_cache
 
         if show:
-            plt.show()
+            graficos.mostrar(desenhar, self._funcionarios.values())
 
-        return fig
+        return em_cache[2]
 
     def __repr__(self) -> str:
+        total = (
+            self.attendance_repo.count()
+            if self._historico_no_banco
+            else len(self._registros)
+        )
         return (
             f"<SistemaPonto funcionarios={len(self._funcionarios)} "
-            f"registros={len(self._registros)}>"
+            f"registros={total}>"
         )
+
+
+def _colunas_categoricas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    matricula e tipo como category, o mesmo formato da TabelaRegistros:
+    registros vindos do banco saem com os mesmos dtypes que os do CSV.
+    """
+    return df.astype({"matricula": "category", "tipo": pd.CategoricalDtype(list(TIPOS))})
+
+
+def _diretorio_dados(attendance_repo) -> Path:
+    """
+    Pasta onde ficam os arquivos do repositório de registros
+    (a pasta-mãe, no caso das partições mensais).
+    """
+    diretorio = getattr(attendance_repo, "diretorio", None)
+    if diretorio is not None:
+        return Path(diretorio).parent
+    return Path(attendance_repo.path).parent
+
+
+def _intervalo(
+    inicio: Optional[date | datetime],
+    fim: Optional[date | datetime],
+) -> tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Converte datas sem hora em instantes: início do dia / fim do dia.
+    """
+    if inicio is not None and not isinstance(inicio, datetime):
+        inicio = datetime.combine(inicio, time.min)
+    if fim is not None and not isinstance(fim, datetime):
+        fim = datetime.combine(fim, time.max)
+    return inicio, fim
+
+
+def _timestamps_locais(valores: pd.Series) -> pd.Series:
+    """
+    Converte os horários de um lote para datetime64 sem fuso, no horário
+    local (como o sistema grava). Horários com fuso são convertidos linha a
+    linha para o local; o que não for um horário vira NaT.
+    """
+    try:
+        convertidos = pd.to_datetime(valores, errors="coerce", format="ISO8601")
+    except (TypeError, ValueError):  # fusos diferentes, ou com e sem fuso
+        convertidos = None
+    if convertidos is not None and not isinstance(convertidos.dtype, pd.DatetimeTZDtype):
+        revisar = convertidos.isna() & valores.notna()
+        if not revisar.any():
+            return convertidos
+        convertidos = convertidos.astype(object)
+    else:
+        convertidos = pd.Series(pd.NaT, index=valores.index, dtype=object)
+        revisar = valores.notna()
+
+    for i in valores.index[revisar]:
+        convertidos[i] = _timestamp_local(valores[i])
+    return pd.to_datetime(convertidos)
+
+
+def _timestamp_local(valor) -> pd.Timestamp:
+    if isinstance(valor, str):
+        try:
+            valor = datetime.fromisoformat(valor.strip())
+        except ValueError:
+            return pd.NaT
+    if not isinstance(valor, datetime):
+        return pd.NaT
+    if valor.tzinfo is not None:
+        valor = valor.astimezone().replace(tzinfo=None)
+    return pd.Timestamp(valor)
@@ -0,0 +1,187 @@
+"""
+Checkpoint binário (NumPy .npz) do estado carregado pelo SistemaPonto.
+
+Guarda as colunas da TabelaRegistros, o índice de último evento, os
+funcionários e até que byte do attendance.csv o snapshot cobre. Na carga,
+só as linhas acrescentadas ao CSV depois desse byte precisam ser lidas.
+
+Invalidação:
+- registros: o CSV precisa ser o mesmo arquivo (inode) e ter pelo menos
+  `offset` bytes. Se tamanho, mtime e ctime ainda são os do momento em
+  que o snapshot foi gravado, nada mudou; senão, o CRC32 de todos os
+  bytes até `offset` precisa bater com o gravado (acréscimos no fim não
+  mudam esse trecho). Um CSV truncado, substituído ou editado no meio
+  descarta o snapshot inteiro.
+- funcionários: tamanho e mtime do CSV e do journal precisam bater; se
+  não baterem, só essa parte é ignorada (o repositório é relido).
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.models.funcionario import Funcionario
+from app.models.registro_ponto import RegistroPonto
+from app.repositories.arquivo_base import assinatura, estado_arquivo
+from app.repositories.employee_csv_repository import linhas_para_funcionarios
+from app.services.tabela_registros import TabelaRegistros
+
+FORMATO = 2
+
+_BLOCO_CRC = 1 << 20
+
+
+@dataclass
+class Snapshot:
+    registros: TabelaRegistros
+    ultimos: Dict[str, RegistroPonto]
+    offset: int
+    funcionarios: Optional[List[Funcionario]]
+    journal_size: int
+
+
+def salvar_snapshot(
+    path: Path,
+    registros: TabelaRegistros,
+    attendance_path: Path,
+    offset: int,
+    funcionarios: Sequence[Funcionario],
+    arquivos_funcionarios: Sequence[Path],
+    journal_size: int,
+) -> None:
+    """
+    Grava o snapshot de forma atômica (arquivo temporário + os.replace).
+    Entre processos, quem chama segura a trava dos registros.
+
+    A tabela precisa conter exatamente as linhas do CSV até `offset`.
+    """
+    posicoes = np.full(len(registros.matriculas), -1, dtype=np.int64)
+    for i in registros.ultimo_por_matricula().values():
+        posicoes[registros.codigos_matricula[i]] = i
+
+    meta = {
+        "formato": FORMATO,
+        "offset": offset,
+        "csv": estado_arquivo(attendance_path),
+        "crc_prefixo": _crc_prefixo(attendance_path, offset),
+        "arquivos_funcionarios": _estado_arquivos(arquivos_funcionarios),
+        "journal_size": journal_size,
+    }
+    dados = [f.to_dict() for f in funcionarios]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Temporário único: duas partidas ao mesmo tempo não usam o mesmo
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as arquivo:
+            _gravar_npz(arquivo, meta, registros, posicoes, dados)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _gravar_npz(arquivo, meta: Dict, registros: TabelaRegistros, posicoes: np.ndarray, dados: List[Dict]) -> None:
+    np.savez(
+        arquivo,
+        meta=np.array(json.dumps(meta)),
+        codigos_matricula=registros.codigos_matricula,
+        timestamps=registros.timestamps,
+        tipos=registros.tipos,
+        matriculas=np.array(registros.matriculas, dtype=str),
+        ultimos=posicoes,
+        func_matricula=np.array([d["matricula"] for d in dados], dtype=str),
+        func_nome=np.array([d["nome"] for d in dados], dtype=str),
+        func_idade=np.array([d["idade"] for d in dados], dtype=np.int64),
+        func_turno=np.array([d["turno"] for d in dados], dtype=str),
+    )
+
+
+def carregar_snapshot(
+    path: Path,
+    attendance_path: Path,
+    arquivos_funcionarios: Sequence[Path],
+) -> Optional[Snapshot]:
+    """
+    Lê o snapshot, ou None se ele não existe, é de outro formato ou não
+    corresponde mais ao attendance.csv.
+    """
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as dados:
+            meta = json.loads(str(dados["meta"]))
+            if meta.get("formato") != FORMATO:
+                return None
+            if not _registros_validos(attendance_path, meta):
+                return None
+
+            registros = TabelaRegistros.de_arrays(
+                dados["codigos_matricula"],
+                dados["timestamps"],
+                dados["tipos"],
+                dados["matriculas"].tolist(),
+            )
+            ultimos = {
+                registros.matriculas[codigo]: registros.registro(int(i))
+                for codigo, i in enumerate(dados["ultimos"])
+                if i >= 0
+            }
+
+            funcionarios = None
+            if meta["arquivos_funcionarios"] == _estado_arquivos(arquivos_funcionarios):
+                funcionarios = linhas_para_funcionarios(
+                    zip(
+                        dados["func_matricula"].tolist(),
+                        dados["func_nome"].tolist(),
+                        dados["func_idade"].tolist(),
+                        dados["func_turno"].tolist(),
+                    )
+                )
+    except (OSError, ValueError, KeyError):
+        # Snapshot corrompido/incompleto: volta para a carga completa
+        return None
+
+    return Snapshot(registros, ultimos, meta["offset"], funcionarios, meta["journal_size"])
+
+
+def _registros_validos(attendance_path: Path, meta: Dict) -> bool:
+    estado = estado_arquivo(attendance_path)
+    if estado is None or meta["csv"] is None:
+        return estado == meta["csv"] and meta["offset"] == 0
+    if estado["inode"] != meta["csv"]["inode"] or estado["tamanho"] < meta["offset"]:
+        return False
+    if estado == meta["csv"]:
+        return True  # intocado desde que o snapshot foi gravado
+    return _crc_prefixo(attendance_path, meta["offset"]) == meta["crc_prefixo"]
+
+
+def _crc_prefixo(path: Path, offset: int) -> Optional[int]:
+    """
+    CRC32 dos primeiros `offset` bytes; None se o arquivo é menor.
+    """
+    crc = 0
+    try:
+        with open(path, "rb") as f:
+            restante = offset
+            while restante:
+                bloco = f.read(min(restante, _BLOCO_CRC))
+                if not bloco:
+                    return None
+                crc = zlib.crc32(bloco, crc)
+                restante -= len(bloco)
+    except FileNotFoundError:
+        return None if offset else 0
+    return crc
+
+
+def _estado_arquivos(paths: Sequence[Path]) -> List[Optional[List[int]]]:
+    # Em listas, para comparar com o que volta do JSON
+    return [None if a is None else list(a) for a in assinatura(*paths)]
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from app.models.registro_ponto import RegistroPonto
+from app.models.tipo_registro import TipoRegistro
+from app.sob_demanda import importar_sob_demanda
+
+pd = importar_sob_demanda("pandas")
+
+# Código numérico de cada tipo de evento (posição na tupla)
+TIPOS = tuple(t.value for t in TipoRegistro)
+CODIGO_TIPO: Dict[str, int] = {tipo: i for i, tipo in enumerate(TIPOS)}
+_TIPOS_ENUM = tuple(TipoRegistro)
+
+_CAPACIDADE_INICIAL = 1024
+
+_EPOCA = datetime(1970, 1, 1)
+_MICROSSEGUNDO = timedelta(microseconds=1)
+
+
+class TabelaRegistros:
+    """
+    Armazena os eventos de ponto em colunas (arrays NumPy crescentes).
+
+    - matrícula: código inteiro (int32) + dicionário código -> texto
+    - timestamp: int64 em nanossegundos
+    - tipo: código int8 (ver TIPOS)
+
+    As inserções são O(1) amortizado: a capacidade dobra quando enche.
+    Como a tabela só cresce no final, fatias do prefixo nunca mudam.
+
+    Para consultas por período há um índice temporal (geral e por
+    matrícula) com as posições ordenadas por timestamp. Ele é atualizado
+    sob demanda, só com as linhas acrescentadas desde a última consulta.
+    """
+
+    def __init__(self) -> None:
+        self._tamanho = 0
+        self._codigos_matricula = np.empty(_CAPACIDADE_INICIAL, dtype=np.int32)
+        self._timestamps = np.empty(_CAPACIDADE_INICIAL, dtype=np.int64)
+        self._tipos = np.empty(_CAPACIDADE_INICIAL, dtype=np.int8)
+
+        self._matriculas: List[str] = []
+        self._codigo_por_matricula: Dict[str, int] = {}
+
+        self._indexados = 0
+        self._indice_geral = _IndiceOrdenado()
+        self._indice_matricula: Dict[int, _IndiceOrdenado] = {}
+
+    @classmethod
+    def de_arrays(
+        cls,
+        codigos_matricula: np.ndarray,
+        timestamps: np.ndarray,
+        tipos: np.ndarray,
+        matriculas: List[str],
+    ) -> "TabelaRegistros":
+        """
+        Monta a tabela direto das colunas (ex.: lidas de um snapshot).
+        """
+        tabela = cls()
+        n = len(timestamps)
+        tabela._garantir_capacidade(n)
+        tabela._codigos_matricula[:n] = codigos_matricula
+        tabela._timestamps[:n] = timestamps
+        tabela._tipos[:n] = tipos
+        tabela._tamanho = n
+        for matricula in matriculas:
+            tabela.codigo_matricula(matricula)
+        return tabela
+
+    # ---------- ESCRITA ----------
+
+    def codigo_matricula(self, matricula: str) -> int:
+        """
+        Retorna o código da matrícula, criando um novo se necessário.
+        """
+        codigo = self._codigo_por_matricula.get(matricula)
+        if codigo is None:
+            codigo = len(self._matriculas)
+            self._matriculas.append(matricula)
+            self._codigo_por_matricula[matricula] = codigo
+        return codigo
+
+    def append(self, registro: RegistroPonto) -> int:
+        """
+        Acrescenta um evento e retorna sua posição na tabela.
+        """
+        self._garantir_capacidade(self._tamanho + 1)
+        i = self._tamanho
+        self._codigos_matricula[i] = self.codigo_matricula(registro.matricula)
+        self._timestamps[i] = para_ns(registro.timestamp)
+        self._tipos[i] = _codigo_tipo(registro.tipo)
+        self._tamanho += 1
+        return i
+
+    def extend_frame(self, df: pd.DataFrame) -> None:
+        """
+        Acrescenta em bloco um DataFrame com colunas matricula/timestamp/tipo.
+        """
+        n = len(df)
+        if n == 0:
+            return
+
+        codigos_locais, uniques = pd.factorize(df["matricula"].astype(str))
+        mapa = np.array([self.codigo_matricula(m) for m in uniques], dtype=np.int32)
+
+        tipos = df["tipo"].map(CODIGO_TIPO)
+        if tipos.isna().any():
+            invalido = df.loc[tipos.isna(), "tipo"].iloc[0]
+            raise ValueError(f"Tipo de registro inválido: {invalido!r}.")
+
+        inicio = self._tamanho
+        self._garantir_capacidade(inicio + n)
+        self._codigos_matricula[inicio:inicio + n] = mapa[codigos_locais]
+        self._timestamps[inicio:inicio + n] = (
+            df["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        )
+        self._tipos[inicio:inicio + n] = tipos.to_numpy(dtype=np.int8)
+        self._tamanho += n
+
+    def _garantir_capacidade(self, minimo: int) -> None:
+        capacidade = len(self._timestamps)
+        if minimo <= capacidade:
+            return
+        nova = max(minimo, capacidade * 2)
+        self._codigos_matricula = _crescer(self._codigos_matricula, nova, self._tamanho)
+        self._timestamps = _crescer(self._timestamps, nova, self._tamanho)
+        self._tipos = _crescer(self._tipos, nova, self._tamanho)
+
+    # ---------- LEITURA ----------
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def __iter__(self) -> Iterator[RegistroPonto]:
+        for i in range(self._tamanho):
+            yield self.registro(i)
+
+    @property
+    def codigos_matricula(self) -> np.ndarray:
+        return self._codigos_matricula[: self._tamanho]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[: self._tamanho]
+
+    @property
+    def tipos(self) -> np.ndarray:
+        return self._tipos[: self._tamanho]
+
+    @property
+    def matriculas(self) -> List[str]:
+        """
+        Dicionário de códigos: matriculas[codigo] -> texto.
+        """
+        return self._matriculas
+
+    @property
+    def matriculas_codigo(self) -> Dict[str, int]:
+        """
+        Dicionário inverso: texto -> código.
+        """
+        return self._codigo_por_matricula
+
+    def registro(self, i: int) -> RegistroPonto:
+        """
+        Materializa o evento da posição i como RegistroPonto.
+        """
+        return RegistroPonto(
+            matricula=self._matriculas[self._codigos_matricula[i]],
+            timestamp=_EPOCA + timedelta(microseconds=int(self._timestamps[i]) // 1000),
+            tipo=_TIPOS_ENUM[self._tipos[i]],
+        )
+
+    def ultimo_por_matricula(self, inicio: int = 0) -> Dict[str, int]:
+        """
+        Posição do evento mais recente de cada matrícula, considerando só
+        as posições a partir de `inicio`.
+
+        Em empate de timestamp vence o que foi inserido por último.
+        """
+        n = self._tamanho - inicio
+        if n <= 0:
+            return {}
+        timestamps = self._timestamps[inicio:self._tamanho]
+        codigos = self._codigos_matricula[inicio:self._tamanho]
+        ordem = np.lexsort((np.arange(n), timestamps))
+        posicao_ordenada = np.empty(n, dtype=np.int64)
+        posicao_ordenada[ordem] = np.arange(n)
+        maiores = pd.Series(posicao_ordenada).groupby(codigos).max()
+        return {
+            self._matriculas[codigo]: inicio + int(ordem[pos])
+            for codigo, pos in maiores.items()
+        }
+
+    def posicoes_ordenadas(
+        self,
+        inicio_ns: Optional[int] = None,
+        fim_ns: Optional[int] = None,
+        matricula: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Posições dos eventos com inicio_ns <= timestamp <= fim_ns (limites
+        opcionais), de uma matrícula ou de todas, em ordem cronológica.
+
+        Busca binária no índice temporal: O(log N + k).
+        Em empate de timestamp vale a ordem de inserção.
+        """
+        self._atualizar_indices()
+        if matricula is None:
+            indice = self._indice_geral
+        else:
+            indice = self._indice_matricula.get(self._codigo_por_matricula.get(matricula, -1))
+            if indice is None:
+                return np.empty(0, dtype=np.int64)
+        return indice.faixa(inicio_ns, fim_ns)
+
+    def _atualizar_indices(self) -> None:
+        inicio, fim = self._indexados, self._tamanho
+        if inicio == fim:
+            return
+
+        timestamps = self._timestamps[inicio:fim]
+        ordem = np.argsort(timestamps, kind="stable")
+        posicoes = inicio + ordem
+        timestamps = timestamps[ordem]
+        self._indice_geral.acrescentar(posicoes, timestamps)
+
+        # Agrupa por matrícula mantendo a ordem temporal dentro do grupo
+        codigos = self._codigos_matricula[inicio:fim][ordem]
+        grupos = np.argsort(codigos, kind="stable")
+        cortes = np.flatnonzero(np.diff(codigos[grupos])) + 1
+        for grupo in np.split(grupos, cortes):
+            codigo = int(codigos[grupo[0]])
+            indice = self._indice_matricula.get(codigo)
+            if indice is None:
+                indice = self._indice_matricula[codigo] = _IndiceOrdenado()
+            indice.acrescentar(posicoes[grupo], timestamps[grupo])
+
+        self._indexados = fim
+
+    def to_frame(self, posicoes: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        DataFrame com timestamp em datetime64 e matricula/tipo categóricos.
+
+        Monta as colunas direto dos arrays, sem passar por dicionários
+        nem por texto. Com `posicoes`, só as linhas indicadas (nessa ordem).
+        """
+        codigos, timestamps, tipos = self.codigos_matricula, self.timestamps, self.tipos
+        if posicoes is not None:
+            codigos, timestamps, tipos = codigos[posicoes], timestamps[posicoes], tipos[posicoes]
+        return pd.DataFrame(
+            {
+                "matricula": pd.Categorical.from_codes(
+                    codigos, categories=list(self._matriculas)
+                ),
+                "timestamp": timestamps.view("datetime64[ns]"),
+                "tipo": pd.Categorical.from_codes(tipos, categories=list(TIPOS)),
+            }
+        )
+
+
+class _IndiceOrdenado:
+    """
+    Posições ordenadas por (timestamp, posição), em arrays que dobram de
+    capacidade como os da tabela.
+
+    Blocos que começam depois do último timestamp indexado (o caso comum:
+    batidas de "agora") são só copiados para o final; um bloco retroativo
+    é intercalado com busca binária + np.insert, em tempo linear.
+    """
+
+    __slots__ = ("_posicoes", "_timestamps", "_tamanho")
+
+    def __init__(self) -> None:
+        self._posicoes = np.empty(16, dtype=np.int64)
+        self._timestamps = np.empty(16, dtype=np.int64)
+        self._tamanho = 0
+
+    def acrescentar(self, posicoes: np.ndarray, timestamps: np.ndarray) -> None:
+        """
+        Inclui um bloco já ordenado, de posições maiores que as indexadas.
+        """
+        n = len(posicoes)
+        usados = self._tamanho
+        if usados and timestamps[0] < self._timestamps[usados - 1]:
+            # Empates ficam depois dos já indexados (posições menores)
+            onde = np.searchsorted(self._timestamps[:usados], timestamps, "right")
+            self._posicoes = np.insert(self._posicoes[:usados], onde, posicoes)
+            self._timestamps = np.insert(self._timestamps[:usados], onde, timestamps)
+            self._tamanho = usados + n
+            return
+
+        if usados + n > len(self._posicoes):
+            capacidade = max(usados + n, len(self._posicoes) * 2)
+            self._posicoes = _crescer(self._posicoes, capacidade, usados)
+            self._timestamps = _crescer(self._timestamps, capacidade, usados)
+        self._posicoes[usados:usados + n] = posicoes
+        self._timestamps[usados:usados + n] = timestamps
+        self._tamanho = usados + n
+
+    def faixa(self, inicio_ns: Optional[int], fim_ns: Optional[int]) -> np.ndarray:
+        timestamps = self._timestamps[: self._tamanho]
+        lo = 0 if inicio_ns is None else int(np.searchsorted(timestamps, inicio_ns, "left"))
+        hi = self._tamanho if fim_ns is None else int(np.searchsorted(timestamps, fim_ns, "right"))
+        return self._posicoes[lo:max(lo, hi)]
+
+
+def _codigo_tipo(tipo: TipoRegistro | str) -> int:
+    try:
+        return CODIGO_TIPO[getattr(tipo, "value", tipo)]
+    except KeyError:
+        raise ValueError(f"Tipo de registro inválido: {tipo!r}.")
+
+
+def _crescer(array: np.ndarray, capacidade: int, usados: int) -> np.ndarray:
+    novo = np.empty(capacidade, dtype=array.dtype)
+    novo[:usados] = array[:usados]
+    return novo
+
+
+def para_ns(instante: datetime) -> int:
+    """
+    Converte um datetime/Timestamp para inteiro em nanossegundos.
+    """
+    if type(instante) is datetime and instante.tzinfo is None:
+        # Caminho comum (batida com datetime.now()), sem passar pelo pandas
+        return (instante - _EPOCA) // _MICROSSEGUNDO * 1000
+    return pd.Timestamp(instante).as_unit("ns").value
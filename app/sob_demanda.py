@@ -0,0 +1,33 @@
+"""
+Importação sob demanda de dependências pesadas (pandas, matplotlib).
+
+    pd = importar_sob_demanda("pandas")
+
+`pd` só importa o pandas no primeiro acesso a um atributo (pd.DataFrame,
+pd.read_csv, ...). Assim o CLI e o registro de batidas, que não usam
+DataFrames, não pagam o custo de importação na partida. Anotações de tipo
+com pd.* precisam de `from __future__ import annotations` no módulo.
+"""
+import importlib
+from types import ModuleType
+from typing import Optional
+
+
+class ModuloSobDemanda:
+    def __init__(self, nome: str) -> None:
+        self._nome = nome
+        self._modulo: Optional[ModuleType] = None
+
+    def __getattr__(self, atributo: str):
+        modulo = self._modulo
+        if modulo is None:
+            modulo = self._modulo = importlib.import_module(self._nome)
+        return getattr(modulo, atributo)
+
+    def __repr__(self) -> str:
+        estado = "importado" if self._modulo is not None else "ainda não importado"
+        return f"<módulo {self._nome!r} sob demanda ({estado})>"
+
+
+def importar_sob_demanda(nome: str) -> ModuloSobDemanda:
+    return ModuloSobDemanda(nome)
@@ -0,0 +1,5 @@
+"""
+Benchmarks de desempenho do sistema de ponto.
+
+Cada módulo pode ser executado com ``python -m benchmarks.<nome>``.
+"""
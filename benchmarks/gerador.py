@@ -0,0 +1,127 @@
+"""
+Gerador determinístico de dados sintéticos: employees.csv e attendance.csv
+no formato do sistema, em qualquer escala.
+
+Cada funcionário faz uma jornada por dia (entrada + saída) no horário do
+seu turno; noturnos saem no dia seguinte. Os dias vão sendo preenchidos
+até completar `eventos`, terminando em `fim`. Mesmos parâmetros e semente
+geram sempre os mesmos arquivos. O attendance.csv é escrito em blocos de
+dias, em ordem cronológica, sem montar tudo em memória.
+
+Uso:
+    python -m benchmarks.gerador data_bench --funcionarios 1000 --eventos 5000000
+"""
+import argparse
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+TURNOS = ("Matutino", "Vespertino", "Noturno")
+HORA_ENTRADA = {"Matutino": 7, "Vespertino": 13, "Noturno": 22}
+FIM_PADRAO = date(2025, 12, 31)
+
+_DIAS_POR_BLOCO = 30
+_FORMATO_TIMESTAMP = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def gerar_dados(
+    diretorio: Path | str,
+    funcionarios: int = 1000,
+    eventos: int = 1_000_000,
+    seed: int = 42,
+    fim: date = FIM_PADRAO,
+) -> Dict:
+    """
+    Escreve employees.csv e attendance.csv em `diretorio` e devolve um
+    resumo do que foi gerado (quantidades e período).
+    """
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    matriculas = np.arange(1000, 1000 + funcionarios).astype(str)
+    turnos = rng.choice(TURNOS, size=funcionarios)
+    pd.DataFrame(
+        {
+            "matricula": matriculas,
+            "nome": np.char.add("Funcionário ", matriculas),
+            "idade": rng.integers(18, 66, size=funcionarios),
+            "turno": turnos,
+        }
+    ).to_csv(diretorio / "employees.csv", index=False)
+
+    jornadas = eventos // 2
+    dias = -(-jornadas // funcionarios)  # arredonda para cima
+    # O último dia pode ser parcial: só os primeiros `no_ultimo_dia` trabalham
+    no_ultimo_dia = jornadas - (dias - 1) * funcionarios
+    primeiro_dia = np.datetime64(fim, "D") - (dias - 1)
+    hora_entrada = np.array([HORA_ENTRADA[t] for t in turnos]).astype("timedelta64[h]")
+
+    destino = diretorio / "attendance.csv"
+    pd.DataFrame(columns=["matricula", "timestamp", "tipo"]).to_csv(destino, index=False)
+    sobra = None  # saídas do bloco anterior que caem depois do seu último dia
+    for inicio in range(0, dias, _DIAS_POR_BLOCO):
+        bloco = np.arange(inicio, min(inicio + _DIAS_POR_BLOCO, dias))
+        quem = np.tile(np.arange(funcionarios), len(bloco))
+        dia = np.repeat(bloco, funcionarios)
+        if bloco[-1] == dias - 1:
+            manter = (dia < dias - 1) | (quem < no_ultimo_dia)
+            quem, dia = quem[manter], dia[manter]
+
+        entradas = (
+            (primeiro_dia + dia).astype("datetime64[us]")
+            + hora_entrada[quem]
+            + rng.integers(0, 15 * 60 * 10**6, size=dia.size).astype("timedelta64[us]")
+        )
+        saidas = entradas + rng.integers(7 * 3600 * 10**6, 9 * 3600 * 10**6, size=dia.size).astype(
+            "timedelta64[us]"
+        )
+        df = pd.DataFrame(
+            {
+                "matricula": np.repeat(matriculas[quem], 2),
+                "timestamp": np.column_stack([entradas, saidas]).ravel(),
+                "tipo": np.tile(["entrada", "saida"], dia.size),
+            }
+        )
+        if sobra is not None:
+            df = pd.concat([sobra, df], ignore_index=True)
+        df = df.sort_values("timestamp", kind="stable")
+
+        corte = (primeiro_dia + bloco[-1] + 1).astype("datetime64[us]")
+        ultimo = bloco[-1] == dias - 1
+        pronto = df if ultimo else df[df["timestamp"] < corte]
+        sobra = None if ultimo else df[df["timestamp"] >= corte]
+        pronto.to_csv(destino, mode="a", header=False, index=False, date_format=_FORMATO_TIMESTAMP)
+
+    return {
+        "funcionarios": funcionarios,
+        "eventos": 2 * jornadas,
+        "seed": seed,
+        "inicio": str(primeiro_dia),
+        "fim": str(fim),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("diretorio", type=Path)
+    parser.add_argument("--funcionarios", type=int, default=1000)
+    parser.add_argument("--eventos", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fim", type=date.fromisoformat, default=FIM_PADRAO, help="último dia (AAAA-MM-DD)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resumo = gerar_dados(args.diretorio, args.funcionarios, args.eventos, args.seed, args.fim)
+    print(
+        f"{resumo['funcionarios']} funcionários, {resumo['eventos']} eventos "
+        f"({resumo['inicio']} a {resumo['fim']}) em {time.perf_counter() - inicio:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Tempo de SistemaPonto.horas_trabalhadas para um ano de batidas.
+
+Uso:
+    python -m benchmarks.horas_trabalhadas --funcionarios 2000 --dias 365
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.repositories.attendance_csv_repository import AttendanceCSVRepository
+from app.repositories.employee_csv_repository import EmployeeCSVRepository
+from app.services.sistema_ponto import SistemaPonto
+from benchmarks.gerador import gerar_dados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--funcionarios", type=int, default=2000)
+    parser.add_argument("--dias", type=int, default=365)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        diretorio = Path(tmp)
+        gerar_dados(diretorio, args.funcionarios, eventos=2 * args.funcionarios * args.dias)
+        sistema = SistemaPonto(
+            EmployeeCSVRepository(diretorio / "employees.csv"),
+            AttendanceCSVRepository(diretorio / "attendance.csv"),
+        )
+
+        print(f"eventos:           {len(sistema._registros)}")
+        for periodo in ("dia", "semana", "mes", None):
+            inicio = time.perf_counter()
+            resultado = sistema.horas_trabalhadas(periodo=periodo)
+            decorrido = time.perf_counter() - inicio
+            print(f"periodo={str(periodo):7s}    {decorrido * 1000:7.0f} ms  ({len(resultado)} linhas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Custo de importação e de partida do CLI/quiosque.
+
+Para cada módulo, roda `python -X importtime -c "import <módulo>"` num
+processo novo e mostra o tempo total, as dependências mais pesadas e se
+pandas/matplotlib foram importados. Depois mede, também em processo novo,
+a partida do SistemaPonto + uma batida sobre dados gerados.
+
+Uso:
+    python -m benchmarks.importacao
+    python -m benchmarks.importacao --modulos app.server --top 5
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+from benchmarks.gerador import gerar_dados
+
+MODULOS = ["app.cli.interface_terminal", "app.services.sistema_ponto", "app.server"]
+PESADOS = ("pandas", "matplotlib")
+
+_PARTIDA = """
+import sys, time
+inicio = time.perf_counter()
+from app.repositories import AttendanceCSVRepository, EmployeeCSVRepository
+from app.services.sistema_ponto import SistemaPonto
+d = {diretorio!r}
+sistema = SistemaPonto(EmployeeCSVRepository(d + "/employees.csv"), AttendanceCSVRepository(d + "/attendance.csv"))
+partida = time.perf_counter() - inicio
+ultimo = sistema.ultimo_evento("1000")
+if ultimo is not None and ultimo.tipo.value == "entrada":
+    sistema.registrar_saida("1000")
+else:
+    sistema.registrar_entrada("1000")
+batida = time.perf_counter() - inicio - partida
+print(partida, batida, *[m in sys.modules for m in {pesados!r}])
+sistema.close()
+"""
+
+
+def importtime(modulo: str) -> Tuple[float, List[Tuple[float, str]]]:
+    """
+    (total em ms, [(ms acumulado, dependência), ...]) de importar `modulo`.
+    """
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    tempos = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, nome = linha.split("|")
+        tempos.append((int(acumulado) / 1000, nome.strip()))
+    total = next(ms for ms, nome in reversed(tempos) if nome == modulo)
+    return total, tempos
+
+
+def partida(diretorio: Path) -> List[str]:
+    codigo = _PARTIDA.format(diretorio=str(diretorio), pesados=PESADOS)
+    return subprocess.run(
+        [sys.executable, "-c", codigo], capture_output=True, text=True, check=True
+    ).stdout.split()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modulos", nargs="+", default=MODULOS)
+    parser.add_argument("--top", type=int, default=8, help="dependências mais pesadas a mostrar")
+    parser.add_argument("--funcionarios", type=int, default=200)
+    parser.add_argument("--dias", type=int, default=30)
+    args = parser.parse_args()
+
+    for modulo in args.modulos:
+        total, tempos = importtime(modulo)
+        carregados = {nome.split(".")[0] for _, nome in tempos}
+        pesados = ", ".join(p for p in PESADOS if p in carregados) or "nenhum"
+        print(f"\n{modulo}: {total:8.1f} ms  (pesados importados: {pesados})")
+        topo = [t for t in tempos if "." not in t[1] and t[1] != modulo]
+        for ms, nome in sorted(topo, reverse=True)[: args.top]:
+            print(f"    {ms:8.1f} ms  {nome}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gerar_dados(tmp, args.funcionarios, eventos=2 * args.funcionarios * args.dias)
+        print(f"\npartida + 1 batida ({args.funcionarios} funcionários, {args.dias} dias):")
+        for rodada in ("primeira (monta resumos)", "seguinte"):
+            tempo_partida, tempo_batida, *flags = partida(Path(tmp))
+            pesados = ", ".join(p for p, f in zip(PESADOS, flags) if f == "True") or "nenhum"
+            print(
+                f"    {rodada:26s} partida {float(tempo_partida) * 1000:7.1f} ms"
+                f"  batida {float(tempo_batida) * 1000:6.2f} ms  pesados: {pesados}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Tempo de inicialização do SistemaPonto: carga completa do CSV x snapshot
+binário + final do CSV.
+
+Uso:
+    python -m benchmarks.inicializacao --funcionarios 2000 --dias 365 --cauda 1000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.repositories.attendance_csv_repository import AttendanceCSVRepository
+from app.repositories.employee_csv_repository import EmployeeCSVRepository
+from app.services.sistema_ponto import SistemaPonto
+from benchmarks.gerador import gerar_dados
+
+
+def _iniciar(diretorio: Path) -> float:
+    inicio = time.perf_counter()
+    sistema = SistemaPonto(
+        EmployeeCSVRepository(diretorio / "employees.csv"),
+        AttendanceCSVRepository(diretorio / "attendance.csv"),
+    )
+    decorrido = time.perf_counter() - inicio
+    sistema.close()
+    return decorrido
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--funcionarios", type=int, default=2000)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--cauda", type=int, default=1000, help="linhas acrescentadas depois do snapshot")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        diretorio = Path(tmp)
+        gerar_dados(diretorio, args.funcionarios, eventos=2 * args.funcionarios * args.dias)
+        snapshot = diretorio / "attendance.snapshot.npz"
+
+        print(f"primeira carga (resumos + snapshot): {_iniciar(diretorio) * 1000:8.0f} ms")
+        print(f"snapshot:                            {_iniciar(diretorio) * 1000:8.0f} ms")
+
+        # Batidas acrescentadas depois do snapshot (pelo próprio sistema,
+        # para os resumos diários continuarem em dia)
+        sistema = SistemaPonto(
+            EmployeeCSVRepository(diretorio / "employees.csv"),
+            AttendanceCSVRepository(diretorio / "attendance.csv"),
+        )
+        instantes = pd.date_range("2030-01-01", periods=args.cauda, freq="min")
+        sistema.registrar_eventos_lote(
+            pd.DataFrame(
+                {
+                    "matricula": "1000",
+                    "timestamp": instantes,
+                    "tipo": np.tile(["entrada", "saida"], args.cauda)[: args.cauda],
+                }
+            )
+        )
+        sistema.close()
+        print(f"snapshot + {args.cauda:6d} linhas do CSV:   {_iniciar(diretorio) * 1000:8.0f} ms")
+
+        snapshot.unlink()
+        print(f"sem snapshot:                        {_iniciar(diretorio) * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
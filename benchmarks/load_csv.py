@@ -0,0 +1,60 @@
+"""
+Compara a carga antiga (iterrows) com a carga colunar do AttendanceCSVRepository.
+
+Uso:
+    python -m benchmarks.load_csv --linhas 2000000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from app.models.registro_ponto import RegistroPonto
+from app.repositories.attendance_csv_repository import AttendanceCSVRepository
+from benchmarks.gerador import gerar_dados
+
+
+def carga_iterrows(path: Path):
+    """Caminho de carga original, mantido só como referência."""
+    df = pd.read_csv(path, dtype={"matricula": str, "tipo": str})
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return [
+        RegistroPonto(
+            matricula=str(row["matricula"]),
+            timestamp=row["timestamp"],
+            tipo=str(row["tipo"]),
+        )
+        for _, row in df.iterrows()
+    ]
+
+
+def cronometrar(func, *args) -> float:
+    inicio = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - inicio
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--linhas", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gerar_dados(tmp, eventos=args.linhas)
+        path = Path(tmp) / "attendance.csv"
+        repo = AttendanceCSVRepository(path)
+
+        t_antigo = cronometrar(carga_iterrows, path)
+        t_frame = cronometrar(repo.load_frame)
+        t_novo = cronometrar(repo.load_all)
+
+    print(f"linhas:            {args.linhas}")
+    print(f"iterrows:          {t_antigo:.2f} s")
+    print(f"load_all (zip):    {t_novo:.2f} s  ({t_antigo / t_novo:.1f}x)")
+    print(f"load_frame:        {t_frame:.2f} s  ({t_antigo / t_frame:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Memória por evento: RegistroPonto antigo (dataclass com __dict__, tipo em
+texto, matrícula sem internar) contra o atual (slots, frozen, TipoRegistro,
+matrícula internada).
+
+Uso:
+    python -m benchmarks.memoria_modelos --eventos 500000
+"""
+import argparse
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from app.models.registro_ponto import RegistroPonto
+
+
+@dataclass
+class RegistroPontoAntigo:
+    """Modelo original, mantido só como referência."""
+    matricula: str
+    timestamp: datetime
+    tipo: str
+
+
+def medir(fabrica, eventos: int, funcionarios: int) -> float:
+    """Bytes alocados por evento para construir `eventos` objetos."""
+    inicio = datetime(2025, 1, 1)
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    objetos = [
+        # str(...) a cada linha simula o texto vindo do CSV (uma string por linha)
+        fabrica(
+            str(1000 + i % funcionarios),
+            inicio + timedelta(seconds=i),
+            "entrada" if i % 2 == 0 else "saida",
+        )
+        for i in range(eventos)
+    ]
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objetos
+    return (atual - base) / eventos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--eventos", type=int, default=500_000)
+    parser.add_argument("--funcionarios", type=int, default=1000)
+    args = parser.parse_args()
+
+    antigo = medir(RegistroPontoAntigo, args.eventos, args.funcionarios)
+    novo = medir(RegistroPonto, args.eventos, args.funcionarios)
+
+    print(f"eventos:           {args.eventos}")
+    print(f"antigo:            {antigo:.0f} bytes/evento")
+    print(f"slots + intern:    {novo:.0f} bytes/evento  ({antigo / novo:.2f}x menor)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Carga no servidor de batidas (app.server): vazão sustentada e latência.
+
+Cada conexão cuida de um grupo próprio de matrículas e alterna
+ENTRADA/SAIDA em cada uma, com até `--pipeline` pedidos em voo. Sem
+`--porta`, sobe um servidor local numa pasta temporária com
+`--funcionarios` cadastrados.
+
+Uso:
+    python -m benchmarks.servidor_ponto --conexoes 50 --duracao 10
+    python -m benchmarks.servidor_ponto --porta 8765 --primeira-matricula 1000 --funcionarios 500
+"""
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from benchmarks.gerador import gerar_dados
+
+
+async def _conexao(
+    host: str, porta: int, matriculas: List[str], pipeline: int, fim: float
+) -> Tuple[List[float], int]:
+    reader, writer = await asyncio.open_connection(host, porta)
+    latencias: List[float] = []
+    erros = 0
+    enviados: asyncio.Queue = asyncio.Queue(maxsize=pipeline)
+
+    async def enviar() -> None:
+        comandos = ("ENTRADA", "SAIDA")
+        rodada = 0
+        while time.perf_counter() < fim:
+            for m in matriculas:
+                await enviados.put(time.perf_counter())
+                writer.write(f"{comandos[rodada % 2]} {m}\n".encode())
+                await writer.drain()
+            rodada += 1
+        await enviados.put(None)
+
+    async def receber() -> None:
+        nonlocal erros
+        while (inicio := await enviados.get()) is not None:
+            resposta = await reader.readline()
+            latencias.append(time.perf_counter() - inicio)
+            if not resposta.startswith(b"OK"):
+                erros += 1
+
+    await asyncio.gather(enviar(), receber())
+    writer.close()
+    return latencias, erros
+
+
+async def carga(
+    host: str, porta: int, matriculas: List[str], conexoes: int, pipeline: int, duracao: float
+) -> None:
+    fim = time.perf_counter() + duracao
+    grupos = [matriculas[i::conexoes] for i in range(conexoes)]
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(
+        *(_conexao(host, porta, g, pipeline, fim) for g in grupos if g)
+    )
+    decorrido = time.perf_counter() - inicio
+
+    latencias = np.concatenate([np.asarray(l) for l, _ in resultados]) * 1000
+    erros = sum(e for _, e in resultados)
+    print(f"batidas:       {latencias.size} ({erros} com erro) em {decorrido:.1f} s")
+    print(f"vazão:         {latencias.size / decorrido:10.0f} batidas/s")
+    print(f"latência p50:  {np.percentile(latencias, 50):10.2f} ms")
+    print(f"latência p99:  {np.percentile(latencias, 99):10.2f} ms")
+    print(f"latência máx.: {latencias.max():10.2f} ms")
+
+
+async def _esperar_servidor(host: str, porta: int, processo: subprocess.Popen) -> None:
+    while True:
+        if processo.poll() is not None:
+            raise RuntimeError("O servidor terminou antes de aceitar conexões.")
+        try:
+            _, writer = await asyncio.open_connection(host, porta)
+        except OSError:
+            await asyncio.sleep(0.1)
+        else:
+            writer.close()
+            return
+
+
+def _porta_livre(host: str) -> int:
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, help="servidor já rodando (sem ela, sobe um local)")
+    parser.add_argument("--funcionarios", type=int, default=1000)
+    parser.add_argument("--primeira-matricula", type=int, default=1000)
+    parser.add_argument("--conexoes", type=int, default=50)
+    parser.add_argument("--pipeline", type=int, default=1, help="pedidos em voo por conexão")
+    parser.add_argument("--duracao", type=float, default=10.0, help="segundos")
+    args = parser.parse_args()
+
+    matriculas = [str(args.primeira_matricula + i) for i in range(args.funcionarios)]
+    if args.porta is not None:
+        asyncio.run(carga(args.host, args.porta, matriculas, args.conexoes, args.pipeline, args.duracao))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        diretorio = Path(tmp)
+        gerar_dados(diretorio, args.funcionarios, eventos=2 * args.funcionarios * 30)
+        porta = _porta_livre(args.host)
+        processo = subprocess.Popen(
+            [sys.executable, "-m", "app.server", "--host", args.host, "--porta", str(porta), "--dados", tmp],
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            asyncio.run(_esperar_servidor(args.host, porta, processo))
+            asyncio.run(carga(args.host, porta, matriculas, args.conexoes, args.pipeline, args.duracao))
+        finally:
+            processo.terminate()
+            processo.wait()
+
+
+if __name__ == "__main__":
+    main()
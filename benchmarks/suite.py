@@ -0,0 +1,197 @@
+"""
+Suíte de desempenho dos caminhos principais, sobre dados do gerador.
+
+Mede a inicialização do SistemaPonto (primeira, que monta resumos e
+snapshot, e as seguintes), registrar_entrada/registrar_saida,
+dataframe_registros, o filtro da tela de consulta do Streamlit e os dois
+gráficos (desenho e cache). O resultado sai em JSON para comparar commits:
+
+    python -m benchmarks.suite --funcionarios 1000 --eventos 5000000 --saida base.json
+    (muda o código)
+    python -m benchmarks.suite --funcionarios 1000 --eventos 5000000 --comparar base.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from app.config import RESUMO_DIARIO_ARQUIVO, RESUMO_TURNO_ARQUIVO
+from app.repositories import AttendanceCSVRepository, EmployeeCSVRepository
+from app.services import filtros
+from app.services.sistema_ponto import SistemaPonto
+from benchmarks.gerador import FIM_PADRAO, gerar_dados
+
+# Quanto mais lento que a base um resultado pode ficar sem ser destacado
+TOLERANCIA_PADRAO = 0.2
+
+
+def _sistema(diretorio: Path) -> SistemaPonto:
+    return SistemaPonto(
+        EmployeeCSVRepository(diretorio / "employees.csv"),
+        AttendanceCSVRepository(diretorio / "attendance.csv"),
+    )
+
+
+def _repetir(funcao: Callable[[], object], repeticoes: int) -> Dict:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return _estatisticas(tempos)
+
+
+def _estatisticas(tempos: List[float]) -> Dict:
+    ordenados = sorted(tempos)
+    return {
+        "segundos": statistics.median(ordenados),
+        "min": ordenados[0],
+        "p99": ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.99))],
+        "repeticoes": len(ordenados),
+    }
+
+
+def executar(diretorio: Path, repeticoes: int, batidas: int, fim_dados: date) -> Dict[str, Dict]:
+    resultados: Dict[str, Dict] = {}
+
+    # Primeira carga: sem resumos nem snapshot gravados
+    derivados = (
+        RESUMO_DIARIO_ARQUIVO,
+        RESUMO_TURNO_ARQUIVO,
+        Path(RESUMO_DIARIO_ARQUIVO).with_suffix(".meta.json").name,
+        "attendance.snapshot.npz",
+    )
+    for nome in derivados:
+        (diretorio / nome).unlink(missing_ok=True)
+    inicio = time.perf_counter()
+    _sistema(diretorio).close()
+    resultados["init_primeira"] = _estatisticas([time.perf_counter() - inicio])
+    resultados["init"] = _repetir(lambda: _sistema(diretorio).close(), repeticoes)
+
+    sistema = _sistema(diretorio)
+    matriculas = [f.matricula for f in sistema.listar_funcionarios()][:batidas]
+    for nome, registrar in (("registrar_entrada", sistema.registrar_entrada), ("registrar_saida", sistema.registrar_saida)):
+        tempos = []
+        for m in matriculas:
+            inicio = time.perf_counter()
+            registrar(m)
+            tempos.append(time.perf_counter() - inicio)
+        resultados[nome] = _estatisticas(tempos)
+    sistema.flush()
+
+    resultados["dataframe_registros"] = _repetir(sistema.dataframe_registros, repeticoes)
+
+    # Tela de consulta: período inteiro (padrão da tela) e 30 dias
+    # terminando no fim dos dados
+    resultados["filtro_todos_periodo_inteiro"] = _repetir(
+        lambda: filtros.filtrar_registros(sistema, filtros.TODOS, *filtros.intervalo_dos_dados(sistema)),
+        repeticoes,
+    )
+    intervalo = filtros.intervalo_padrao(hoje=fim_dados)
+    resultados["filtro_todos_30_dias"] = _repetir(
+        lambda: filtros.filtrar_registros(sistema, filtros.opcoes_funcionario(sistema)[0], *intervalo),
+        repeticoes,
+    )
+    resultados["filtro_funcionario_30_dias"] = _repetir(
+        lambda: filtros.filtrar_registros(sistema, matriculas[0], *intervalo), repeticoes
+    )
+
+    for nome, grafico in (
+        ("grafico_barras_por_idade", sistema.grafico_barras_por_idade),
+        ("grafico_pizza_por_turno", sistema.grafico_pizza_por_turno),
+    ):
+        destino = diretorio / f"{nome}.png"
+        inicio = time.perf_counter()
+        grafico(show=False, save_path=destino)
+        resultados[nome] = _estatisticas([time.perf_counter() - inicio])
+        resultados[f"{nome}_cache"] = _repetir(
+            lambda: grafico(show=False, save_path=destino), repeticoes
+        )
+
+    sistema.close()
+    return resultados
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual: Dict[str, Dict], base: Dict[str, Dict], tolerancia: float) -> List[str]:
+    """
+    Imprime a razão atual/base por medida e devolve as que pioraram além
+    da tolerância.
+    """
+    piores = []
+    print(f"\n{'medida':34s} {'base':>12s} {'atual':>12s} {'razão':>7s}")
+    for nome, medida in atual.items():
+        if nome not in base:
+            continue
+        antes, agora = base[nome]["segundos"], medida["segundos"]
+        razao = agora / antes if antes else float("inf")
+        marca = "  <-- mais lento" if razao > 1 + tolerancia else ""
+        print(f"{nome:34s} {antes * 1000:10.3f}ms {agora * 1000:10.3f}ms {razao:6.2f}x{marca}")
+        if marca:
+            piores.append(nome)
+    return piores
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--funcionarios", type=int, default=1000)
+    parser.add_argument("--eventos", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--batidas", type=int, default=500, help="funcionários que batem entrada e saída")
+    parser.add_argument("--dados", type=Path, help="pasta onde gerar os dados, sobrescrita (padrão: temporária)")
+    parser.add_argument("--saida", type=Path, help="grava o resultado em JSON")
+    parser.add_argument("--comparar", type=Path, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        diretorio = args.dados or Path(tmp)
+        inicio = time.perf_counter()
+        dados = gerar_dados(diretorio, args.funcionarios, args.eventos, args.seed, FIM_PADRAO)
+        print(f"dados gerados em {time.perf_counter() - inicio:.1f} s: {dados}")
+        resultados = executar(diretorio, args.repeticoes, args.batidas, FIM_PADRAO)
+
+    saida = {
+        "commit": _commit(),
+        "quando": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "dados": dados,
+        "resultados": resultados,
+    }
+    print()
+    for nome, medida in resultados.items():
+        print(f"{nome:34s} {medida['segundos'] * 1000:10.3f} ms  (p99 {medida['p99'] * 1000:.3f} ms, n={medida['repeticoes']})")
+    if args.saida:
+        args.saida.write_text(json.dumps(saida, indent=2, ensure_ascii=False))
+
+    if args.comparar:
+        base = json.loads(args.comparar.read_text())
+        if base.get("dados") != dados:
+            print("\naviso: a base foi medida com outros dados/escala")
+        if comparar(resultados, base["resultados"], args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
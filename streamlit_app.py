@@ -1,10 +1,47 @@
+import tempfile
+import threading
+from datetime import date, timedelta
+from typing import Dict
+
+import matplotlib
 import streamlit as st
-import pandas as pd
 
+# Servidor sem tela: gráficos sempre pelo backend não interativo
+matplotlib.use("Agg")
+
+from app import metricas
+from app.config import GRAFICO_IDADE, GRAFICO_TURNO
+from app.services import filtros
 from app.services.sistema_ponto import SistemaPonto
 from app.models.turno import Turno
 from app.models.usuario import Usuario, PapelUsuario
 
+TIPOS_EXPORTACAO = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+@st.cache_resource
+def _cache_sistema() -> Dict:
+    """
+    Um único SistemaPonto por processo, compartilhado por todas as sessões
+    (e por todos os reruns): batidas de uma sessão aparecem nas outras
+    sem recarregar nada.
+    """
+    return {"sistema": SistemaPonto(), "lock": threading.Lock()}
+
+
+def obter_sistema() -> SistemaPonto:
+    """
+    Devolve a instância compartilhada, já com o que outro processo
+    (ex.: o CLI) tenha gravado: só as linhas novas do CSV são lidas.
+    """
+    cache = _cache_sistema()
+    with cache["lock"]:
+        cache["sistema"].sincronizar()
+        return cache["sistema"]
+
 
 def pagina_admin(sistema: SistemaPonto, menu: str) -> None:
     # ---------- ADMIN: REGISTRAR DADOS DO FUNCIONÁRIO ----------
@@ -37,6 +74,23 @@ def pagina_admin(sistema: SistemaPonto, menu: str) -> None:
                     except Exception as e:
                         st.error(str(e))
 
+    # ---------- ADMIN: IMPORTAR FUNCIONÁRIOS ----------
+    elif menu == "Importar funcionários":
+        st.subheader("Importar funcionários em massa")
+        st.caption("Arquivo CSV ou Excel com as colunas: matricula, nome, idade, turno.")
+        arquivo = st.file_uploader("Arquivo", type=["csv", "xlsx", "xls"])
+
+        if arquivo is not None and st.button("Importar"):
+            try:
+                rejeitados = sistema.importar_funcionarios(arquivo)
+                if rejeitados.empty:
+                    st.success("Todos os funcionários foram importados!")
+                else:
+                    st.warning(f"{len(rejeitados)} linha(s) rejeitada(s):")
+                    st.dataframe(rejeitados)
+            except Exception as e:
+                st.error(str(e))
+
     # ---------- ADMIN: EDITAR DADOS DO FUNCIONÁRIO ----------
     elif menu == "Editar dados do funcionário":
         st.subheader("Editar dados do funcionário")
@@ -81,7 +135,6 @@ def pagina_admin(sistema: SistemaPonto, menu: str) -> None:
     elif menu == "Consultar dados do funcionário":
         st.subheader("Consulta de dados do funcionário")
         df_func = sistema.dataframe_funcionarios()
-        df_reg = sistema.dataframe_registros()
 
         if df_func.empty:
             st.info("Nenhum funcionário cadastrado.")
@@ -89,62 +142,47 @@ def pagina_admin(sistema: SistemaPonto, menu: str) -> None:
             st.markdown("### Lista de funcionários")
             st.dataframe(df_func)
 
-            if not df_reg.empty:
-                st.markdown("### Detalhes de um funcionário")
-                opcoes = {
-                    f"{row['matricula']} - {row['nome']}": str(row["matricula"])
-                    for _, row in df_func.iterrows()
-                }
-                chave = st.selectbox("Selecione o funcionário", list(opcoes.keys()))
-                matricula_sel = opcoes[chave]
-
-                dados = df_func[df_func["matricula"] == matricula_sel]
-                historico = (
-                    df_reg[df_reg["matricula"] == matricula_sel]
-                    .sort_values("timestamp")
-                )
+            st.markdown("### Detalhes de um funcionário")
+            opcoes = {
+                f"{m} - {n}": str(m)
+                for m, n in zip(df_func["matricula"], df_func["nome"])
+            }
+            chave = st.selectbox("Selecione o funcionário", list(opcoes.keys()))
+            matricula_sel = opcoes[chave]
 
-                st.markdown("#### Dados cadastrais")
-                st.dataframe(dados)
+            dados = df_func[df_func["matricula"] == matricula_sel]
+            st.markdown("#### Dados cadastrais")
+            st.dataframe(dados)
 
+            # Busca no índice por matrícula, sem varrer todos os registros
+            historico = sistema.consultar_registros(matricula=matricula_sel)
+            if historico.empty:
+                st.info("Ainda não há registros de ponto para este funcionário.")
+            else:
                 st.markdown("#### Histórico de ponto")
                 st.dataframe(historico)
-            else:
-                st.info("Ainda não há registros de ponto.")
 
     # ---------- ADMIN: CONSULTAR HORÁRIOS DE ENTRADA E SAÍDA ----------
     elif menu == "Consultar horários de entrada e saída":
         st.subheader("Registros de Ponto")
-        df = sistema.dataframe_registros()
-        if df.empty:
-            st.info("Nenhum registro encontrado.")
-        else:
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-
-            st.markdown("### Filtros")
-
-            funcionarios = sorted(df["matricula"].unique())
-            matricula_filtro = st.selectbox(
-                "Filtrar por funcionário (opcional)",
-                ["Todos"] + funcionarios,
-            )
+        st.markdown("### Filtros")
 
-            data_min = df["timestamp"].dt.date.min()
-            data_max = df["timestamp"].dt.date.max()
-            data_inicio, data_fim = st.date_input(
-                "Intervalo de datas",
-                (data_min, data_max),
-            )
+        matricula_filtro = st.selectbox(
+            "Filtrar por funcionário (opcional)",
+            filtros.opcoes_funcionario(sistema),
+        )
 
-            filtrado = df.copy()
-            if matricula_filtro != "Todos":
-                filtrado = filtrado[filtrado["matricula"] == matricula_filtro]
+        # Padrão: do primeiro ao último dia com registros
+        data_inicio, data_fim = st.date_input(
+            "Intervalo de datas",
+            filtros.intervalo_dos_dados(sistema),
+        )
 
-            filtrado = filtrado[
-                (filtrado["timestamp"].dt.date >= data_inicio)
-                & (filtrado["timestamp"].dt.date <= data_fim)
-            ].sort_values("timestamp", ascending=False)
+        filtrado = filtros.filtrar_registros(sistema, matricula_filtro, data_inicio, data_fim)
 
+        if filtrado.empty:
+            st.info("Nenhum registro encontrado.")
+        else:
             st.markdown("### Registros filtrados")
             st.dataframe(filtrado)
 
@@ -158,12 +196,13 @@ def pagina_admin(sistema: SistemaPonto, menu: str) -> None:
             col1, col2 = st.columns(2)
 
             with col1:
-                st.markdown("**Funcionários ordenados por idade**")
+                st.markdown("**Funcionários por idade**")
+                # O PNG só é regravado quando os funcionários mudam
                 fig_idade = sistema.grafico_barras_por_idade(show=False)
                 if fig_idade is None:
                     st.info("Sem dados para o gráfico.")
                 else:
-                    st.pyplot(fig_idade)
+                    st.image(str(GRAFICO_IDADE))
 
             with col2:
                 st.markdown("**Funcionários por turno**")
@@ -171,7 +210,80 @@ def pagina_admin(sistema: SistemaPonto, menu: str) -> None:
                 if fig_turno is None:
                     st.info("Sem dados para o gráfico.")
                 else:
-                    st.pyplot(fig_turno)
+                    st.image(str(GRAFICO_TURNO))
+
+            st.markdown("**Resumo diário por turno (últimos 30 dias)**")
+            hoje = date.today()
+            resumo = sistema.resumo_diario(hoje - timedelta(days=30), hoje, por="turno")
+            if resumo.empty:
+                st.info("Ainda não há registros de ponto.")
+            else:
+                st.dataframe(resumo.iloc[::-1])
+
+        st.markdown("### Exportar registros de ponto")
+        col1, col2 = st.columns(2)
+        with col1:
+            formato = st.selectbox("Formato", ["xlsx", "csv"])
+            exp_inicio, exp_fim = st.date_input(
+                "Período",
+                filtros.intervalo_padrao(),
+                key="exportar_periodo",
+            )
+        with col2:
+            exp_matriculas = st.multiselect(
+                "Funcionários (vazio = todos)",
+                filtros.opcoes_funcionario(sistema)[1:],
+            )
+            abas = {"Uma aba só": None, "Uma aba por funcionário": "funcionario", "Uma aba por mês": "mes"}
+            por = abas[st.selectbox("Abas (xlsx)", list(abas), disabled=formato != "xlsx")]
+
+        if st.button("Gerar arquivo"):
+            # Arquivo temporário só desta exportação (apagado ao sair do
+            # bloco): o export é escrito nele por blocos e o download
+            # recebe o arquivo aberto
+            with tempfile.NamedTemporaryFile(suffix=f".{formato}") as arquivo:
+                linhas = sistema.exportar(
+                    formato,
+                    exp_inicio,
+                    exp_fim,
+                    exp_matriculas or None,
+                    destino=arquivo,
+                    por=por if formato == "xlsx" else None,
+                )
+                arquivo.seek(0)
+                st.success(f"{linhas} registro(s) exportado(s).")
+                st.download_button(
+                    "Baixar arquivo",
+                    arquivo,
+                    file_name=f"registros_{exp_inicio}_{exp_fim}.{formato}",
+                    mime=TIPOS_EXPORTACAO[formato],
+                )
+
+    # ---------- ADMIN: DESEMPENHO ----------
+    elif menu == "Desempenho":
+        st.subheader("Desempenho por operação")
+        # Vale para o processo todo (todas as sessões), até ser desligado
+        ligado = st.toggle("Medir operações", value=metricas.ativo())
+        if ligado != metricas.ativo():
+            metricas.ativar(ligado)
+        if st.button("Zerar métricas"):
+            metricas.zerar()
+
+        df_metricas = metricas.frame()
+        if df_metricas.empty:
+            if ligado:
+                st.info("Nenhuma operação medida ainda.")
+            else:
+                st.info("Métricas desligadas (METRICAS_ATIVAS em app/config.py).")
+        else:
+            st.dataframe(df_metricas.round(3), hide_index=True)
+
+            operacao = st.selectbox("Histograma de latência", df_metricas["operacao"])
+            faixas = metricas.instantaneo()[operacao]["faixas_us"]
+            st.dataframe(
+                [{"até (µs)": limite, "chamadas": n} for limite, n in faixas.items() if n],
+                hide_index=True,
+            )
 
 
 def pagina_funcionario(sistema: SistemaPonto, usuario: Usuario, menu: str) -> None:
@@ -211,7 +323,6 @@ def pagina_funcionario(sistema: SistemaPonto, usuario: Usuario, menu: str) -> No
         st.subheader("Meus dados e histórico de ponto")
 
         df_func = sistema.dataframe_funcionarios()
-        df_reg = sistema.dataframe_registros()
 
         dados = df_func[df_func["matricula"] == matricula]
         if dados.empty:
@@ -221,11 +332,10 @@ def pagina_funcionario(sistema: SistemaPonto, usuario: Usuario, menu: str) -> No
         st.markdown("### Dados cadastrais")
         st.dataframe(dados)
 
-        historico = df_reg[df_reg["matricula"] == matricula].copy()
+        historico = sistema.consultar_registros(matricula=matricula)
         if historico.empty:
             st.info("Ainda não há registros de ponto para esta matrícula.")
         else:
-            historico = historico.sort_values("timestamp")
             st.markdown("### Histórico de ponto")
             st.dataframe(historico)
 
@@ -234,7 +344,7 @@ def main():
     st.set_page_config(page_title="Sistema de Ponto", layout="wide")
     st.title("Sistema de Ponto - Empresa PontoFácil")
 
-    sistema = SistemaPonto()
+    sistema = obter_sistema()
 
     st.sidebar.title("Acesso ao sistema")
     tipo_usuario_label = st.sidebar.radio(
@@ -248,10 +358,12 @@ def main():
             "Navegação (Administrador)",
             [
                 "Registrar dados do funcionário",
+                "Importar funcionários",
                 "Editar dados do funcionário",
                 "Consultar dados do funcionário",
                 "Consultar horários de entrada e saída",
                 "Gerar relatórios",
+                "Desempenho",
             ],
         )
         pagina_admin(sistema, menu)
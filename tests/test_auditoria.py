@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.repositories import AttendanceCSVRepository, AttendanceSQLiteRepository
+from app.services.auditoria import auditar, auditar_registros
+
+
+def test_matriculas_todas_vazias_sao_orfas():
+    df = pd.DataFrame(
+        {
+            "matricula": [np.nan, np.nan],
+            "timestamp": [datetime(2025, 11, 4, 8), datetime(2025, 11, 4, 17)],
+            "tipo": ["entrada", "saida"],
+        }
+    )
+
+    ocorrencias = auditar_registros(df, {"1"}, agora=datetime(2025, 11, 5))
+
+    orfas = ocorrencias[ocorrencias["problema"] == "matricula_orfa"]
+    assert sorted(orfas["posicao"]) == [0, 1]
+
+
+def test_matricula_vazia_misturada_com_cadastradas():
+    df = pd.DataFrame(
+        {
+            "matricula": ["1", np.nan, "9"],
+            "timestamp": [datetime(2025, 11, 4, 8), datetime(2025, 11, 4, 9), datetime(2025, 11, 4, 10)],
+            "tipo": ["entrada", "entrada", "entrada"],
+        }
+    )
+
+    ocorrencias = auditar_registros(df, {"1"}, agora=datetime(2025, 11, 4, 12))
+
+    orfas = ocorrencias[ocorrencias["problema"] == "matricula_orfa"]
+    assert sorted(orfas["posicao"]) == [1, 2]
+
+
+def test_timestamp_ilegivel_ou_vazio_vira_ocorrencia(tmp_path):
+    csv = tmp_path / "attendance.csv"
+    csv.write_text(
+        "matricula,timestamp,tipo\n"
+        "1001,2025-11-04 08:00:00.000000,entrada\n"
+        "1001,2025-13-45 99:00,saida\n"
+        "1001,,saida\n"
+        "1001,2025-11-04 17:00:00.000000,saida\n"
+    )
+    repo = AttendanceCSVRepository(csv)
+
+    ocorrencias = auditar(repo, {"1001"}, agora=datetime(2025, 11, 5))
+    repo.close()
+
+    assert sorted(zip(ocorrencias["problema"], ocorrencias["posicao"])) == [
+        ("timestamp_invalido", 1),
+        ("timestamp_invalido", 2),
+    ]
+
+
+def test_fora_de_ordem_no_sqlite_segue_a_ordem_de_gravacao(tmp_path):
+    repo = AttendanceSQLiteRepository(tmp_path / "sistema_ponto.db")
+    repo.append_frame(
+        pd.DataFrame(
+            {
+                "matricula": ["1", "1", "1"],
+                "timestamp": [datetime(2025, 11, 4, 8), datetime(2025, 11, 4, 17), datetime(2025, 11, 4, 12)],
+                "tipo": ["entrada", "saida", "entrada"],
+            }
+        )
+    )
+
+    ocorrencias = auditar(repo, {"1"}, agora=datetime(2025, 11, 4, 13))
+    repo.close()
+
+    fora_de_ordem = ocorrencias[ocorrencias["problema"] == "fora_de_ordem"]
+    assert fora_de_ordem["posicao"].tolist() == [2]
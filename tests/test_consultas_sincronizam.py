@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from app.repositories import AttendanceCSVRepository, EmployeeCSVRepository
+from app.services.sistema_ponto import SistemaPonto
+
+
+def _sistema(diretorio):
+    return SistemaPonto(
+        EmployeeCSVRepository(diretorio / "employees.csv"),
+        AttendanceCSVRepository(diretorio / "attendance.csv"),
+    )
+
+
+def test_consultas_veem_batidas_de_outra_instancia(tmp_path):
+    escritor = _sistema(tmp_path)
+    escritor.cadastrar_funcionario("1", "Ana", 30, "MATUTINO")
+    escritor.flush()
+    leitor = _sistema(tmp_path)
+
+    escritor.registrar_entrada("1", datetime(2025, 1, 5, 8))
+    escritor.flush()
+
+    assert len(leitor.consultar_registros(matricula="1")) == 1
+    assert len(leitor.dataframe_registros()) == 1
+    escritor.close()
+    leitor.close()
@@ -0,0 +1,38 @@
+import io
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+from app.services import exportacao
+
+
+def _partes():
+    bloco = pd.DataFrame(
+        {
+            "matricula": ["1", "1"],
+            "nome": ["Ana", "Ana"],
+            "timestamp": [datetime(2025, 11, 4, 8), datetime(2025, 11, 4, 17)],
+            "tipo": ["entrada", "saida"],
+        }
+    )
+    return [(exportacao.ABA_UNICA, bloco)]
+
+
+def test_csv_em_arquivo_de_texto():
+    destino = io.StringIO()
+
+    assert exportacao.escrever("csv", _partes(), destino) == 2
+    assert not destino.closed
+    assert destino.getvalue().splitlines() == [
+        "matricula,nome,timestamp,tipo",
+        "1,Ana,2025-11-04 08:00:00.000000,entrada",
+        "1,Ana,2025-11-04 17:00:00.000000,saida",
+    ]
+
+
+def test_csv_em_arquivo_binario_continua_aberto():
+    with tempfile.NamedTemporaryFile(suffix=".csv") as destino:
+        assert exportacao.escrever("csv", _partes(), destino) == 2
+        destino.seek(0)
+        assert destino.read().decode("utf-8").startswith("matricula,nome,timestamp,tipo\n")
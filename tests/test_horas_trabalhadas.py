@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import pandas as pd
+
+from app.repositories import AttendanceCSVRepository, EmployeeCSVRepository
+from app.services.sistema_ponto import SistemaPonto
+
+
+def test_entrada_aberta_seguida_de_outra_entrada_fecha_no_proximo_evento(tmp_path):
+    # Duas entradas seguidas (saída esquecida), gravadas direto no CSV
+    registros = AttendanceCSVRepository(tmp_path / "attendance.csv")
+    registros.append_frame(
+        pd.DataFrame(
+            {
+                "matricula": ["1", "1", "1"],
+                "timestamp": pd.to_datetime(
+                    ["2025-01-06 08:00", "2025-01-07 08:00", "2025-01-07 12:00"]
+                ),
+                "tipo": ["entrada", "entrada", "saida"],
+            }
+        )
+    )
+    registros.close()
+    sistema = SistemaPonto(
+        EmployeeCSVRepository(tmp_path / "employees.csv"),
+        AttendanceCSVRepository(tmp_path / "attendance.csv"),
+    )
+    sistema.cadastrar_funcionario("1", "Ana", 30, "MATUTINO")
+
+    horas = sistema.horas_trabalhadas(periodo=None, incluir_abertas=True)
+
+    assert horas["horas"].tolist() == [24.0 + 4.0]
+    assert horas["jornadas"].tolist() == [1]
+    assert horas["abertas"].tolist() == [1]
+    sistema.close()
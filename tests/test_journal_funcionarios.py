@@ -0,0 +1,18 @@
+from app.models.funcionario import Funcionario
+from app.models.turno import Turno
+from app.repositories import EmployeeCSVRepository
+
+
+def test_linha_cortada_no_journal_e_descartada(tmp_path):
+    repo = EmployeeCSVRepository(tmp_path / "employees.csv")
+    repo.append_change("create", Funcionario("1", "Ana", 30, Turno.MATUTINO))
+    with open(repo.journal_path, "a", encoding="utf-8") as f:
+        f.write("create,2,Bia,25,Mat")
+
+    assert [f.matricula for f in repo.load_all()] == ["1"]
+    assert list(repo.load_frame()["matricula"]) == ["1"]
+
+    # O próximo acréscimo fecha a linha cortada, que continua sendo ignorada
+    repo.append_change("create", Funcionario("3", "Cid", 40, Turno.NOTURNO))
+    assert [f.matricula for f in EmployeeCSVRepository(repo.path).load_all()] == ["1", "3"]
+    assert list(EmployeeCSVRepository(repo.path).load_frame()["matricula"]) == ["1", "3"]
@@ -0,0 +1,140 @@
+"""
+Vários processos usando a mesma pasta de dados ao mesmo tempo (ex.: CLI e
+Streamlit lado a lado).
+"""
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from app.config import SNAPSHOT_CAUDA_MAXIMA
+from app.repositories import AttendanceCSVRepository, EmployeeCSVRepository
+from app.services.auditoria import auditar
+from app.services.sistema_ponto import SistemaPonto
+
+RAIZ = Path(__file__).resolve().parents[1]
+PROCESSOS = 4
+
+PREAMBULO = """
+import sys
+from pathlib import Path
+from app.repositories import AttendanceCSVRepository, EmployeeCSVRepository
+from app.services.auditoria import auditar
+from app.services.sistema_ponto import SistemaPonto
+
+dados, matricula = Path(sys.argv[1]), sys.argv[2]
+sistema = SistemaPonto(
+    EmployeeCSVRepository(dados / "employees.csv"),
+    AttendanceCSVRepository(dados / "attendance.csv"),
+)
+"""
+
+
+def _sistema(dados: Path) -> SistemaPonto:
+    return SistemaPonto(
+        EmployeeCSVRepository(dados / "employees.csv"),
+        AttendanceCSVRepository(dados / "attendance.csv"),
+    )
+
+
+def _preparar(dados: Path) -> None:
+    sistema = _sistema(dados)
+    for i in range(PROCESSOS):
+        sistema.cadastrar_funcionario(str(i), f"Funcionário {i}", 30, "MATUTINO")
+    sistema.close()
+
+
+def _rodar_em_paralelo(dados: Path, corpo: str) -> None:
+    processos = [
+        subprocess.Popen(
+            [sys.executable, "-c", PREAMBULO + corpo, str(dados), str(i)],
+            cwd=RAIZ,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for i in range(PROCESSOS)
+    ]
+    erros = [p.communicate()[1] for p in processos]
+    assert [p.returncode for p in processos] == [0] * PROCESSOS, "\n".join(erros)
+
+
+def test_batidas_concorrentes_na_mesma_matricula(tmp_path):
+    _preparar(tmp_path)
+
+    # Todos disputam a matrícula "0" (validação + gravação entre processos)
+    # e batem também a própria; cada um fecha o sistema no fim
+    _rodar_em_paralelo(
+        tmp_path,
+        """
+for _ in range(25):
+    for registrar in (sistema.registrar_entrada, sistema.registrar_saida):
+        for alvo in ("0", matricula):
+            try:
+                registrar(alvo)
+            except ValueError:
+                pass  # outro processo bateu antes
+sistema.close()
+""",
+    )
+
+    repo = AttendanceCSVRepository(tmp_path / "attendance.csv")
+    df = repo.load_frame()
+    tipos = df.loc[df["matricula"] == "0", "tipo"].tolist()
+    assert tipos and tipos == ["entrada", "saida"] * (len(tipos) // 2) + ["entrada"] * (len(tipos) % 2)
+    ocorrencias = auditar(repo, {str(i) for i in range(PROCESSOS)}, horas_em_aberto=1)
+    repo.close()
+    assert ocorrencias.empty
+
+    sistema = _sistema(tmp_path)
+    resumo = sistema.resumo_diario().groupby("matricula")[["entradas", "saidas"]].sum()
+    sistema.close()
+    contagem = df.groupby(["matricula", "tipo"]).size().unstack(fill_value=0)
+    assert resumo["entradas"].tolist() == contagem["entrada"].tolist()
+    assert resumo["saidas"].tolist() == contagem["saida"].tolist()
+
+
+def test_resumos_salvos_por_varios_processos(tmp_path):
+    _preparar(tmp_path)
+
+    _rodar_em_paralelo(
+        tmp_path,
+        """
+for _ in range(20):
+    sistema.reconstruir_resumo_diario()
+sistema.registrar_entrada(matricula)
+sistema.close()
+""",
+    )
+
+    assert not list(tmp_path.glob("*.tmp"))
+    sistema = _sistema(tmp_path)
+    assert sistema.resumo_diario()["entradas"].sum() == PROCESSOS
+    sistema.close()
+
+
+def test_snapshot_gravado_por_varias_partidas(tmp_path):
+    _preparar(tmp_path)
+    # Histórico grande o bastante para cada partida gravar o snapshot
+    n = SNAPSHOT_CAUDA_MAXIMA
+    repo = AttendanceCSVRepository(tmp_path / "attendance.csv")
+    repo.append_frame(
+        pd.DataFrame(
+            {
+                "matricula": [str(i % PROCESSOS) for i in range(n)],
+                "timestamp": pd.date_range(datetime(2020, 1, 1), periods=n, freq="h"),
+                "tipo": ["entrada" if (i // PROCESSOS) % 2 == 0 else "saida" for i in range(n)],
+            }
+        )
+    )
+    repo.close()
+
+    for _ in range(3):
+        (tmp_path / "attendance.snapshot.npz").unlink(missing_ok=True)
+        _rodar_em_paralelo(tmp_path, "sistema.close()\n")
+
+    assert not list(tmp_path.glob("*.tmp"))
+    sistema = _sistema(tmp_path)
+    assert len(sistema.dataframe_registros()) == n
+    sistema.close()
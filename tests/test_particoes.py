@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from app.models.registro_ponto import RegistroPonto
+from app.repositories import AttendancePartitionedCSVRepository
+
+
+def test_batida_retroativa_depois_da_compressao_nao_se_perde(tmp_path):
+    escritor = AttendancePartitionedCSVRepository(tmp_path)
+    escritor.append(RegistroPonto("1", datetime(2025, 1, 5, 8), "entrada"))
+    escritor.flush()
+
+    # Outro processo comprime janeiro enquanto o escritor mantém o .csv aberto
+    assert AttendancePartitionedCSVRepository(tmp_path).compress_old_partitions("2025-02") == ["2025-01"]
+    escritor.append(RegistroPonto("1", datetime(2025, 1, 5, 17), "saida"))
+    escritor.close()
+
+    df = AttendancePartitionedCSVRepository(tmp_path).load_frame()
+    assert df["tipo"].tolist() == ["entrada", "saida"]
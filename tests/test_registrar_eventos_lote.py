@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.repositories import AttendanceCSVRepository, EmployeeCSVRepository
+from app.services.sistema_ponto import SistemaPonto
+
+
+@pytest.fixture
+def sistema(tmp_path):
+    sistema = SistemaPonto(
+        EmployeeCSVRepository(tmp_path / "employees.csv"),
+        AttendanceCSVRepository(tmp_path / "attendance.csv"),
+    )
+    sistema.cadastrar_funcionario("1", "Ana", 30, "MATUTINO")
+    sistema.cadastrar_funcionario("2", "Bia", 25, "VESPERTINO")
+    yield sistema
+    sistema.close()
+
+
+def _local(texto: str) -> datetime:
+    return datetime.fromisoformat(texto).astimezone().replace(tzinfo=None)
+
+
+def test_lote_so_com_fuso_converte_para_horario_local(sistema):
+    rejeitados = sistema.registrar_eventos_lote(
+        [
+            ("1", "2025-11-04T08:00:00+00:00", "entrada"),
+            ("1", "2025-11-04T17:00:00+00:00", "saida"),
+        ]
+    )
+
+    assert rejeitados.empty
+    registros = sistema.consultar_registros(matricula="1")
+    assert list(registros["timestamp"]) == [
+        _local("2025-11-04T08:00:00+00:00"),
+        _local("2025-11-04T17:00:00+00:00"),
+    ]
+
+
+def test_lote_misturando_com_e_sem_fuso(sistema):
+    rejeitados = sistema.registrar_eventos_lote(
+        [
+            ("1", "2025-11-04T08:00:00+00:00", "entrada"),
+            ("2", "2025-11-04T13:00:00", "entrada"),
+            ("2", datetime(2025, 11, 4, 21, tzinfo=timezone.utc), "saida"),
+            ("1", "não é horário", "saida"),
+        ]
+    )
+
+    assert list(rejeitados.index) == [3]
+    assert rejeitados.loc[3, "motivo"] == "Timestamp inválido."
+    assert sistema.ultimo_evento("1").timestamp == _local("2025-11-04T08:00:00+00:00")
+    assert sistema.ultimo_evento("2").timestamp == _local("2025-11-04T21:00:00+00:00")
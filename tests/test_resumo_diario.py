@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from app.repositories import (
+    AttendanceCSVRepository,
+    AttendanceSQLiteRepository,
+    EmployeeCSVRepository,
+    EmployeeSQLiteRepository,
+)
+from app.services.sistema_ponto import SistemaPonto
+
+
+def _sistema(dados):
+    return SistemaPonto(
+        EmployeeCSVRepository(dados / "employees.csv"),
+        AttendanceCSVRepository(dados / "attendance.csv"),
+    )
+
+
+def test_resumo_reconstruido_apos_edicao_que_mantem_as_linhas(tmp_path):
+    sistema = _sistema(tmp_path)
+    sistema.cadastrar_funcionario("1", "Ana", 30, "MATUTINO")
+    sistema.registrar_entrada("1", datetime(2025, 1, 5, 8))
+    sistema.registrar_saida("1", datetime(2025, 1, 5, 17))
+    sistema.close()
+
+    # Mesmo tamanho, mesma quantidade de linhas: só o horário da saída muda
+    csv = tmp_path / "attendance.csv"
+    texto = csv.read_text()
+    csv.write_text(texto.replace("2025-01-05 17:", "2025-01-05 18:"))
+
+    sistema = _sistema(tmp_path)
+    resumo = sistema.resumo_diario()
+    sistema.close()
+    assert resumo["minutos"].tolist() == [600.0]
+
+
+def test_resumo_no_sqlite_recebe_batidas_de_outra_instancia(tmp_path):
+    banco = tmp_path / "sistema_ponto.db"
+    escritor = SistemaPonto(EmployeeSQLiteRepository(banco), AttendanceSQLiteRepository(banco))
+    escritor.cadastrar_funcionario("1", "Ana", 30, "MATUTINO")
+    escritor.cadastrar_funcionario("2", "Bia", 25, "VESPERTINO")
+    leitor = SistemaPonto(EmployeeSQLiteRepository(banco), AttendanceSQLiteRepository(banco))
+
+    escritor.registrar_entrada("1", datetime(2025, 1, 5, 8))
+    leitor.registrar_entrada("2", datetime(2025, 1, 5, 13))
+    escritor.registrar_saida("1", datetime(2025, 1, 5, 17))
+
+    resumo = leitor.resumo_diario().set_index("matricula")
+    assert resumo.loc["1", ["entradas", "saidas", "minutos"]].tolist() == [1, 1, 540.0]
+    assert resumo.loc["2", ["entradas", "saidas"]].tolist() == [1, 0]
+    escritor.close()
+    leitor.close()
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app.repositories import (
+    AttendanceCSVRepository,
+    AttendanceSQLiteRepository,
+    EmployeeCSVRepository,
+    EmployeeSQLiteRepository,
+)
+from app.services.sistema_ponto import SistemaPonto
+
+
+def _csv(diretorio):
+    return SistemaPonto(
+        EmployeeCSVRepository(diretorio / "employees.csv"),
+        AttendanceCSVRepository(diretorio / "attendance.csv"),
+    )
+
+
+def _sqlite(diretorio):
+    return SistemaPonto(
+        EmployeeSQLiteRepository(diretorio / "sistema_ponto.db"),
+        AttendanceSQLiteRepository(diretorio / "sistema_ponto.db"),
+    )
+
+
+@pytest.mark.parametrize("criar", [_csv, _sqlite], ids=["csv", "sqlite"])
+def test_registros_tem_os_mesmos_tipos_em_qualquer_backend(tmp_path, criar):
+    sistema = criar(tmp_path)
+    sistema.cadastrar_funcionario("1", "Ana", 30, "MATUTINO")
+    sistema.registrar_entrada("1", datetime(2025, 1, 5, 8))
+    sistema.registrar_saida("1", datetime(2025, 1, 5, 12))
+
+    for df in (
+        sistema.dataframe_registros(),
+        sistema.consultar_registros(),
+        sistema.consultar_registros(matricula="1"),
+        sistema.consultar_registros(matricula="9"),
+    ):
+        assert isinstance(df["matricula"].dtype, pd.CategoricalDtype)
+        assert isinstance(df["tipo"].dtype, pd.CategoricalDtype)
+        assert df["timestamp"].dtype == "datetime64[ns]"
+    assert len(sistema.horas_trabalhadas()) == 1
+    sistema.close()